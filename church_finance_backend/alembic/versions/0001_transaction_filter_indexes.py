@@ -0,0 +1,59 @@
+"""Add composite indexes for transaction filtering
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (name, columns) - must stay in sync with Transaction.__table_args__
+INDEXES = [
+    ("ix_transactions_date_id", ["date", "id"]),
+    ("ix_transactions_type_date_amount", ["type", "date", "amount"]),
+    ("ix_transactions_type_category_date", ["type", "category", "date"]),
+    ("ix_transactions_province_date", ["province_id", "date"]),
+    ("ix_transactions_department_date", ["department_id", "date"]),
+    ("ix_transactions_project_date", ["project_id", "date"]),
+]
+
+
+def _existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    if "transactions" not in inspector.get_table_names():
+        return None
+    return {index["name"] for index in inspector.get_indexes("transactions")}
+
+
+def upgrade():
+    existing = _existing_indexes()
+    if existing is None:
+        # Table not created yet; Base.metadata.create_all will add the indexes
+        return
+
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    for name, columns in INDEXES:
+        if name in existing:
+            continue
+        if is_postgres:
+            # Build without blocking writes on the (large) transactions table
+            with op.get_context().autocommit_block():
+                op.create_index(name, "transactions", columns, postgresql_concurrently=True)
+        else:
+            op.create_index(name, "transactions", columns)
+
+
+def downgrade():
+    existing = _existing_indexes() or set()
+    for name, _ in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name="transactions")
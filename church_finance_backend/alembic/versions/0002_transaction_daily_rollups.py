@@ -0,0 +1,64 @@
+"""Add transaction daily rollups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    if "transactions" not in tables:
+        # Fresh database: Base.metadata.create_all builds the whole schema
+        return
+    if "transaction_daily_rollups" not in tables:
+        op.create_table(
+            "transaction_daily_rollups",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("type", sa.String(length=10), nullable=False),
+            sa.Column("category", sa.String(length=100), nullable=True),
+            sa.Column("province_id", sa.Integer(), sa.ForeignKey("provinces.id"), nullable=True),
+            sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id"), nullable=True),
+            sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id"), nullable=True),
+            sa.Column("total_amount", sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column("transaction_count", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index("ix_transaction_daily_rollups_id", "transaction_daily_rollups", ["id"])
+        op.create_index("ix_rollups_type_day", "transaction_daily_rollups", ["type", "day"])
+        op.create_index(
+            "ix_rollups_key",
+            "transaction_daily_rollups",
+            ["day", "type", "category", "province_id", "department_id", "project_id"],
+        )
+
+    # Backfill from the ledger when the table is still empty
+    is_empty = op.get_bind().execute(
+        sa.text("SELECT COUNT(*) FROM transaction_daily_rollups")
+    ).scalar() == 0
+    if is_empty:
+        op.execute(
+            """
+            INSERT INTO transaction_daily_rollups
+                (day, type, category, province_id, department_id, project_id, total_amount, transaction_count)
+            SELECT date, type, category, province_id, department_id, project_id, SUM(amount), COUNT(id)
+            FROM transactions
+            GROUP BY date, type, category, province_id, department_id, project_id
+            """
+        )
+
+
+def downgrade():
+    op.drop_table("transaction_daily_rollups")
@@ -0,0 +1,57 @@
+"""Add category rules for expense auto-tagging
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+DEFAULT_CATEGORY_RULES = [
+    ("Travel", ["travel", "transport", "fuel", "gas", "mileage", "cab", "taxi"]),
+    ("Office Supplies", ["office", "supplies", "stationery", "paper", "pen", "printer"]),
+    ("Equipment", ["equipment", "computer", "laptop", "software", "hardware"]),
+    ("Utilities", ["electricity", "water", "internet", "phone", "utility"]),
+    ("Food", ["food", "meal", "lunch", "dinner", "restaurant"]),
+    ("Maintenance", ["maintenance", "repair", "service", "fix"]),
+    ("Training", ["training", "course", "seminar", "workshop", "education"]),
+    ("Insurance", ["insurance", "premium", "policy"]),
+    ("Rent", ["rent", "lease", "facility"]),
+    ("Marketing", ["marketing", "advertising", "promotion", "campaign"]),
+]
+
+
+def upgrade():
+    if "category_rules" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    category_rules = op.create_table(
+        "category_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("category", sa.String(length=100), nullable=False),
+        sa.Column("keyword", sa.String(length=100), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_category_rules_id", "category_rules", ["id"])
+
+    # Seed the rules that were previously hard-coded, keeping their precedence
+    op.bulk_insert(category_rules, [
+        {"category": category, "keyword": keyword, "priority": priority, "is_active": True}
+        for priority, (category, keywords) in enumerate(DEFAULT_CATEGORY_RULES)
+        for keyword in keywords
+    ])
+
+
+def downgrade():
+    op.drop_table("category_rules")
@@ -0,0 +1,43 @@
+"""Add precomputed province performance rankings
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    # Skipped on a fresh database too: Base.metadata.create_all builds the whole schema
+    if "province_performance" in tables or "provinces" not in tables:
+        return
+
+    op.create_table(
+        "province_performance",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("financial_year_id", sa.Integer(), sa.ForeignKey("financial_years.id"), nullable=False),
+        sa.Column("province_id", sa.Integer(), sa.ForeignKey("provinces.id"), nullable=False),
+        sa.Column("receipts_total", sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column("target_amount", sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column("performance_score", sa.Float(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("is_stale", sa.Boolean(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("financial_year_id", "province_id", name="uq_province_performance_year_province"),
+    )
+    op.create_index("ix_province_performance_id", "province_performance", ["id"])
+    op.create_index("ix_province_performance_year_rank", "province_performance", ["financial_year_id", "rank"])
+
+
+def downgrade():
+    op.drop_table("province_performance")
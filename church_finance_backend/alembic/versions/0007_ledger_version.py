@@ -0,0 +1,33 @@
+"""Add ledger version counter for response cache invalidation
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "ledger_version" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    ledger_version = op.create_table(
+        "ledger_version",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.bulk_insert(ledger_version, [{"id": 1, "version": 0}])
+
+
+def downgrade():
+    op.drop_table("ledger_version")
@@ -0,0 +1,69 @@
+"""Make the transaction rollup key unique
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+# Must stay in sync with ROLLUP_KEY in app/models/transaction_rollup.py
+KEY = [
+    "day",
+    "type",
+    "coalesce(category, '')",
+    "coalesce(province_id, 0)",
+    "coalesce(department_id, 0)",
+    "coalesce(project_id, 0)",
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "transaction_daily_rollups" not in inspector.get_table_names():
+        # Fresh database: Base.metadata.create_all builds the unique index with the table
+        return
+    existing = {index["name"] for index in inspector.get_indexes("transaction_daily_rollups")}
+    if "uq_rollups_key" in existing:
+        return
+
+    # Concurrent writers could each insert a row for the same key; rebuild the
+    # rollups from the ledger if that happened, so the unique index can be built
+    duplicated = bind.execute(sa.text(
+        f"SELECT 1 FROM transaction_daily_rollups GROUP BY {', '.join(KEY)} HAVING COUNT(*) > 1 LIMIT 1"
+    )).first()
+    if duplicated:
+        op.execute("DELETE FROM transaction_daily_rollups")
+        op.execute(
+            """
+            INSERT INTO transaction_daily_rollups
+                (day, type, category, province_id, department_id, project_id, total_amount, transaction_count)
+            SELECT date, type, NULLIF(category, ''), province_id, department_id, project_id, SUM(amount), COUNT(id)
+            FROM transactions
+            GROUP BY date, type, NULLIF(category, ''), province_id, department_id, project_id
+            """
+        )
+
+    op.create_index("uq_rollups_key", "transaction_daily_rollups", [sa.text(column) for column in KEY], unique=True)
+    if "ix_rollups_key" in existing:
+        # The unique index covers the same lookups
+        op.drop_index("ix_rollups_key", table_name="transaction_daily_rollups")
+
+
+def downgrade():
+    op.create_index(
+        "ix_rollups_key",
+        "transaction_daily_rollups",
+        ["day", "type", "category", "province_id", "department_id", "project_id"],
+    )
+    op.drop_index("uq_rollups_key", table_name="transaction_daily_rollups")
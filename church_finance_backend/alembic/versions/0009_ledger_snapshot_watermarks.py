@@ -0,0 +1,49 @@
+"""Index transactions.updated_at and add deleted transaction tombstones
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    if "transactions" in tables:
+        existing = {index["name"] for index in inspector.get_indexes("transactions")}
+        if "ix_transactions_updated_at" not in existing:
+            if op.get_bind().dialect.name == "postgresql":
+                # Build without blocking writes on the (large) transactions table
+                with op.get_context().autocommit_block():
+                    op.create_index(
+                        "ix_transactions_updated_at", "transactions", ["updated_at"], postgresql_concurrently=True
+                    )
+            else:
+                op.create_index("ix_transactions_updated_at", "transactions", ["updated_at"])
+
+    if "deleted_transactions" not in tables:
+        op.create_table(
+            "deleted_transactions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("transaction_id", sa.Integer(), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index("ix_deleted_transactions_deleted_at", "deleted_transactions", ["deleted_at"])
+
+
+def downgrade():
+    op.drop_table("deleted_transactions")
+    inspector = sa.inspect(op.get_bind())
+    if "ix_transactions_updated_at" in {index["name"] for index in inspector.get_indexes("transactions")}:
+        op.drop_index("ix_transactions_updated_at", table_name="transactions")
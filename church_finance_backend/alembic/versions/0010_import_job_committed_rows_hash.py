@@ -0,0 +1,33 @@
+"""Add a hash of committed rows to import jobs, checked when an upload resumes
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "import_jobs" not in inspector.get_table_names():
+        # Fresh database: Base.metadata.create_all builds the whole schema
+        return
+    if "committed_rows_hash" not in {column["name"] for column in inspector.get_columns("import_jobs")}:
+        # Jobs started before this revision have no hash and resume unchecked
+        op.add_column("import_jobs", sa.Column("committed_rows_hash", sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "committed_rows_hash" in {column["name"] for column in inspector.get_columns("import_jobs")}:
+        with op.batch_alter_table("import_jobs") as batch_op:
+            batch_op.drop_column("committed_rows_hash")
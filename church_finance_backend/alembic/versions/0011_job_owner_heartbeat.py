@@ -0,0 +1,38 @@
+"""Record which worker runs a job and when it last beat
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "jobs" not in inspector.get_table_names():
+        # Fresh database: Base.metadata.create_all builds the whole schema
+        return
+    existing = {column["name"] for column in inspector.get_columns("jobs")}
+    # Running jobs without an owner are recovered once started_at goes stale
+    if "owner" not in existing:
+        op.add_column("jobs", sa.Column("owner", sa.String(length=255), nullable=True))
+    if "heartbeat_at" not in existing:
+        op.add_column("jobs", sa.Column("heartbeat_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("jobs")}
+    with op.batch_alter_table("jobs") as batch_op:
+        if "heartbeat_at" in existing:
+            batch_op.drop_column("heartbeat_at")
+        if "owner" in existing:
+            batch_op.drop_column("owner")
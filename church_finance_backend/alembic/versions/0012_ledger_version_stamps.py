@@ -0,0 +1,70 @@
+"""Stamp transactions and tombstones with the ledger version that wrote them
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-20 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def _create_index(name, table, columns):
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking writes on the (large) transactions table
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+    else:
+        op.create_index(name, table, columns)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+    if "transactions" not in tables:
+        # Fresh database: Base.metadata.create_all builds the whole schema
+        return
+
+    # Existing rows count as written at the current version, so the first
+    # write after the upgrade doesn't have to stamp the whole ledger
+    current = 0
+    if "ledger_version" in tables:
+        current = op.get_bind().execute(sa.text("SELECT version FROM ledger_version WHERE id = 1")).scalar() or 0
+
+    for table, old_index in (
+        ("transactions", "ix_transactions_updated_at"),
+        ("deleted_transactions", "ix_deleted_transactions_deleted_at"),
+    ):
+        if table not in tables:
+            continue
+        if "ledger_version" not in {column["name"] for column in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column("ledger_version", sa.BigInteger(), nullable=True))
+            op.execute(sa.text(f"UPDATE {table} SET ledger_version = :version").bindparams(version=current))
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if f"ix_{table}_ledger_version" not in existing:
+            _create_index(f"ix_{table}_ledger_version", table, ["ledger_version"])
+        # The snapshot no longer reads by timestamp
+        if old_index in existing:
+            op.drop_index(old_index, table_name=table)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, old_index, old_column in (
+        ("transactions", "ix_transactions_updated_at", "updated_at"),
+        ("deleted_transactions", "ix_deleted_transactions_deleted_at", "deleted_at"),
+    ):
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if old_index not in existing:
+            op.create_index(old_index, table, [old_column])
+        if f"ix_{table}_ledger_version" in existing:
+            op.drop_index(f"ix_{table}_ledger_version", table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("ledger_version")
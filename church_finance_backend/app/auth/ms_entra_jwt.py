@@ -1,50 +1,157 @@
 import os
-import json
+import time
+import asyncio
+import logging
 import requests
-from jose import jwt
-from jose.utils import base64url_decode
-from typing import Dict, Any
-from datetime import datetime, timezone
+from jose import jwt, jwk
+from jose.backends.base import Key
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
 
 # Environment configuration
 MS_ENTRA_TENANT_ID = os.getenv("MS_ENTRA_TENANT_ID")
 MS_ENTRA_CLIENT_ID = os.getenv("MS_ENTRA_CLIENT_ID")
+# Override for tests or sovereign clouds; defaults to the tenant's v2.0 keys endpoint
+MS_ENTRA_JWKS_URL = os.getenv("MS_ENTRA_JWKS_URL")
 
-_JWKS_CACHE: Dict[str, Any] = {"keys": [], "fetched_at": None}
+JWKS_TTL_SECONDS = 600
+JWKS_REFRESH_MARGIN_SECONDS = 60
+JWKS_MIN_REFRESH_INTERVAL_SECONDS = 30
+JWKS_RETRY_SECONDS = 15
+JWKS_FETCH_TIMEOUT_SECONDS = 5
 
 
 def _get_jwks_url() -> str:
+    if MS_ENTRA_JWKS_URL:
+        return MS_ENTRA_JWKS_URL
     # Using v2.0 endpoint supports both v1 and v2 tokens
     return f"https://login.microsoftonline.com/{MS_ENTRA_TENANT_ID}/discovery/v2.0/keys"
 
 
-def _fetch_jwks() -> Dict[str, Any]:
-    global _JWKS_CACHE
-    now = datetime.now(timezone.utc)
-    # Simple 10 minute cache
-    if _JWKS_CACHE["keys"] and _JWKS_CACHE["fetched_at"] and (now - _JWKS_CACHE["fetched_at"]).total_seconds() < 600:
-        return {"keys": _JWKS_CACHE["keys"]}
-    resp = requests.get(_get_jwks_url(), timeout=5)
-    resp.raise_for_status()
-    data = resp.json()
-    _JWKS_CACHE = {"keys": data.get("keys", []), "fetched_at": now}
-    return {"keys": _JWKS_CACHE["keys"]}
+class JWKSKeyStore:
+    """Signing keys from a JWKS endpoint, indexed by kid and parsed once.
 
+    Fetches run in a worker thread so the event loop is never blocked, and are
+    single-flight: concurrent callers share one in-progress request. Once
+    started, a background task refreshes the keys before they expire. An
+    unknown kid (key rotation) forces a refresh, at most once per
+    min_refresh_interval so bogus tokens cannot hammer the endpoint.
+    """
 
-def _get_signing_key(kid: str) -> Dict[str, Any]:
-    jwks = _fetch_jwks()
-    for key in jwks.get("keys", []):
-        if key.get("kid") == kid:
+    def __init__(
+        self,
+        jwks_url: Optional[str] = None,
+        ttl: float = JWKS_TTL_SECONDS,
+        refresh_margin: float = JWKS_REFRESH_MARGIN_SECONDS,
+        min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL_SECONDS,
+        retry_interval: float = JWKS_RETRY_SECONDS,
+        timeout: float = JWKS_FETCH_TIMEOUT_SECONDS,
+    ):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Key] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_attempt: Optional[float] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresher: Optional[asyncio.Task] = None
+        self.fetch_count = 0
+
+    @property
+    def expires_at(self) -> float:
+        return (self._fetched_at or 0) + self.ttl
+
+    def is_fresh(self) -> bool:
+        return self._fetched_at is not None and time.monotonic() < self.expires_at
+
+    async def get_key(self, kid: str) -> Key:
+        """Return the parsed signing key for kid, refreshing only when needed"""
+        if not self.is_fresh():
+            try:
+                await self.refresh()
+            except Exception:
+                # Serve the previous keys if the endpoint is briefly unavailable
+                if not self._keys:
+                    raise
+                logger.warning("JWKS refresh failed; using cached keys", exc_info=True)
+        key = self._keys.get(kid)
+        if key is not None:
             return key
-    # refetch once in case of rotation
-    jwks = _fetch_jwks()
-    for key in jwks.get("keys", []):
-        if key.get("kid") == kid:
-            return key
-    raise ValueError("Signing key not found for kid")
-
 
-def validate_entra_jwt(token: str) -> Dict[str, Any]:
+        # Unknown kid: keys may have rotated, but rate-limit forced reloads
+        if self._last_attempt is None or time.monotonic() - self._last_attempt >= self.min_refresh_interval:
+            await self.refresh()
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+        raise ValueError("Signing key not found for kid")
+
+    async def refresh(self) -> None:
+        """Reload the key set, joining a fetch that is already in progress"""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._load())
+        # shield so one cancelled caller doesn't cancel the shared fetch
+        await asyncio.shield(self._inflight)
+
+    async def _load(self) -> None:
+        self._last_attempt = time.monotonic()
+        loop = asyncio.get_event_loop()
+        data = await loop.run_in_executor(None, self._fetch)
+        keys = {}
+        for key_data in data.get("keys", []):
+            kid = key_data.get("kid")
+            if not kid or key_data.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[kid] = jwk.construct(key_data, key_data.get("alg", "RS256"))
+            except Exception:
+                logger.warning("Skipping unparseable JWKS key %s", kid)
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    def _fetch(self) -> Dict[str, Any]:
+        self.fetch_count += 1
+        resp = requests.get(self.jwks_url or _get_jwks_url(), timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def start(self) -> None:
+        """Start refreshing keys in the background ahead of expiry"""
+        if self._refresher is None:
+            self._refresher = asyncio.get_event_loop().create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresher is None:
+            return
+        self._refresher.cancel()
+        try:
+            await self._refresher
+        except asyncio.CancelledError:
+            pass
+        self._refresher = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                delay = max(self.expires_at - self.refresh_margin - time.monotonic(), self.retry_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Keep serving the previous keys and try again shortly
+                logger.warning("JWKS refresh failed", exc_info=True)
+                delay = self.retry_interval
+            await asyncio.sleep(delay)
+
+
+jwks_store = JWKSKeyStore()
+
+
+async def validate_entra_jwt(token: str, key_store: Optional[JWKSKeyStore] = None) -> Dict[str, Any]:
     """Validate a Microsoft Entra access or id token using JWKS.
 
     Returns decoded claims if valid. Raises ValueError on failure.
@@ -58,7 +165,12 @@ def validate_entra_jwt(token: str) -> Dict[str, Any]:
     if not kid:
         raise ValueError("Missing kid in token header")
 
-    signing_key = _get_signing_key(kid)
+    try:
+        signing_key = await (key_store or jwks_store).get_key(kid)
+    except ValueError:
+        raise
+    except Exception as exc:
+        raise ValueError(f"Unable to load signing keys: {exc}")
 
     issuer = f"https://login.microsoftonline.com/{MS_ENTRA_TENANT_ID}/v2.0"
     audience = MS_ENTRA_CLIENT_ID
@@ -80,5 +192,3 @@ def validate_entra_jwt(token: str) -> Dict[str, Any]:
         return claims
     except Exception as exc:
         raise ValueError(f"Token validation failed: {exc}")
-
-
@@ -1,6 +1,14 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.sql.expression import UpdateBase
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+import itertools
+import threading
+import time
 import os
 from dotenv import load_dotenv
 
@@ -10,22 +18,344 @@ load_dotenv()
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./church_finance.db")
 
+# Pool and engine tuning; pool settings only apply to server databases
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 disables
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Read replicas for reporting queries: comma-separated URLs using the same driver as DATABASE_URL
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "30"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))  # seconds between lag probes
+
+class PoolMetrics:
+    """Counters for connection pool usage, shared by the sync and async engines"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+    
+    def record_connect(self, *args):
+        with self._lock:
+            self.connections_opened += 1
+    
+    def record_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+    
+    def record_checkin(self, *args):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+    
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "connections_opened": self.connections_opened,
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "wait_count": self.wait_count,
+                "wait_seconds_total": round(self.wait_seconds_total, 4),
+                "wait_seconds_max": round(self.wait_seconds_max, 4)
+            }
+
+def _timed_pool(pool_class, metrics: PoolMetrics):
+    """Subclass a queue pool to record how long callers wait for a connection"""
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                metrics.record_wait(time.perf_counter() - started)
+    TimedPool.__name__ = "Timed" + pool_class.__name__
+    return TimedPool
+
+def _engine_options(url: str, metrics: PoolMetrics, pool_class) -> Dict:
+    if url.startswith("sqlite"):
+        # SQLite keeps SQLAlchemy's default pool; tuning happens in the connect pragmas
+        return {"connect_args": {"check_same_thread": False}} if "aiosqlite" not in url else {}
+    
+    options = {
+        "poolclass": _timed_pool(pool_class, metrics),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING
+    }
+    if DB_STATEMENT_TIMEOUT_MS > 0 and url.startswith("postgres"):
+        if "asyncpg" in url:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def _configure_engine(sync_engine, url: str, metrics: PoolMetrics):
+    """Attach pool metrics, and pragmas for SQLite connections"""
+    event.listen(sync_engine, "connect", metrics.record_connect)
+    event.listen(sync_engine, "checkout", metrics.record_checkout)
+    event.listen(sync_engine, "checkin", metrics.record_checkin)
+    
+    if url.startswith("sqlite"):
+        in_memory = ":memory:" in url or url.rstrip("/").endswith("sqlite:")
+        
+        @event.listens_for(sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            # WAL lets readers proceed while a writer commits; NORMAL fsyncs at checkpoints only
+            if not in_memory:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.close()
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
 # Create engine
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL, pool_metrics, QueuePool))
+_configure_engine(engine, DATABASE_URL, pool_metrics)
+
+def _async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+# Async engine for request handlers, so queries don't block the event loop
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_database_url(DATABASE_URL))
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, async_pool_metrics, AsyncAdaptedQueuePool))
+_configure_engine(async_engine.sync_engine, ASYNC_DATABASE_URL, async_pool_metrics)
 
 # Create session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay loaded after commit so responses can be serialised without lazy loads
+AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autocommit=False, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
 
+def replication_lag(connection) -> float:
+    """Seconds a replica is behind its primary; 0 for databases that aren't replicas"""
+    if connection.dialect.name == "postgresql":
+        # Fully replayed standbys report 0 even when the primary is idle
+        return float(connection.execute(text(
+            "SELECT CASE"
+            " WHEN NOT pg_is_in_recovery() THEN 0"
+            " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+            " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+            " END"
+        )).scalar() or 0)
+    connection.execute(text("SELECT 1"))
+    return 0.0
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.async_url = _async_database_url(url)
+        self.metrics = PoolMetrics()
+        self.async_metrics = PoolMetrics()
+        self.engine = create_engine(url, **_engine_options(url, self.metrics, QueuePool))
+        _configure_engine(self.engine, url, self.metrics)
+        self.async_engine = create_async_engine(self.async_url, **_engine_options(self.async_url, self.async_metrics, AsyncAdaptedQueuePool))
+        _configure_engine(self.async_engine.sync_engine, self.async_url, self.async_metrics)
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+class ReplicaRouter:
+    """Picks a read replica that is reachable and within the allowed lag.
+    
+    Lag is probed at most once per check_interval per replica and cached in
+    between; when no replica qualifies, callers fall back to the primary.
+    """
+    
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag: float = DB_REPLICA_MAX_LAG_SECONDS,
+        check_interval: float = DB_REPLICA_CHECK_INTERVAL,
+        lag_probe: Callable = replication_lag
+    ):
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe
+        self._turn = itertools.count()
+        self.primary_fallbacks = 0
+    
+    def choose(self) -> Optional[Replica]:
+        for replica in self._stale():
+            try:
+                with replica.engine.connect() as connection:
+                    self._record(replica, self.lag_probe(connection))
+            except Exception as exc:
+                self._record(replica, None, exc)
+        return self._pick()
+    
+    async def choose_async(self) -> Optional[Replica]:
+        for replica in self._stale():
+            try:
+                async with replica.async_engine.connect() as connection:
+                    self._record(replica, await connection.run_sync(self.lag_probe))
+            except Exception as exc:
+                self._record(replica, None, exc)
+        return self._pick()
+    
+    def _stale(self) -> List[Replica]:
+        now = time.monotonic()
+        return [
+            replica for replica in self.replicas
+            if replica.checked_at is None or now - replica.checked_at >= self.check_interval
+        ]
+    
+    def _record(self, replica: Replica, lag: Optional[float], error: Optional[Exception] = None):
+        replica.lag = lag
+        replica.error = str(error) if error is not None else None
+        replica.checked_at = time.monotonic()
+    
+    def _pick(self) -> Optional[Replica]:
+        eligible = [
+            replica for replica in self.replicas
+            if replica.error is None and replica.lag is not None and replica.lag <= self.max_lag
+        ]
+        if not eligible:
+            if self.replicas:
+                self.primary_fallbacks += 1
+            return None
+        # Spread reads across replicas that are caught up
+        return eligible[next(self._turn) % len(eligible)]
+    
+    def status(self) -> List[Dict]:
+        return [
+            {
+                "url": repr(replica.engine.url),  # repr masks the password
+                "lag_seconds": replica.lag,
+                "error": replica.error,
+                "sync": replica.metrics.snapshot(),
+                "async": replica.async_metrics.snapshot()
+            }
+            for replica in self.replicas
+        ]
+
+class RoutingSession(Session):
+    """Session that reads from a replica and writes to the primary.
+    
+    Once the session has written, later reads also go to the primary so it
+    sees its own changes.
+    """
+    
+    def __init__(self, replica_engine=None, **kwargs):
+        super().__init__(**kwargs)
+        self.replica_engine = replica_engine
+        self.has_written = False
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.has_written = True
+        if self.replica_engine is None or self.has_written:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        return self.replica_engine
+
+replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db():
+    """Dependency for read-mostly endpoints: reads go to a healthy replica, writes to the primary"""
+    replica = replica_router.choose()
+    db = ReadSessionLocal(replica_engine=replica.engine if replica else None)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    """Dependency for read-only async endpoints, bound to a healthy replica or the primary"""
+    replica = await replica_router.choose_async()
+    if replica is None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        async with AsyncSession(bind=replica.async_engine, autoflush=False, expire_on_commit=False) as db:
+            yield db
+
+@contextmanager
+def session_scope():
+    """Session for code outside request dependencies (middleware, workers);
+    always returned to the pool, rolling back if the block raised"""
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+@contextmanager
+def read_session_scope():
+    """session_scope for reporting work outside requests, routed like get_read_db"""
+    replica = replica_router.choose()
+    db = ReadSessionLocal(replica_engine=replica.engine if replica else None)
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def pool_status() -> Dict:
+    """Current pool state and usage counters for both engines"""
+    def describe(sync_engine, metrics: PoolMetrics) -> Dict:
+        pool = sync_engine.pool
+        status = {"pool": type(pool).__name__, **metrics.snapshot()}
+        if hasattr(pool, "size") and hasattr(pool, "overflow"):
+            status.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow()
+            })
+        return status
+    
+    return {
+        "sync": describe(engine, pool_metrics),
+        "async": describe(async_engine.sync_engine, async_pool_metrics),
+        "replicas": replica_router.status(),
+        "replica_primary_fallbacks": replica_router.primary_fallbacks
+    }
\ No newline at end of file
@@ -1,13 +1,35 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routes import auth, provinces, transactions, bulk_upload, financial_statements, analytics, budgets, obligations, departments, projects
+from fastapi.responses import PlainTextResponse
+from app.database import engine, async_engine, Base, session_scope, pool_status
+from app.routes import auth, provinces, transactions, bulk_upload, financial_statements, analytics, budgets, obligations, departments, projects, jobs, profiling
 from app.middleware.auth_middleware import auth_middleware
+from app.auth.token_cache import verified_tokens
+from app.auth.ms_entra_jwt import jwks_store, MS_ENTRA_TENANT_ID, MS_ENTRA_JWKS_URL
 from app.middleware.audit_middleware import audit_middleware
+from app.middleware.metrics_middleware import metrics_middleware
+from app.middleware.query_detector_middleware import query_detector_middleware
+from app.middleware.profiling_middleware import profiling_middleware
+from app.services.auto_tag_service import load_category_rules
+from app.services.audit_service import audit_writer
+from app.services.job_service import JobService, job_heartbeat
+from app.services.province_ranking_service import ranking_refresher
+from app.services.response_cache import response_cache, seed_ledger_version
+from app.services.request_metrics import request_metrics, METRICS_ENABLED
+from app.services.query_detector import query_detector, QUERY_DETECTOR_ENABLED
+from app.utils.helpers import is_metrics_allowed
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Compile the expense auto-tagging rules. Rollup backfill and budget
+# reconciliation run once per deploy (python -m app.maintenance), not here
+# in every worker
+with session_scope() as _db:
+    seed_ledger_version(_db)
+    _db.commit()
+    load_category_rules(_db)
+
 app = FastAPI(
     title="Church Finance Management System",
     description="A comprehensive financial management system for church organizations",
@@ -23,10 +45,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add custom middleware
+# Add custom middleware; per-request profiling goes inside auth so it can
+# check the caller's role
+app.middleware("http")(profiling_middleware)
 app.middleware("http")(auth_middleware)
 app.middleware("http")(audit_middleware)
 
+# N+1, slow and unindexed query reports, for development and CI
+if QUERY_DETECTOR_ENABLED:
+    query_detector.instrument_engines()
+    app.middleware("http")(query_detector_middleware)
+
+# Request metrics wrap everything else, so they're added last; when disabled
+# neither the middleware nor the statement listeners are installed
+if METRICS_ENABLED:
+    request_metrics.instrument_engines()
+    app.middleware("http")(metrics_middleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(provinces.router, prefix="/api/v1/provinces", tags=["Provinces"])
@@ -38,11 +73,84 @@ app.include_router(budgets.router, prefix="/api/v1/budgets", tags=["Budgets"])
 app.include_router(obligations.router, prefix="/api/v1/obligations", tags=["Obligations"])
 app.include_router(departments.router, prefix="/api/v1/departments", tags=["Departments"])
 app.include_router(projects.router, prefix="/api/v1/projects", tags=["Projects"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["Jobs"])
+app.include_router(profiling.router, prefix="/api/v1/profiling", tags=["Profiling"])
+
+@app.on_event("startup")
+async def start_audit_writer():
+    audit_writer.start()
+
+@app.on_event("shutdown")
+async def drain_audit_writer():
+    # Flush audit records still queued before the process exits
+    await audit_writer.stop()
+
+@app.on_event("startup")
+async def recover_interrupted_jobs():
+    # Jobs queued or running when the last process stopped would otherwise never finish
+    with session_scope() as db:
+        JobService(db).recover_interrupted()
+
+@app.on_event("startup")
+async def start_job_heartbeat():
+    # Marks this worker's running jobs alive so others don't recover them
+    job_heartbeat.start()
+
+@app.on_event("shutdown")
+async def stop_job_heartbeat():
+    await job_heartbeat.stop()
+
+@app.on_event("startup")
+async def start_jwks_refresh():
+    # Keep Entra signing keys warm so token validation never waits on a fetch
+    if MS_ENTRA_TENANT_ID or MS_ENTRA_JWKS_URL:
+        jwks_store.start()
+
+@app.on_event("shutdown")
+async def stop_jwks_refresh():
+    await jwks_store.stop()
+
+@app.on_event("startup")
+async def start_ranking_refresh():
+    ranking_refresher.start()
+
+@app.on_event("shutdown")
+async def stop_ranking_refresh():
+    await ranking_refresher.stop()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
 
 @app.get("/")
 async def root():
     return {"message": "Church Finance Management System API"}
 
+def require_metrics_role(request: Request):
+    """Operational metrics are limited to Admin users"""
+    if not is_metrics_allowed(getattr(request.state, "user_role", None)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only Admin users can read metrics")
+
+@app.get("/metrics/pool", dependencies=[Depends(require_metrics_role)])
+async def get_pool_metrics():
+    """Connection pool checkouts, overflow and wait time for both engines"""
+    return pool_status()
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_role)])
+async def get_metrics():
+    """Per-route latency, SQL and response size histograms and pool gauges for Prometheus"""
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/queries", dependencies=[Depends(require_metrics_role)])
+async def get_query_findings():
+    """Recent requests flagged by the query detector (QUERY_DETECTOR_ENABLED)"""
+    return query_detector.stats()
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "audit": audit_writer.metrics(),
+        "token_cache": verified_tokens.stats(),
+        "response_cache": response_cache.stats()
+    }
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""One-off data maintenance, run once per deploy rather than in every worker:
+
+    python -m app.maintenance
+
+Populates ledger rollups for databases that predate them and brings budget
+actuals in line with the ledger. Both steps are idempotent.
+"""
+import logging
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from app.database import Base, engine, session_scope
+from app.models import (  # noqa: F401  registers tables for create_all
+    audit, budget, category_rule, deleted_transaction, department, financial_year, import_job, job,
+    ledger_version, obligation, project, province, province_performance, transaction,
+    transaction_attachment, transaction_rollup, user
+)
+from app.services.budget_reconciliation_service import BudgetReconciliationService
+from app.services.response_cache import seed_ledger_version
+from app.services.rollup_service import RollupService
+
+logger = logging.getLogger(__name__)
+
+def run_maintenance(db: Session) -> Dict[str, int]:
+    """Backfill empty rollups and reconcile every budgeted year"""
+    seed_ledger_version(db)
+    backfilled = RollupService(db).backfill_if_empty()
+    reconciled = BudgetReconciliationService(db).reconcile_all()
+    db.commit()
+    return {"rollups_backfilled": int(backfilled), "budgets_reconciled": reconciled}
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    # Runs before the app has started on a new database
+    Base.metadata.create_all(bind=engine)
+    with session_scope() as db:
+        logger.info("Maintenance finished: %s", run_maintenance(db))
+
+if __name__ == "__main__":
+    main()
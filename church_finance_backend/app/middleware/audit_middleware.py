@@ -1,7 +1,5 @@
 from fastapi import Request
-from app.models.audit import AuditLog
-from app.database import get_db
-from sqlalchemy.orm import Session
+from app.services.audit_service import audit_writer
 from datetime import datetime
 
 async def audit_middleware(request: Request, call_next):
@@ -9,27 +7,16 @@ async def audit_middleware(request: Request, call_next):
     # Process the request
     response = await call_next(request)
     
-    # Log the action if user is authenticated
+    # Log the action if user is authenticated. Records are queued and written
+    # in batches by the audit writer, so the request never waits on the database.
     if hasattr(request.state, 'user_id'):
-        # Create audit log entry
-        audit_log = AuditLog(
-            user_id=request.state.user_id,
-            action=f"{request.method} {request.url.path}",
-            entity="API_CALL",
-            entity_id=None,
-            details=f"Status: {response.status_code}",
-            timestamp=datetime.utcnow()
-        )
-        
-        # Save to database
-        try:
-            db = next(get_db())
-            db.add(audit_log)
-            db.commit()
-        except Exception:
-            # Don't fail the request if audit logging fails
-            pass
-        finally:
-            db.close()
+        audit_writer.enqueue({
+            "user_id": request.state.user_id,
+            "action": f"{request.method} {request.url.path}",
+            "entity": "API_CALL",
+            "entity_id": None,
+            "details": f"Status: {response.status_code}",
+            "timestamp": datetime.utcnow()
+        })
     
     return response
\ No newline at end of file
@@ -1,10 +1,14 @@
 from fastapi import Request, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from app.auth.jwt_handler import decode_token
-from app.database import get_db
+from app.database import session_scope
 from app.models.user import User
 import os
+import time
 from dotenv import load_dotenv
 from app.auth.ms_entra_jwt import validate_entra_jwt
+from app.auth.token_cache import verified_tokens
+from typing import Optional, Tuple
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +30,14 @@ PUBLIC_PATHS = {
     "/healthcheck"
 }
 
+def _find_user(email: str) -> Optional[Tuple[str, str]]:
+    """(user id, role) of the user with this email; blocking, so run it in the threadpool"""
+    with session_scope() as db:
+        user = db.query(User.id, User.role).filter(User.email == email).first()
+    if not user:
+        return None
+    return str(user.id), user.role
+
 async def auth_middleware(request: Request, call_next):
     """Authentication middleware to validate JWT tokens"""
 
@@ -40,6 +52,9 @@ async def auth_middleware(request: Request, call_next):
     ):
         return await call_next(request)
 
+    # How long verification took, and which path it took, for request metrics
+    started = time.perf_counter()
+
     # Extract token from Authorization header
     auth_header = request.headers.get("Authorization")
     if not auth_header:
@@ -56,15 +71,23 @@ async def auth_middleware(request: Request, call_next):
                 detail="Invalid token type"
             )
 
-        # First, try to decode as our own JWT token
-        payload = decode_token(token)
-        if payload:
+        # Tokens verified recently skip signature checks and the user lookup;
+        # otherwise, first try to decode as our own JWT token
+        cached = verified_tokens.get(token)
+        payload = None if cached else decode_token(token)
+        if cached:
+            request.state.user_id, request.state.user_role = cached
+            request.state.auth_path = "cached"
+        elif payload:
+            request.state.auth_path = "local"
             request.state.user_id = payload.get("id")
             request.state.user_role = payload.get("role")
+            verified_tokens.put(token, request.state.user_id, request.state.user_role, payload.get("exp"))
         else:
             # If our JWT decoding failed, validate as Microsoft Entra token
+            request.state.auth_path = "entra"
             try:
-                claims = validate_entra_jwt(token)
+                claims = await validate_entra_jwt(token)
                 user_email = (
                     claims.get("preferred_username")
                     or claims.get("upn")
@@ -76,16 +99,16 @@ async def auth_middleware(request: Request, call_next):
                         detail="User email not found in token"
                     )
 
-                db = next(get_db())
-                user = db.query(User).filter(User.email == user_email).first()
+                # Keep the database round trip off the event loop
+                user = await run_in_threadpool(_find_user, user_email)
                 if not user:
                     raise HTTPException(
                         status_code=status.HTTP_401_UNAUTHORIZED,
                         detail="User not found in database"
                     )
 
-                request.state.user_id = str(user.id)
-                request.state.user_role = user.role
+                request.state.user_id, request.state.user_role = user
+                verified_tokens.put(token, request.state.user_id, request.state.user_role, claims.get("exp"))
             except HTTPException:
                 raise
             except Exception:
@@ -104,4 +127,5 @@ async def auth_middleware(request: Request, call_next):
             detail="Invalid token"
         )
 
+    request.state.auth_seconds = time.perf_counter() - started
     return await call_next(request)
\ No newline at end of file
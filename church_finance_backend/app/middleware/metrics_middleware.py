@@ -0,0 +1,91 @@
+from fastapi import Request, HTTPException
+from app.services.request_metrics import request_metrics, current_request_stats, RequestStats, METRICS_SERVER_TIMING
+from typing import Dict, Optional
+import time
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Route path templates by endpoint, for routers that don't put the route in the scope
+_route_paths: Dict = {}
+
+def route_template(request: Request) -> str:
+    """The matched route's path template, so ids in URLs don't each get a series"""
+    route = request.scope.get("route")
+    if route is not None:
+        # A route inside an included router matches on its own path, without the
+        # router's prefix; recover the prefix from the concrete URL
+        concrete = route.path_format.format(**request.scope.get("path_params", {}))
+        path = request.scope.get("path", "")
+        if concrete and path.endswith(concrete):
+            return path[:len(path) - len(concrete)] + route.path
+        return route.path
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    if endpoint not in _route_paths:
+        for candidate in request.app.routes:
+            if getattr(candidate, "endpoint", None) is not None:
+                _route_paths.setdefault(candidate.endpoint, candidate.path)
+    return _route_paths.get(endpoint, UNMATCHED_ROUTE)
+
+def _finish(request: Request, status: int, started: float, stats: RequestStats, size: Optional[int]) -> None:
+    request_metrics.request_finished(
+        request.method,
+        route_template(request),
+        status,
+        time.perf_counter() - started,
+        stats,
+        size,
+        getattr(request.state, "auth_path", None),
+        getattr(request.state, "auth_seconds", None)
+    )
+
+def _server_timing(started: float, stats: RequestStats, request: Request) -> str:
+    metrics = [
+        f"app;dur={(time.perf_counter() - started) * 1000:.2f}",
+        f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.queries} queries"'
+    ]
+    auth_seconds = getattr(request.state, "auth_seconds", None)
+    if auth_seconds is not None:
+        metrics.append(f'auth;dur={auth_seconds * 1000:.2f};desc="{request.state.auth_path}"')
+    return ", ".join(metrics)
+
+async def metrics_middleware(request: Request, call_next):
+    """Record latency, SQL work, response size and auth time per route.
+
+    Added last so it wraps every other middleware. Latency is recorded once
+    the body has been sent, so streamed exports count in full; the
+    Server-Timing header can only cover the time until the headers go out.
+    """
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    started = time.perf_counter()
+    request_metrics.request_started()
+    try:
+        response = await call_next(request)
+    except Exception as exc:
+        _finish(request, exc.status_code if isinstance(exc, HTTPException) else 500, started, stats, None)
+        raise
+    finally:
+        current_request_stats.reset(token)
+
+    if METRICS_SERVER_TIMING:
+        response.headers["Server-Timing"] = _server_timing(started, stats, request)
+
+    body = getattr(response, "body_iterator", None)
+    if body is None:
+        length = response.headers.get("content-length")
+        _finish(request, response.status_code, started, stats, int(length) if length else None)
+        return response
+
+    async def counted_body():
+        size = 0
+        try:
+            async for chunk in body:
+                size += len(chunk)
+                yield chunk
+        finally:
+            _finish(request, response.status_code, started, stats, size)
+
+    response.body_iterator = counted_body()
+    return response
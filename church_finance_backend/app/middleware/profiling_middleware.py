@@ -0,0 +1,54 @@
+from fastapi import Request
+from app.services.profiler import profiler
+from app.middleware.metrics_middleware import route_template
+from app.utils.helpers import is_profiling_allowed
+
+PROFILE_HEADER = "X-Profile"
+
+async def profiling_middleware(request: Request, call_next):
+    """Profile a single request sent with an X-Profile header by an Admin.
+
+    Added before auth_middleware so it runs inside it and sees the user's
+    role. The stacks of the whole worker are sampled until the response body
+    has been sent, so concurrent requests show up too. The response carries
+    X-Profile-Id for GET /api/v1/profiling/profiles/{id}, or X-Profile-Status
+    when the profile could not be taken.
+    """
+    if PROFILE_HEADER.lower() not in request.headers:
+        return await call_next(request)
+    if not is_profiling_allowed(getattr(request.state, "user_role", None)):
+        response = await call_next(request)
+        response.headers["X-Profile-Status"] = "forbidden"
+        return response
+
+    sampler = profiler.start_request()
+    if sampler is None:
+        response = await call_next(request)
+        response.headers["X-Profile-Status"] = "busy"
+        return response
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        profiler.finish_request(sampler, f"{request.method} {route_template(request)}")
+        raise
+    label = f"{request.method} {route_template(request)}"
+
+    body = getattr(response, "body_iterator", None)
+    if body is None:
+        response.headers["X-Profile-Id"] = profiler.finish_request(sampler, label)
+        return response
+
+    # The id is known before the body is sent; the profile is stored once it has been
+    profile_id = profiler.reserve_id()
+    response.headers["X-Profile-Id"] = profile_id
+
+    async def profiled_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            profiler.finish_request(sampler, label, profile_id)
+
+    response.body_iterator = profiled_body()
+    return response
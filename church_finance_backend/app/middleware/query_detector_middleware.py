@@ -0,0 +1,37 @@
+from fastapi import Request
+from app.middleware.metrics_middleware import route_template
+from app.services.query_detector import query_detector, current_query_log, QueryLog
+
+async def query_detector_middleware(request: Request, call_next):
+    """Check each request's statements for N+1 patterns, slow and unindexed queries.
+
+    Findings are logged and listed at /metrics/queries; the response carries
+    the statement count and the number of findings in X-Query-Count and
+    X-Query-Findings. Statements run while the body streams are included in
+    the report but not in the headers.
+    """
+    log = QueryLog(f"{request.method} {request.url.path}")
+    token = current_query_log.set(log)
+    try:
+        response = await call_next(request)
+    finally:
+        current_query_log.reset(token)
+
+    log.label = f"{request.method} {route_template(request)}"
+    response.headers["X-Query-Count"] = str(log.count)
+    response.headers["X-Query-Findings"] = str(len(query_detector.findings(log)))
+
+    body = getattr(response, "body_iterator", None)
+    if body is None:
+        query_detector.report(log)
+        return response
+
+    async def reported_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            query_detector.report(log)
+
+    response.body_iterator = reported_body()
+    return response
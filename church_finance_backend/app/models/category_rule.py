@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy.sql import func
+from app.database import Base
+
+class CategoryRule(Base):
+    """A keyword that auto-tags expense descriptions with a category"""
+    __tablename__ = "category_rules"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    category = Column(String(100), nullable=False)
+    keyword = Column(String(100), nullable=False)
+    priority = Column(Integer, default=0, nullable=False)  # lower wins when several categories match
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
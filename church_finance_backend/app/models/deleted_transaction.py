@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, Integer, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class DeletedTransaction(Base):
+    """Tombstone for a deleted ledger row, so in-memory copies can drop it without rescanning the ledger"""
+    __tablename__ = "deleted_transactions"
+    
+    id = Column(Integer, primary_key=True)
+    transaction_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, server_default=func.now(), nullable=False)
+    # Stamped like transactions.ledger_version by the deleting commit
+    ledger_version = Column(BigInteger)
+    
+    __table_args__ = (
+        Index('ix_deleted_transactions_ledger_version', 'ledger_version'),
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+from enum import Enum
+
+class ImportJobStatus(str, Enum):
+    RUNNING = "Running"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+
+class ImportJob(Base):
+    """Progress of a chunked bulk upload, used to resume interrupted imports"""
+    __tablename__ = "import_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String(255), nullable=False)
+    file_format = Column(String(10), nullable=False)
+    status = Column(String(20), default=ImportJobStatus.RUNNING, nullable=False)
+    rows_committed = Column(Integer, default=0, nullable=False)
+    chunks_committed = Column(Integer, default=0, nullable=False)
+    error = Column(Text)
+    committed_rows_hash = Column(String(64))  # sha256 of the header and committed rows, checked on resume
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
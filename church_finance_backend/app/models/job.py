@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+from enum import Enum
+
+class JobStatus(str, Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+
+class JobKind(str, Enum):
+    BULK_UPLOAD = "bulk_upload"
+    STATEMENT_EXPORT = "statement_export"
+
+class Job(Base):
+    """A unit of background work run by the in-process job pool"""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), default=JobStatus.QUEUED, nullable=False)
+    params = Column(Text)  # JSON encoded job arguments
+    progress = Column(Integer, default=0, nullable=False)  # units processed so far (rows for uploads)
+    result = Column(Text)  # JSON encoded summary
+    result_path = Column(String(500))  # file produced by the job, if any
+    error = Column(Text)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    started_at = Column(DateTime)
+    owner = Column(String(255))  # host:pid:boot id of the worker that claimed the job
+    heartbeat_at = Column(DateTime)  # refreshed while the owner runs the job
+    finished_at = Column(DateTime)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, event, insert
+from sqlalchemy.sql import func
+from app.database import Base
+
+class LedgerVersion(Base):
+    """Single-row counter bumped on every ledger write; cached reports are keyed by it"""
+    __tablename__ = "ledger_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+# Writers only ever UPDATE the single row, so it exists from table creation on
+# (migration 0007 seeds it too); seed_ledger_version covers older databases
+event.listen(
+    LedgerVersion.__table__,
+    "after_create",
+    lambda table, connection, **kw: connection.execute(insert(table).values(id=1, version=0))
+)
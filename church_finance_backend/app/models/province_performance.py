@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, DateTime, Numeric, Float, Boolean, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ProvincePerformance(Base):
+    """Precomputed province ranking for a financial year, maintained by ProvinceRankingService"""
+    __tablename__ = "province_performance"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    financial_year_id = Column(Integer, ForeignKey("financial_years.id"), nullable=False)
+    province_id = Column(Integer, ForeignKey("provinces.id"), nullable=False)
+    receipts_total = Column(Numeric(precision=15, scale=2), nullable=False, default=0)
+    target_amount = Column(Numeric(precision=15, scale=2), nullable=False, default=0)
+    performance_score = Column(Float, nullable=False, default=0.0)
+    rank = Column(Integer, nullable=False)
+    is_stale = Column(Boolean, nullable=False, default=False)
+    refreshed_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('financial_year_id', 'province_id', name='uq_province_performance_year_province'),
+        Index('ix_province_performance_year_rank', 'financial_year_id', 'rank'),
+    )
@@ -1,5 +1,5 @@
 from enum import Enum
-from sqlalchemy import Column, Integer, Date, DateTime, Numeric, String, Text, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, Date, DateTime, Numeric, String, Text, ForeignKey, Index, null
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -23,4 +23,18 @@ class Transaction(Base):
     approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Ledger version of the commit that last wrote the row, stamped by
+    # bump_ledger_version; NULL until then, so every write clears it
+    ledger_version = Column(BigInteger, onupdate=null())
+    
+    # Indexes
+    __table_args__ = (
+        Index('ix_transactions_date_id', 'date', 'id'),  # keyset pagination seek
+        Index('ix_transactions_type_date_amount', 'type', 'date', 'amount'),  # covering index for receipt/expense totals
+        Index('ix_transactions_type_category_date', 'type', 'category', 'date'),  # category breakdowns
+        Index('ix_transactions_province_date', 'province_id', 'date'),
+        Index('ix_transactions_department_date', 'department_id', 'date'),
+        Index('ix_transactions_project_date', 'project_id', 'date'),
+        Index('ix_transactions_ledger_version', 'ledger_version'),  # version stamping and ledger snapshot refresh
+    )
\ No newline at end of file
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, Date, DateTime, Numeric, String, ForeignKey, Index, literal_column
+from sqlalchemy.sql import func
+from app.database import Base
+
+class TransactionDailyRollup(Base):
+    """Per-day totals of the transactions table, maintained by RollupService"""
+    __tablename__ = "transaction_daily_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    type = Column(String(10), nullable=False)
+    category = Column(String(100))
+    province_id = Column(Integer, ForeignKey("provinces.id"), nullable=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
+    total_amount = Column(Numeric(precision=15, scale=2), nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    # Indexes
+    __table_args__ = (
+        Index('ix_rollups_type_day', 'type', 'day'),
+    )
+
+# The rollup key, with NULLs coalesced so that they compare equal: one row per
+# key, which writers upsert on. Also the conflict target of those upserts, so it
+# must match the uq_rollups_key index exactly
+_rollups = TransactionDailyRollup.__table__
+ROLLUP_KEY = (
+    _rollups.c.day,
+    _rollups.c.type,
+    func.coalesce(_rollups.c.category, literal_column("''")),
+    func.coalesce(_rollups.c.province_id, literal_column("0")),
+    func.coalesce(_rollups.c.department_id, literal_column("0")),
+    func.coalesce(_rollups.c.project_id, literal_column("0")),
+)
+Index('uq_rollups_key', *ROLLUP_KEY, unique=True)
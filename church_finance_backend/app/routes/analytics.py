@@ -1,32 +1,53 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_read_db
 from datetime import date
-from sqlalchemy import func, and_
-from app.models.transaction import Transaction
+from typing import Optional
+from app.services.rollup_service import RollupService
+from app.services.response_cache import response_cache
+from app.services.ledger_snapshot import ledger_analytics
+from app.utils.money import cents_to_float
 
 router = APIRouter()
 
 @router.get("/dashboard")
-async def get_dashboard_summary(db: Session = Depends(get_db)):
-    total_receipts = db.query(func.sum(Transaction.amount)).filter(Transaction.type == "receipt").scalar() or 0
-    total_expenses = db.query(func.sum(Transaction.amount)).filter(Transaction.type == "expense").scalar() or 0
-    return {
-        "total_receipts": float(total_receipts),
-        "total_expenses": float(total_expenses),
-        "net": float(total_receipts - total_expenses)
-    }
+async def get_dashboard_summary(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    return await response_cache.respond(
+        request, db, "dashboard", {}, _dashboard_summary
+    )
 
 @router.get("/dashboard/{year}")
-async def get_dashboard_summary_by_year(year: int, db: Session = Depends(get_db)):
+async def get_dashboard_summary_by_year(year: int, request: Request, db: AsyncSession = Depends(get_async_read_db)):
     start = date(year, 1, 1)
     end = date(year, 12, 31)
-    total_receipts = db.query(func.sum(Transaction.amount)).filter(and_(Transaction.type == "receipt", Transaction.date >= start, Transaction.date <= end)).scalar() or 0
-    total_expenses = db.query(func.sum(Transaction.amount)).filter(and_(Transaction.type == "expense", Transaction.date >= start, Transaction.date <= end)).scalar() or 0
-    return {
-        "total_receipts": float(total_receipts),
-        "total_expenses": float(total_expenses),
-        "net": float(total_receipts - total_expenses)
-    }
+    return await response_cache.respond(
+        request, db, "dashboard", {"year": year},
+        lambda session: _dashboard_summary(session, start, end)
+    )
 
+@router.get("/timeseries")
+async def get_time_series(
+    request: Request,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    interval: str = Query("month", regex="^(day|month)$"),
+    province_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Receipts, expenses and net per day or month"""
+    params = {"start_date": start_date, "end_date": end_date, "interval": interval, "province_id": province_id}
+    return await response_cache.respond(
+        request, db, "timeseries", params,
+        lambda session: ledger_analytics.time_series(session, start_date, end_date, interval, province_id)
+    )
 
+def _dashboard_summary(session: Session, start: Optional[date] = None, end: Optional[date] = None) -> dict:
+    totals = RollupService(session).totals_by_type(start, end)
+    total_receipts = totals.get("receipt", 0)
+    total_expenses = totals.get("expense", 0)
+    return {
+        "total_receipts": cents_to_float(total_receipts),
+        "total_expenses": cents_to_float(total_expenses),
+        "net": cents_to_float(total_receipts - total_expenses)
+    }
@@ -1,23 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.budget import Budget
 from app.schemas.budget import Budget as BudgetSchema, BudgetCreate, BudgetUpdate
+from app.services.budget_reconciliation_service import BudgetReconciliationService
 
 router = APIRouter()
 
 @router.get("/", response_model=List[BudgetSchema])
-async def list_budgets(year: Optional[int] = Query(None), db: Session = Depends(get_db)):
+async def list_budgets(year: Optional[int] = Query(None), db: Session = Depends(get_read_db)):
     query = db.query(Budget)
     if year is not None:
         query = query.filter(Budget.year == year)
     return query.all()
 
+@router.post("/reconcile")
+async def reconcile_budgets(year: Optional[int] = Query(None), db: Session = Depends(get_db)):
+    """Recompute budget actuals from the ledger for one financial year, or all budgeted years"""
+    service = BudgetReconciliationService(db)
+    updated = service.reconcile(year) if year is not None else service.reconcile_all()
+    db.commit()
+    return {"year": year, "budgets_updated": updated}
+
 @router.post("/", response_model=BudgetSchema, status_code=status.HTTP_201_CREATED)
 async def create_budget(budget_data: BudgetCreate, db: Session = Depends(get_db)):
     budget = Budget(**budget_data.dict())
     db.add(budget)
+    db.flush()
+    # Pick up expenses already booked against the department for the year
+    BudgetReconciliationService(db).reconcile(budget.year, [budget.department_id])
     db.commit()
     db.refresh(budget)
     return budget
@@ -27,8 +39,15 @@ async def update_budget(budget_id: int, budget_data: BudgetUpdate, db: Session =
     budget = db.query(Budget).filter(Budget.id == budget_id).first()
     if not budget:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Budget not found")
+    old_year, old_department_id = budget.year, budget.department_id
     for key, value in budget_data.dict(exclude_unset=True).items():
         setattr(budget, key, value)
+    db.flush()
+    service = BudgetReconciliationService(db)
+    # Reconcile the (year, department) the budget left as well as the one it now covers
+    if (old_year, old_department_id) != (budget.year, budget.department_id):
+        service.reconcile(old_year, [old_department_id])
+    service.reconcile(budget.year, [budget.department_id])
     db.commit()
     db.refresh(budget)
     return budget
@@ -38,7 +57,10 @@ async def delete_budget(budget_id: int, db: Session = Depends(get_db)):
     budget = db.query(Budget).filter(Budget.id == budget_id).first()
     if not budget:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Budget not found")
+    year, department_id = budget.year, budget.department_id
     db.delete(budget)
+    db.flush()
+    BudgetReconciliationService(db).reconcile(year, [department_id])
     db.commit()
     return None
 
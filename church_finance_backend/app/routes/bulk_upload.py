@@ -1,12 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request
 from app.database import get_db
+from app.models.import_job import ImportJob
+from app.schemas.import_job import ImportJob as ImportJobSchema
+from app.schemas.job import JobSubmitted
+from app.services.bulk_upload_service import BulkUploadService
+from app.services.job_service import JobService
 from sqlalchemy.orm import Session
-from typing import Dict
-import pandas as pd
-from io import BytesIO
+from typing import Optional
 
 router = APIRouter()
 
+def _get_own_import_job(request: Request, job_id: int, db: Session) -> ImportJob:
+    # Other users' imports are reported as missing rather than forbidden
+    job = BulkUploadService(db).get_import_job_for_user(
+        job_id,
+        getattr(request.state, "user_id", None),
+        getattr(request.state, "user_role", None)
+    )
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return job
+
 @router.get("/template")
 async def download_template():
     """Download Excel template for bulk upload"""
@@ -14,10 +28,55 @@ async def download_template():
     pass
 
 @router.post("/transactions")
-async def upload_transactions(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Upload transactions via Excel file"""
-    # Implementation would go here
-    pass
+def upload_transactions(
+    request: Request,
+    file: UploadFile = File(...),
+    job_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Upload transactions via CSV or Excel file
+    
+    The file is read and committed in fixed-size chunks straight from the upload,
+    so large files never sit in memory whole. If an import fails part way, fix the
+    file and upload it again with job_id to resume after the last committed row.
+    """
+    user_id = getattr(request.state, "user_id", None)
+    service = BulkUploadService(db)
+    if job_id is not None:
+        _get_own_import_job(request, job_id, db)
+    result = service.process_streaming_upload(
+        file.file,
+        file.filename,
+        created_by=int(user_id) if user_id is not None else None,
+        job_id=job_id
+    )
+    if not result["success"] and "job_id" not in result:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result["error"])
+    return result
+
+@router.post("/transactions/jobs", response_model=JobSubmitted, status_code=status.HTTP_202_ACCEPTED)
+def queue_transaction_upload(
+    request: Request,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """Queue a CSV or Excel transaction upload as a background job
+    
+    The file is saved to job storage and imported by a worker; poll
+    GET /api/v1/jobs/{job_id} for progress and the import result.
+    """
+    user_id = getattr(request.state, "user_id", None)
+    job = JobService(db).submit_bulk_upload(
+        file.file,
+        file.filename,
+        created_by=int(user_id) if user_id is not None else None
+    )
+    return {"job_id": job.id, "status": job.status}
+
+@router.get("/imports/{job_id}", response_model=ImportJobSchema)
+def get_import_job(job_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get the progress of a chunked transaction upload"""
+    return _get_own_import_job(request, job_id, db)
 
 @router.post("/budgets")
 async def upload_budgets(file: UploadFile = File(...), db: Session = Depends(get_db)):
@@ -1,44 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from app.schemas.financial_statement import (
     IncomeExpenditureStatement, 
     CashFlowStatement, 
     ProvinceStatement,
-    StatementOfFinancialPosition
+    StatementOfFinancialPosition,
+    StatementBundle
 )
-from app.database import get_db
+from app.schemas.job import JobSubmitted
+from app.database import get_db, get_async_read_db, read_session_scope
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import date
 from app.services.financial_statements_service import FinancialStatementsService
+from app.services.job_service import JobService
+from app.services.response_cache import response_cache
+from app.utils.helpers import generate_report_filename
 
 router = APIRouter()
 
 @router.get("/income-expenditure", response_model=IncomeExpenditureStatement)
 async def get_income_expenditure_statement(
+    request: Request,
     start_date: date,
     end_date: date,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Generate Income and Expenditure Statement"""
-    service = FinancialStatementsService(db)
-    return service.generate_income_expenditure_statement(start_date, end_date)
+    return await response_cache.respond(
+        request, db, "income-expenditure", {"start_date": start_date, "end_date": end_date},
+        lambda session: FinancialStatementsService(session).generate_income_expenditure_statement(start_date, end_date),
+        IncomeExpenditureStatement
+    )
 
 @router.get("/cash-flow", response_model=CashFlowStatement)
 async def get_cash_flow_statement(
+    request: Request,
     start_date: date,
     end_date: date,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Generate Cash Flow Statement"""
-    service = FinancialStatementsService(db)
-    return service.generate_cash_flow_statement(start_date, end_date)
+    return await response_cache.respond(
+        request, db, "cash-flow", {"start_date": start_date, "end_date": end_date},
+        lambda session: FinancialStatementsService(session).generate_cash_flow_statement(start_date, end_date),
+        CashFlowStatement
+    )
+
+@router.get("/statements/bundle", response_model=StatementBundle)
+async def get_statement_bundle(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Generate income & expenditure, cash flow and financial position statements in one call"""
+    return await response_cache.respond(
+        request, db, "statement-bundle", {"start_date": start_date, "end_date": end_date},
+        lambda session: FinancialStatementsService(session).generate_statement_bundle(start_date, end_date),
+        StatementBundle
+    )
 
 @router.get("/province/{province_id}", response_model=ProvinceStatement)
 async def get_province_statement(
+    request: Request,
     province_id: int,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Generate detailed statement for a specific province"""
     if not start_date or not end_date:
@@ -46,55 +76,115 @@ async def get_province_statement(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="start_date and end_date are required"
         )
-    service = FinancialStatementsService(db)
-    return service.generate_province_statement(province_id, start_date, end_date)
+    return await response_cache.respond(
+        request, db, "province-statement", {"province_id": province_id, "start_date": start_date, "end_date": end_date},
+        lambda session: FinancialStatementsService(session).generate_province_statement(province_id, start_date, end_date),
+        ProvinceStatement
+    )
 
 @router.get("/financial-position", response_model=StatementOfFinancialPosition)
 async def get_statement_of_financial_position(
+    request: Request,
     as_of_date: date,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Generate Statement of Financial Position (Balance Sheet)"""
-    service = FinancialStatementsService(db)
-    return service.generate_statement_of_financial_position(as_of_date)
+    return await response_cache.respond(
+        request, db, "financial-position", {"as_of_date": as_of_date},
+        lambda session: FinancialStatementsService(session).generate_statement_of_financial_position(as_of_date),
+        StatementOfFinancialPosition
+    )
+
+EXPORT_MEDIA_TYPES = {
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv"
+}
 
 @router.get("/export")
 async def export_financial_statement(
     statement_type: str,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    format: str = Query("pdf", regex="^(pdf|excel|csv)$"),
-    db: Session = Depends(get_db)
+    province_id: Optional[int] = Query(None),
+    format: str = Query("excel", regex="^(pdf|excel|csv)$")
 ):
     """Export financial statement in specified format"""
-    service = FinancialStatementsService(db)
-    if statement_type == "income_expenditure":
-        if not start_date or not end_date:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start_date and end_date are required")
-        data = service.generate_income_expenditure_statement(start_date, end_date)
-    elif statement_type == "province":
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="province export requires province_id; not implemented in this endpoint")
-    elif statement_type == "cash_flow":
-        if not start_date or not end_date:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start_date and end_date are required")
-        data = service.generate_cash_flow_statement(start_date, end_date)
-    else:
+    _validate_export(statement_type, start_date, end_date, province_id, format)
+    
+    filename = generate_report_filename(statement_type, start_date, end_date)
+    if format == "csv":
+        filename = filename.rsplit(".", 1)[0] + ".csv"
+    
+    return StreamingResponse(
+        _stream_export(statement_type, start_date, end_date, province_id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/export/jobs", response_model=JobSubmitted, status_code=status.HTTP_202_ACCEPTED)
+def queue_financial_statement_export(
+    request: Request,
+    statement_type: str,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    province_id: Optional[int] = Query(None),
+    format: str = Query("excel", regex="^(pdf|excel|csv)$"),
+    db: Session = Depends(get_db)
+):
+    """Queue a statement export as a background job
+    
+    Poll GET /api/v1/jobs/{job_id} and download the file from
+    GET /api/v1/jobs/{job_id}/result once it has completed.
+    """
+    _validate_export(statement_type, start_date, end_date, province_id, format)
+    
+    user_id = getattr(request.state, "user_id", None)
+    job = JobService(db).submit_statement_export(
+        statement_type,
+        start_date,
+        end_date,
+        province_id,
+        format,
+        created_by=int(user_id) if user_id is not None else None
+    )
+    return {"job_id": job.id, "status": job.status}
+
+def _validate_export(statement_type: str, start_date: Optional[date], end_date: Optional[date], province_id: Optional[int], format: str):
+    if statement_type not in ("income_expenditure", "cash_flow", "province"):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported statement_type")
-    # For now, just return data (export streaming can be implemented later)
-    return data
+    if not start_date or not end_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start_date and end_date are required")
+    if statement_type == "province" and province_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="province_id is required for province export")
+    if format == "pdf":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="PDF export is not supported; use excel or csv")
+
+def _stream_export(statement_type: str, start_date: date, end_date: date, province_id: Optional[int], format: str):
+    # The export outlives the request-scoped session, so it uses its own
+    with read_session_scope() as db:
+        service = FinancialStatementsService(db)
+        sections = service.get_export_sections(statement_type, start_date, end_date, province_id)
+        if format == "csv":
+            yield from service.stream_statement_csv(sections)
+        else:
+            yield from service.stream_statement_excel(sections)
 
 # Alias for frontend compatibility: /api/v1/receipts/province-statement/{province_id}
 @router.get("/receipts/province-statement/{province_id}", response_model=ProvinceStatement)
 async def get_province_statement_alias(
+    request: Request,
     province_id: int,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     if not start_date or not end_date:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="start_date and end_date are required"
         )
-    service = FinancialStatementsService(db)
-    return service.generate_province_statement(province_id, start_date, end_date)
\ No newline at end of file
+    return await response_cache.respond(
+        request, db, "province-statement", {"province_id": province_id, "start_date": start_date, "end_date": end_date},
+        lambda session: FinancialStatementsService(session).generate_province_statement(province_id, start_date, end_date),
+        ProvinceStatement
+    )
\ No newline at end of file
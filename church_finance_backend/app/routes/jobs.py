@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from app.database import get_db
+from app.schemas.job import Job as JobSchema
+from app.models.job import JobStatus
+from app.services.job_service import JobService
+from sqlalchemy.orm import Session
+import os
+
+router = APIRouter()
+
+EXPORT_MEDIA_TYPES = {
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".csv": "text/csv"
+}
+
+def _get_own_job(request: Request, job_id: int, db: Session):
+    # Other users' jobs are reported as missing rather than forbidden
+    job = JobService(db).get_job_for_user(
+        job_id,
+        getattr(request.state, "user_id", None),
+        getattr(request.state, "user_role", None)
+    )
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@router.get("/{job_id}", response_model=JobSchema)
+def get_job(job_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get the status and progress of a background job"""
+    return _get_own_job(request, job_id, db)
+
+@router.get("/{job_id}/result")
+def download_job_result(job_id: int, request: Request, db: Session = Depends(get_db)):
+    """Download the file produced by a completed job"""
+    job = _get_own_job(request, job_id, db)
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}")
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job has no result file")
+    
+    filename = os.path.basename(job.result_path)
+    extension = os.path.splitext(filename)[1]
+    return FileResponse(
+        job.result_path,
+        media_type=EXPORT_MEDIA_TYPES.get(extension, "application/octet-stream"),
+        filename=filename
+    )
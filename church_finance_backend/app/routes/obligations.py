@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.obligation import Obligation
 from app.schemas.obligation import Obligation as ObligationSchema, ObligationCreate, ObligationUpdate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[ObligationSchema])
-async def list_obligations(db: Session = Depends(get_db)):
+async def list_obligations(db: Session = Depends(get_read_db)):
     return db.query(Obligation).all()
 
 @router.post("/", response_model=ObligationSchema, status_code=status.HTTP_201_CREATED)
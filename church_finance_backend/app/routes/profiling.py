@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
+from app.services.profiler import profiler, StackSampler, PROFILER_MAX_SECONDS, PROFILER_INTERVAL_MS
+from app.utils.helpers import is_profiling_allowed
+from datetime import datetime
+
+router = APIRouter()
+
+def require_profiling_role(request: Request):
+    """Only Admin users may profile the worker"""
+    if not is_profiling_allowed(getattr(request.state, "user_role", None)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only Admin users can run the profiler")
+
+def _render(sampler: StackSampler, name: str, format: str):
+    if format == "collapsed":
+        return PlainTextResponse(sampler.collapsed())
+    return sampler.speedscope(name)
+
+@router.get("/sample", dependencies=[Depends(require_profiling_role)])
+async def sample_worker(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(PROFILER_INTERVAL_MS, ge=1, le=1000),
+    include_idle: bool = Query(False),
+    format: str = Query("speedscope", regex="^(speedscope|collapsed)$")
+):
+    """Sample every thread of this worker for the given seconds
+    
+    Returns speedscope JSON (open it at https://www.speedscope.app) or collapsed
+    stacks for flamegraph.pl. Only one profile runs at a time per worker.
+    """
+    sampler = await profiler.profile(seconds, interval_ms, include_idle)
+    if sampler is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running on this worker")
+    return _render(sampler, f"worker sample {datetime.utcnow().isoformat(timespec='seconds')}", format)
+
+@router.get("/profiles", dependencies=[Depends(require_profiling_role)])
+async def list_request_profiles():
+    """Profiles of recent requests sent with the X-Profile header, newest first"""
+    return profiler.list()
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profiling_role)])
+async def get_request_profile(
+    profile_id: str,
+    format: str = Query("speedscope", regex="^(speedscope|collapsed)$")
+):
+    """Download the profile of one request"""
+    stored = profiler.get(profile_id)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    info, sampler = stored
+    return _render(sampler, info["label"], format)
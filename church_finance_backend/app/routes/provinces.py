@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from app.schemas.province import ProvinceCreate, ProvinceUpdate, Province
+from app.schemas.province import ProvinceCreate, ProvinceUpdate, Province, ProvinceRanking
+from app.services.province_ranking_service import ProvinceRankingService
 from app.database import get_db
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -12,6 +13,28 @@ async def create_province(province_data: ProvinceCreate, db: Session = Depends(g
     # Implementation would go here
     pass
 
+@router.get("/performance-ranking", response_model=ProvinceRanking)
+def get_province_performance_ranking(
+    financial_year_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Get performance ranking of provinces"""
+    # Declared before /{province_id} so the path isn't parsed as an id.
+    # A plain def so the blocking refresh runs on the threadpool, not the event loop.
+    # Served from the precomputed ranking table, refreshed only when stale
+    ranking = ProvinceRankingService(db).get_ranking(financial_year_id)
+    if ranking is None:
+        raise HTTPException(status_code=404, detail="Financial year not found")
+    
+    financial_year, rankings = ranking
+    return {
+        "financial_year_id": financial_year.id,
+        "year": financial_year.year,
+        "start_date": financial_year.start_date,
+        "end_date": financial_year.end_date,
+        "rankings": rankings
+    }
+
 @router.get("/{province_id}", response_model=Province)
 async def get_province(province_id: int, db: Session = Depends(get_db)):
     """Get a province by ID"""
@@ -53,13 +76,4 @@ async def get_province_statement(
 ):
     """Get province statement for reconciliation"""
     # Implementation would go here
-    pass
-
-@router.get("/performance-ranking")
-async def get_province_performance_ranking(
-    financial_year_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db)
-):
-    """Get performance ranking of provinces"""
-    # Implementation would go here
     pass
\ No newline at end of file
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from app.schemas.transaction import TransactionCreate, TransactionUpdate, Transaction
-from app.database import get_db
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from app.schemas.transaction import TransactionCreate, TransactionUpdate, Transaction, TransactionPage
+from app.database import get_async_db, get_async_read_db
+from app.services.transaction_service import TransactionService
+from app.services.ledger_snapshot import ledger_analytics
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 from datetime import date
-import pandas as pd
-from io import BytesIO
 
 router = APIRouter()
 
@@ -13,21 +13,49 @@ router = APIRouter()
 # In a real implementation, these would be implemented in a service layer
 
 @router.post("/", response_model=Transaction, status_code=status.HTTP_201_CREATED)
-async def create_transaction(transaction_data: TransactionCreate, db: Session = Depends(get_db)):
+async def create_transaction(transaction_data: TransactionCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new transaction"""
     # Implementation would go here
     pass
 
+@router.get("/summary", response_model=dict)
+async def get_transaction_summary(
+    province_id: Optional[int] = Query(None),
+    department_id: Optional[int] = Query(None),
+    project_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get transaction summary statistics"""
+    # Declared before /{transaction_id} so the path isn't parsed as an id
+    return await db.run_sync(
+        lambda session: ledger_analytics.summary(session, province_id, department_id, project_id, start_date, end_date)
+    )
+
+@router.get("/categories", response_model=List[dict])
+async def get_category_breakdown(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get expense breakdown by category"""
+    return await db.run_sync(
+        lambda session: ledger_analytics.category_breakdown(session, start_date, end_date)
+    )
+
 @router.get("/{transaction_id}", response_model=Transaction)
-async def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
+async def get_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a transaction by ID"""
     # Implementation would go here
     pass
 
-@router.get("/", response_model=List[Transaction])
+@router.get("/", response_model=Union[TransactionPage, List[Transaction]])
 async def get_transactions(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    pagination: str = Query("offset", regex="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None),
     province_id: Optional[int] = Query(None),
     department_id: Optional[int] = Query(None),
     project_id: Optional[int] = Query(None),
@@ -36,59 +64,62 @@ async def get_transactions(
     transaction_type: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
     approved_only: bool = Query(False),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get a list of transactions with filtering"""
-    # Implementation would go here
-    pass
+    """Get a list of transactions with filtering
+
+    With pagination=offset (the default) a plain list is returned and skip is honoured.
+    With pagination=cursor the response is {"items": [...], "next_cursor": ...}; pass
+    next_cursor back as cursor to fetch the following page.
+    """
+    filters = {
+        "province_id": province_id,
+        "department_id": department_id,
+        "project_id": project_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "transaction_type": transaction_type,
+        "category": category,
+        "approved_only": approved_only
+    }
+    
+    if pagination == "cursor" or cursor:
+        try:
+            items, next_cursor = await db.run_sync(
+                lambda session: TransactionService(session).get_transactions_page(cursor=cursor, limit=limit, **filters)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
+    
+    return await db.run_sync(
+        lambda session: TransactionService(session).get_transactions(skip=skip, limit=limit, **filters)
+    )
 
 @router.put("/{transaction_id}", response_model=Transaction)
 async def update_transaction(
     transaction_id: int,
     transaction_data: TransactionUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a transaction"""
     # Implementation would go here
     pass
 
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_transaction(transaction_id: int, db: Session = Depends(get_db)):
+async def delete_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a transaction"""
     # Implementation would go here
     pass
 
 @router.post("/{transaction_id}/approve", response_model=Transaction)
-async def approve_transaction(transaction_id: int, db: Session = Depends(get_db)):
+async def approve_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
     """Approve a transaction"""
     # Implementation would go here
     pass
 
 @router.post("/bulk-upload")
-async def bulk_upload_transactions(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def bulk_upload_transactions(file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
     """Upload transactions via Excel file"""
     # Implementation would go here
-    pass
-
-@router.get("/summary", response_model=dict)
-async def get_transaction_summary(
-    province_id: Optional[int] = Query(None),
-    department_id: Optional[int] = Query(None),
-    project_id: Optional[int] = Query(None),
-    start_date: Optional[date] = Query(None),
-    end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
-):
-    """Get transaction summary statistics"""
-    # Implementation would go here
-    pass
-
-@router.get("/categories", response_model=List[dict])
-async def get_category_breakdown(
-    start_date: Optional[date] = Query(None),
-    end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
-):
-    """Get expense breakdown by category"""
-    # Implementation would go here
     pass
\ No newline at end of file
@@ -15,7 +15,6 @@ class BudgetUpdate(BaseModel):
     year: Optional[int] = None
     department_id: Optional[int] = None
     allocated_amount: Optional[Decimal] = None
-    actual_spent: Optional[Decimal] = None
 
 class Budget(BudgetBase):
     id: int
@@ -4,7 +4,7 @@ from datetime import date
 from decimal import Decimal
 
 class IncomeExpenditureItem(BaseModel):
-    category: str
+    category: Optional[str] = None
     amount: Decimal
 
 class IncomeExpenditureStatement(BaseModel):
@@ -44,4 +44,9 @@ class StatementOfFinancialPosition(BaseModel):
     as_of_date: date
     assets: List[FinancialPositionItem]
     liabilities: List[FinancialPositionItem]
-    equity: List[FinancialPositionItem]
\ No newline at end of file
+    equity: List[FinancialPositionItem]
+
+class StatementBundle(BaseModel):
+    income_expenditure: IncomeExpenditureStatement
+    cash_flow: CashFlowStatement
+    financial_position: StatementOfFinancialPosition
\ No newline at end of file
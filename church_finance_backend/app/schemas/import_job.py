@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class ImportJob(BaseModel):
+    id: int
+    filename: str
+    file_format: str
+    status: str
+    rows_committed: int
+    chunks_committed: int
+    error: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, validator
+from typing import Any, Optional
+from datetime import datetime
+import json
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    @validator("result", pre=True)
+    def decode_result(cls, value):
+        return json.loads(value) if isinstance(value, str) else value
+    
+    class Config:
+        from_attributes = True
+
+class JobSubmitted(BaseModel):
+    job_id: int
+    status: str
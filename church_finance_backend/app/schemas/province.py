@@ -1,6 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
+from decimal import Decimal
 
 class ProvinceBase(BaseModel):
     name: str
@@ -23,3 +24,19 @@ class Province(ProvinceBase):
     
     class Config:
         from_attributes = True  # replaces orm_mode in Pydantic v2
+
+class ProvinceRankingEntry(BaseModel):
+    rank: int
+    province_id: int
+    province_name: str
+    receipts_total: Decimal
+    target_amount: Decimal
+    performance_score: float
+    refreshed_at: datetime
+
+class ProvinceRanking(BaseModel):
+    financial_year_id: int
+    year: int
+    start_date: date
+    end_date: date
+    rankings: List[ProvinceRankingEntry]
\ No newline at end of file
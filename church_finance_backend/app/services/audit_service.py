@@ -0,0 +1,124 @@
+from app.models.audit import AuditLog
+from app.database import session_scope
+from sqlalchemy import insert
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "500"))
+
+class AuditWriter:
+    """Buffers audit records in a bounded queue and inserts them in batches.
+
+    Requests only pay for a put_nowait; a background task flushes every
+    batch_size records or flush_interval_ms, running the insert in a thread so
+    the event loop never waits on the database. When the queue is full new
+    records are dropped and counted rather than slowing requests down.
+    """
+
+    def __init__(self, max_size: int = AUDIT_QUEUE_SIZE, batch_size: int = AUDIT_BATCH_SIZE, flush_interval_ms: int = AUDIT_FLUSH_INTERVAL_MS):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_queue_depth": 0,
+            "last_flush_ms": 0.0
+        }
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop"""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting records and flush everything still queued"""
+        if self._task is None:
+            return
+        self._stopping = True
+        await self._task
+        self._task = None
+        self._queue = None
+
+    def enqueue(self, record: Dict) -> bool:
+        """Queue an audit record without blocking; False if it was dropped"""
+        if self._queue is None or self._stopping:
+            self._stats["dropped"] += 1
+            return False
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+            return False
+
+        self._stats["enqueued"] += 1
+        depth = self._queue.qsize()
+        if depth > self._stats["max_queue_depth"]:
+            self._stats["max_queue_depth"] = depth
+        return True
+
+    def metrics(self) -> Dict:
+        return {
+            **self._stats,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.max_size,
+            "running": self._task is not None
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._collect_batch()
+            if batch:
+                await loop.run_in_executor(None, self._write_batch, batch)
+
+    async def _collect_batch(self) -> List[Dict]:
+        """Wait up to flush_interval for a batch, returning early once it is full"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            if self._stopping:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        started = time.perf_counter()
+        try:
+            with session_scope() as db:
+                db.execute(insert(AuditLog.__table__), batch)
+                db.commit()
+            self._stats["written"] += len(batch)
+        except Exception:
+            # Audit failures must never affect requests; record and move on
+            self._stats["failed"] += len(batch)
+            logger.exception("Failed to write %d audit records", len(batch))
+        self._stats["batches"] += 1
+        self._stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+audit_writer = AuditWriter()
@@ -0,0 +1,112 @@
+from app.models.category_rule import CategoryRule
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+import re
+
+FALLBACK_CATEGORY = "Other"
+
+# Used until category_rules has been loaded, and whenever the table is empty.
+# Earlier categories win when a description matches several.
+DEFAULT_CATEGORY_RULES = {
+    "Travel": ["travel", "transport", "fuel", "gas", "mileage", "cab", "taxi"],
+    "Office Supplies": ["office", "supplies", "stationery", "paper", "pen", "printer"],
+    "Equipment": ["equipment", "computer", "laptop", "software", "hardware"],
+    "Utilities": ["electricity", "water", "internet", "phone", "utility"],
+    "Food": ["food", "meal", "lunch", "dinner", "restaurant"],
+    "Maintenance": ["maintenance", "repair", "service", "fix"],
+    "Training": ["training", "course", "seminar", "workshop", "education"],
+    "Insurance": ["insurance", "premium", "policy"],
+    "Rent": ["rent", "lease", "facility"],
+    "Marketing": ["marketing", "advertising", "promotion", "campaign"]
+}
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Build a regex alternation factored into a prefix trie.
+    
+    Python's regex engine tries alternatives one by one, so factoring shared
+    prefixes ("pa(?:per|...)") makes it branch on one character at a time
+    instead of retrying every keyword at every position.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A keyword ends here, so the longer continuations are optional
+        return "(?:" + body + ")?" if "" in node else body
+    
+    return build(trie)
+
+class ExpenseTagger:
+    """Tags expense descriptions with one precompiled pattern over every keyword.
+    
+    Descriptions are scanned once regardless of how many rules exist, and
+    keywords match at the start of a word ("repairs" matches "repair",
+    "expenses" no longer matches "pen"). When several categories match, the
+    one listed first in rules wins.
+    """
+    
+    def __init__(self, rules: Dict[str, List[str]]):
+        self.categories = list(rules)
+        ranks = {}
+        for rank, keywords in enumerate(rules.values()):
+            for keyword in keywords:
+                keyword = (keyword or "").strip().lower()
+                if keyword and keyword not in ranks:
+                    ranks[keyword] = rank
+        
+        # The pattern matches the longest keyword at a position; credit it with
+        # the best rank of any keyword that is a prefix of it, since those match too
+        self.ranks = {
+            keyword: min(rank for other, rank in ranks.items() if keyword.startswith(other))
+            for keyword in ranks
+        }
+        self.pattern = re.compile(r"\b" + _trie_pattern(ranks)) if ranks else None
+    
+    def tag(self, description: Optional[str]) -> str:
+        """Return the highest priority category matching description"""
+        if not description or self.pattern is None:
+            return FALLBACK_CATEGORY
+        
+        matches = self.pattern.findall(description.lower())
+        if not matches:
+            return FALLBACK_CATEGORY
+        return self.categories[min(self.ranks[match] for match in matches)]
+    
+    def tag_many(self, descriptions: Iterable[Optional[str]]) -> List[str]:
+        """Tag a batch of descriptions, matching each distinct one only once"""
+        tags = {}
+        result = []
+        for description in descriptions:
+            if description not in tags:
+                tags[description] = self.tag(description)
+            result.append(tags[description])
+        return result
+
+_tagger = ExpenseTagger(DEFAULT_CATEGORY_RULES)
+
+def get_expense_tagger() -> ExpenseTagger:
+    return _tagger
+
+def load_category_rules(db: Session) -> ExpenseTagger:
+    """Rebuild the shared tagger from active category_rules rows"""
+    global _tagger
+    rules = db.query(CategoryRule).filter(
+        CategoryRule.is_active == True
+    ).order_by(CategoryRule.priority, CategoryRule.id).all()
+    
+    if rules:
+        grouped = {}
+        for rule in rules:
+            grouped.setdefault(rule.category, []).append(rule.keyword)
+        _tagger = ExpenseTagger(grouped)
+    else:
+        _tagger = ExpenseTagger(DEFAULT_CATEGORY_RULES)
+    return _tagger
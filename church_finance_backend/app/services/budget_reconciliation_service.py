@@ -0,0 +1,122 @@
+from app.models.budget import Budget
+from app.models.department import Department
+from app.models.transaction import Transaction
+from app.utils.helpers import get_financial_year, get_financial_year_dates
+from app.utils.money import from_cents, sql_sum_cents
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, update
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import date
+from decimal import Decimal
+
+class BudgetReconciliationService:
+    """Keeps budget actuals in step with the ledger.
+    
+    A budget's actual_spent is the sum of expense transactions for its
+    department within its financial year (April to March, keyed by the
+    starting calendar year). reconcile() recomputes a whole year from one
+    grouped aggregate; ledger writers call apply_expense_deltas() through
+    RollupService so budgets move with each create/update/delete. The
+    department's budget_spent mirrors the current financial year's budget.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def reconcile(self, year: int, department_ids: Optional[Iterable[int]] = None) -> int:
+        """Recompute actuals for a financial year's budgets; returns the number updated"""
+        dates = get_financial_year_dates(year)
+        spent_query = self.db.query(
+            Transaction.department_id,
+            sql_sum_cents(Transaction.amount)
+        ).filter(
+            Transaction.type == "expense",
+            Transaction.department_id.isnot(None),
+            Transaction.date >= dates["start_date"],
+            Transaction.date <= dates["end_date"]
+        )
+        budget_query = self.db.query(Budget.id, Budget.department_id).filter(Budget.year == year)
+        if department_ids is not None:
+            department_ids = list(department_ids)
+            spent_query = spent_query.filter(Transaction.department_id.in_(department_ids))
+            budget_query = budget_query.filter(Budget.department_id.in_(department_ids))
+        
+        spent = dict(spent_query.group_by(Transaction.department_id).all())
+        rows = [
+            {"budget_id": budget_id, "department_id": department_id, "spent": from_cents(spent.get(department_id, 0))}
+            for budget_id, department_id in budget_query.all()
+        ]
+        
+        if rows:
+            table = Budget.__table__
+            self.db.execute(
+                update(table).where(table.c.id == bindparam("budget_id")).values(
+                    actual_spent=bindparam("spent"),
+                    variance=table.c.allocated_amount - bindparam("spent")
+                ),
+                [{"budget_id": row["budget_id"], "spent": row["spent"]} for row in rows]
+            )
+        if year == get_financial_year(date.today()):
+            # Named departments left without a budget (deleted or moved) have nothing to mirror
+            budgeted = {row["department_id"] for row in rows}
+            unbudgeted = [
+                {"department_id": department_id, "spent": Decimal("0")}
+                for department_id in (department_ids or []) if department_id not in budgeted
+            ]
+            self._set_department_spent(rows + unbudgeted)
+        return len(rows)
+    
+    def reconcile_all(self) -> int:
+        """Recompute every budgeted financial year"""
+        years = [row[0] for row in self.db.query(Budget.year).distinct().all()]
+        return sum(self.reconcile(year) for year in years)
+    
+    def apply_expense_deltas(self, deltas: Dict[Tuple[date, int], Decimal]) -> None:
+        """Adjust budgets by expense amount deltas keyed by (day, department_id).
+        
+        Runs inside the caller's transaction so budgets commit with the ledger.
+        """
+        by_budget: Dict[Tuple[int, int], Decimal] = {}
+        for (day, department_id), amount in deltas.items():
+            key = (get_financial_year(day), department_id)
+            by_budget[key] = by_budget.get(key, Decimal("0")) + amount
+        rows = [
+            {"budget_year": year, "budget_department_id": department_id, "delta": amount}
+            for (year, department_id), amount in by_budget.items()
+            if amount != 0
+        ]
+        if not rows:
+            return
+        
+        table = Budget.__table__
+        # Increment in SQL so concurrent writers don't lose updates
+        self.db.execute(
+            update(table).where(
+                table.c.year == bindparam("budget_year"),
+                table.c.department_id == bindparam("budget_department_id")
+            ).values(
+                actual_spent=func.coalesce(table.c.actual_spent, 0) + bindparam("delta"),
+                variance=table.c.allocated_amount - (func.coalesce(table.c.actual_spent, 0) + bindparam("delta"))
+            ),
+            rows
+        )
+        
+        current_year = get_financial_year(date.today())
+        current = [row for row in rows if row["budget_year"] == current_year]
+        if current:
+            self._set_department_spent(
+                {"department_id": department_id, "spent": actual_spent}
+                for department_id, actual_spent in self.db.query(Budget.department_id, Budget.actual_spent).filter(
+                    Budget.year == current_year,
+                    Budget.department_id.in_([row["budget_department_id"] for row in current])
+                ).all()
+            )
+    
+    def _set_department_spent(self, rows: Iterable[Dict]) -> None:
+        rows = [{"dept_id": row["department_id"], "spent": row["spent"]} for row in rows]
+        if rows:
+            table = Department.__table__
+            self.db.execute(
+                update(table).where(table.c.id == bindparam("dept_id")).values(budget_spent=bindparam("spent")),
+                rows
+            )
@@ -1,12 +1,50 @@
 from app.models.transaction import Transaction
-from app.database import get_db
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.models.department import Department
+from app.models.project import Project
+from app.models.province import Province
+from app.services.rollup_service import RollupService, RollupKey
+from app.services.auto_tag_service import get_expense_tagger
+from app.services.response_cache import bump_ledger_version
+from app.utils.helpers import is_job_admin
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from sqlalchemy import insert
+from typing import BinaryIO, Callable, List, Dict, Iterator, Optional, Tuple
+from decimal import Decimal
+from openpyxl import load_workbook
+import numpy as np
 import pandas as pd
 from io import BytesIO
-import uuid
+import hashlib
 import os
 
+REQUIRED_COLUMNS = ["date", "type", "amount", "description"]
+VALID_TRANSACTION_TYPES = ["receipt", "expense", "transfer"]
+FOREIGN_KEY_COLUMNS = {
+    "project_id": Project,
+    "department_id": Department,
+    "province_id": Province
+}
+
+RESUME_MISMATCH_ERROR = "The uploaded file does not match the rows this import job already committed"
+
+IMPORT_CHUNK_SIZE = 5000  # rows read, validated and committed together in streaming uploads
+INSERT_CHUNK_SIZE = 1000
+SQLITE_INSERT_CHUNK_SIZE = 100  # 9 columns per row stays under SQLite's 999 bind parameter limit
+MAX_AMOUNT = 10 ** 13  # Numeric(15, 2) holds up to 13 digits before the point
+
+def _nullable_list(values: pd.Series, cast) -> list:
+    """Convert a Series to a plain list, mapping NaN/None to None"""
+    present = values.notna().tolist()
+    return [cast(value) if is_present else None for value, is_present in zip(values.tolist(), present)]
+
+def _supports_insert_returning(dialect) -> bool:
+    """Whether a single INSERT can RETURNING ids (insert_returning from SQLAlchemy 2.0, full_returning before)"""
+    supported = getattr(dialect, "insert_returning", None)
+    if supported is None:
+        supported = getattr(dialect, "full_returning", False)
+    return bool(supported)
+
 class BulkUploadService:
     def __init__(self, db: Session):
         self.db = db
@@ -38,8 +76,7 @@ class BulkUploadService:
             df = pd.read_excel(BytesIO(file_content))
             
             # Validate required columns
-            required_columns = ["date", "type", "amount", "description"]
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
             
             if missing_columns:
                 return {
@@ -47,58 +84,369 @@ class BulkUploadService:
                     "error": f"Missing required columns: {', '.join(missing_columns)}"
                 }
             
-            # Process each row
-            created_transactions = []
-            errors = []
-            
-            for index, row in df.iterrows():
-                try:
-                    # Create transaction
-                    transaction = Transaction(
-                        date=row["date"],
-                        type=row["type"],
-                        amount=row["amount"],
-                        description=row["description"],
-                        category=row.get("category"),
-                        project_id=row.get("project_id"),
-                        department_id=row.get("department_id"),
-                        province_id=row.get("province_id"),
-                        created_by=created_by
-                    )
-                    
-                    self.db.add(transaction)
-                    created_transactions.append(transaction)
-                    
-                except Exception as e:
-                    errors.append(f"Row {index + 1}: {str(e)}")
-            
-            if errors:
-                # Rollback if there are errors
-                self.db.rollback()
-                return {
-                    "success": False,
-                    "error": f"Errors occurred during upload: {'; '.join(errors)}"
-                }
-            
-            # Commit all transactions
-            self.db.commit()
-            
-            # Refresh transactions to get IDs
-            for transaction in created_transactions:
-                self.db.refresh(transaction)
+            return self.import_dataframe(df, created_by)
             
+        except Exception as e:
+            self.db.rollback()
             return {
-                "success": True,
-                "transactions_created": len(created_transactions),
-                "transaction_ids": [t.id for t in created_transactions]
+                "success": False,
+                "error": f"Failed to process Excel file: {str(e)}"
             }
-            
+    
+    def get_import_job_for_user(self, job_id: int, user_id: Optional[str], user_role: Optional[str]) -> Optional[ImportJob]:
+        """An import job, if it was started by the user or the user may see every job"""
+        job = self.db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if job is None or is_job_admin(user_role):
+            return job
+        if user_id is not None and job.created_by is not None and str(job.created_by) == str(user_id):
+            return job
+        return None
+    
+    def process_streaming_upload(
+        self,
+        fileobj: BinaryIO,
+        filename: str,
+        created_by: Optional[int],
+        job_id: Optional[int] = None,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> Dict:
+        """Import a CSV or Excel upload chunk by chunk without loading it whole.
+        
+        Each chunk is validated and committed together with the import job's
+        progress, so an interrupted upload can be resumed by sending the same
+        file again with job_id: rows already committed are skipped. A resume
+        is rejected if those rows differ from the ones the job committed.
+        on_progress, if given, is called with the committed row count after
+        each chunk. The ledger version is bumped once at the end rather than
+        per chunk, so cached reports catch up when the upload stops.
+        """
+        file_format = self._detect_file_format(filename)
+        if file_format is None:
+            return {
+                "success": False,
+                "error": "Unsupported file type; upload a .csv or .xlsx file"
+            }
+        
+        if job_id is not None:
+            job = self.db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            if not job:
+                return {"success": False, "error": "Import job not found"}
+            if job.status == ImportJobStatus.COMPLETED:
+                return self._import_job_result(job)
+            job.status = ImportJobStatus.RUNNING
+            job.error = None
+        else:
+            job = ImportJob(filename=filename, file_format=file_format, created_by=created_by)
+            self.db.add(job)
+        self.db.commit()
+        
+        rows_before = job.rows_committed
+        try:
+            return self._import_chunks(job, fileobj, file_format, created_by, chunk_size, on_progress)
+        finally:
+            if job.rows_committed > rows_before:
+                bump_ledger_version(self.db)
+                self.db.commit()
+    
+    def _import_chunks(
+        self,
+        job: ImportJob,
+        fileobj: BinaryIO,
+        file_format: str,
+        created_by: Optional[int],
+        chunk_size: int,
+        on_progress: Optional[Callable[[int], None]]
+    ) -> Dict:
+        # Hash of the header and every committed row, so a resumed upload
+        # can be checked against what the job already imported
+        digest = hashlib.sha256()
+        verified = job.rows_committed == 0
+        try:
+            for row_offset, chunk in self._iter_upload_chunks(fileobj, file_format, chunk_size):
+                missing_columns = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+                if missing_columns:
+                    return self._fail_import_job(job, f"Missing required columns: {', '.join(missing_columns)}")
+                
+                if row_offset == 0:
+                    digest.update("\x1f".join(str(column) for column in chunk.columns).encode())
+                row_hashes = pd.util.hash_pandas_object(chunk.astype(str), index=False).to_numpy()
+                
+                # Skip rows committed by an earlier attempt of this job
+                skipped = min(len(chunk), max(0, job.rows_committed - row_offset))
+                digest.update(row_hashes[:skipped].tobytes())
+                if not verified and row_offset + len(chunk) >= job.rows_committed:
+                    verified = True
+                    if job.committed_rows_hash is not None and digest.hexdigest() != job.committed_rows_hash:
+                        return self._fail_import_job(job, RESUME_MISMATCH_ERROR)
+                if skipped == len(chunk):
+                    continue
+                chunk = chunk.iloc[skipped:]
+                row_offset += skipped
+                
+                result = self.import_dataframe(chunk, created_by, row_offset, commit=False)
+                if not result["success"]:
+                    return self._fail_import_job(job, result["error"], result.get("errors"))
+                
+                digest.update(row_hashes[skipped:].tobytes())
+                job.rows_committed = row_offset + len(chunk)
+                job.chunks_committed += 1
+                job.committed_rows_hash = digest.hexdigest()
+                self.db.commit()
+                if on_progress is not None:
+                    on_progress(job.rows_committed)
         except Exception as e:
             self.db.rollback()
+            return self._fail_import_job(job, f"Failed to process file: {str(e)}")
+        
+        if not verified:
+            # The file is shorter than what the job already committed
+            return self._fail_import_job(job, RESUME_MISMATCH_ERROR)
+        
+        job.status = ImportJobStatus.COMPLETED
+        self.db.commit()
+        return self._import_job_result(job)
+    
+    def import_dataframe(self, df: pd.DataFrame, created_by: int, row_offset: int = 0, commit: bool = True) -> Dict:
+        """Validate and insert a DataFrame of transactions in one database transaction.
+        
+        Nothing is inserted if any row fails validation. row_offset is added to
+        reported row numbers when df is a slice of a larger file. With
+        commit=False the caller is responsible for bumping the ledger version
+        and committing.
+        """
+        columns, row_errors = self._prepare_columns(df)
+        
+        if row_errors:
+            errors = [
+                {"row": row_offset + position + 1, "errors": messages}
+                for position, messages in sorted(row_errors.items())
+            ]
             return {
                 "success": False,
-                "error": f"Failed to process Excel file: {str(e)}"
+                "error": "Errors occurred during upload: " + "; ".join(
+                    f"Row {error['row']}: {', '.join(error['errors'])}" for error in errors
+                ),
+                "errors": errors
             }
+        
+        try:
+            transaction_ids = self._insert_transactions(columns, created_by)
+            RollupService(self.db).apply_deltas(self._rollup_deltas(columns))
+            if commit:
+                bump_ledger_version(self.db)
+                self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        return {
+            "success": True,
+            "transactions_created": len(transaction_ids),
+            "transaction_ids": transaction_ids
+        }
+    
+    def _iter_upload_chunks(self, fileobj: BinaryIO, file_format: str, chunk_size: int) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """Yield (row offset, DataFrame) chunks read directly from the uploaded file"""
+        if file_format == "csv":
+            row_offset = 0
+            # Values stay text: amounts are converted to cents exactly, and
+            # row hashes don't depend on the types pandas infers per chunk
+            for chunk in pd.read_csv(fileobj, chunksize=chunk_size, dtype=str):
+                yield row_offset, chunk
+                row_offset += len(chunk)
+            return
+        
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+        try:
+            sheet = workbook["Transactions"] if "Transactions" in workbook.sheetnames else workbook.active
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            header = [str(name).strip() if name is not None else "" for name in header]
+            
+            row_offset = 0
+            batch = []
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                batch.append(row)
+                if len(batch) >= chunk_size:
+                    yield row_offset, pd.DataFrame(batch, columns=header)
+                    row_offset += len(batch)
+                    batch = []
+            if batch or row_offset == 0:
+                yield row_offset, pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+    
+    def _detect_file_format(self, filename: Optional[str]) -> Optional[str]:
+        extension = os.path.splitext(filename or "")[1].lower()
+        if extension == ".csv":
+            return "csv"
+        if extension in (".xlsx", ".xlsm"):
+            return "xlsx"
+        return None
+    
+    def _fail_import_job(self, job: ImportJob, error: str, errors: Optional[List[Dict]] = None) -> Dict:
+        self.db.rollback()
+        job.status = ImportJobStatus.FAILED
+        job.error = error
+        self.db.commit()
+        
+        result = self._import_job_result(job)
+        if errors:
+            result["errors"] = errors
+        return result
+    
+    def _import_job_result(self, job: ImportJob) -> Dict:
+        result = {
+            "success": job.status == ImportJobStatus.COMPLETED,
+            "job_id": job.id,
+            "status": job.status,
+            "rows_committed": job.rows_committed,
+            "chunks_committed": job.chunks_committed
+        }
+        if job.error:
+            result["error"] = job.error
+        return result
+    
+    def _prepare_columns(self, df: pd.DataFrame) -> Tuple[Dict[str, list], Dict[int, List[str]]]:
+        """Coerce and validate upload columns with vectorised pandas operations.
+        
+        Returns the cleaned column values (ready for insert) and a mapping of
+        row position to validation messages.
+        """
+        row_count = len(df)
+        failures: List[Tuple[pd.Series, str]] = []
+        
+        dates = pd.to_datetime(df["date"], errors="coerce")
+        failures.append((dates.isna(), "Date is required"))
+        
+        types = df["type"].astype(str).str.strip().str.lower()
+        failures.append((~types.isin(VALID_TRANSACTION_TYPES), "Valid transaction type is required (receipt, expense, transfer)"))
+        
+        amounts = pd.to_numeric(df["amount"], errors="coerce")
+        parsed = amounts.notna() & np.isfinite(amounts)
+        failures.append((parsed & (amounts.abs() >= MAX_AMOUNT), "Amount is too large"))
+        parsed &= amounts.abs() < MAX_AMOUNT
+        # Round half up like to_cents. Rounding to 6 places first drops the
+        # binary error of values such as 2.675 (267.49999... cents)
+        scaled = (amounts.where(parsed, 0) * 100).round(6)
+        cents = (np.sign(scaled) * np.floor(scaled.abs() + 0.5)).astype("int64")
+        failures.append((~parsed | (cents <= 0), "Amount must be greater than 0"))
+        
+        descriptions = df["description"].astype(object).where(df["description"].notna(), None)
+        descriptions = descriptions.map(lambda value: str(value).strip() if value is not None else None)
+        failures.append((descriptions.isna() | (descriptions == ""), "Description is required"))
+        
+        if "category" in df.columns:
+            categories = df["category"]
+        else:
+            categories = pd.Series([None] * row_count, index=df.index, dtype=object)
+        
+        # Auto-tag expenses that arrive without a category
+        untagged = (types == "expense") & categories.isna() & descriptions.notna()
+        if untagged.any():
+            unique_descriptions = descriptions[untagged].unique().tolist()
+            tags = dict(zip(unique_descriptions, get_expense_tagger().tag_many(unique_descriptions)))
+            categories = categories.where(~untagged, descriptions.map(tags))
+        
+        foreign_keys = {}
+        for column, model in FOREIGN_KEY_COLUMNS.items():
+            if column not in df.columns:
+                foreign_keys[column] = pd.Series([np.nan] * row_count, index=df.index)
+                continue
+            
+            raw = df[column]
+            ids = pd.to_numeric(raw, errors="coerce")
+            failures.append(((raw.notna() & ids.isna()) | (ids.notna() & (ids % 1 != 0)), f"{column} must be a whole number"))
+            
+            ids = ids.where(ids % 1 == 0)
+            wanted = [int(value) for value in ids.dropna().unique()]
+            existing = set()
+            if wanted:
+                existing = {row[0] for row in self.db.query(model.id).filter(model.id.in_(wanted)).all()}
+            failures.append((ids.notna() & ~ids.isin(list(existing)), f"{column} does not exist"))
+            foreign_keys[column] = ids
+        
+        row_errors: Dict[int, List[str]] = {}
+        for mask, message in failures:
+            for position in np.flatnonzero(mask.to_numpy(dtype=bool)):
+                row_errors.setdefault(int(position), []).append(message)
+        
+        if row_errors:
+            return {}, row_errors
+        
+        columns = {
+            "date": dates.dt.date.tolist(),
+            "type": types.tolist(),
+            "amount_cents": cents.tolist(),
+            "description": descriptions.tolist(),
+            "category": _nullable_list(categories, str),
+            "project_id": _nullable_list(foreign_keys["project_id"], int),
+            "department_id": _nullable_list(foreign_keys["department_id"], int),
+            "province_id": _nullable_list(foreign_keys["province_id"], int)
+        }
+        return columns, {}
+    
+    def _insert_transactions(self, columns: Dict[str, list], created_by: int) -> List[int]:
+        """Insert prepared rows in multi-row INSERT batches and return the new ids"""
+        records = [
+            {
+                "date": day,
+                "type": transaction_type,
+                "amount": Decimal(cents).scaleb(-2),
+                "description": description,
+                "category": category,
+                "project_id": project_id,
+                "department_id": department_id,
+                "province_id": province_id,
+                "created_by": created_by
+            }
+            for day, transaction_type, cents, description, category, project_id, department_id, province_id in zip(
+                columns["date"], columns["type"], columns["amount_cents"], columns["description"],
+                columns["category"], columns["project_id"], columns["department_id"], columns["province_id"]
+            )
+        ]
+        
+        dialect = self.db.get_bind().dialect
+        table = Transaction.__table__
+        
+        transaction_ids = []
+        if getattr(dialect, "insert_executemany_returning", False):
+            for start in range(0, len(records), INSERT_CHUNK_SIZE):
+                result = self.db.execute(insert(table).returning(table.c.id), records[start:start + INSERT_CHUNK_SIZE])
+                transaction_ids.extend(row[0] for row in result)
+        elif _supports_insert_returning(dialect):
+            # RETURNING on a single multi-row INSERT per chunk
+            for start in range(0, len(records), SQLITE_INSERT_CHUNK_SIZE):
+                chunk = records[start:start + SQLITE_INSERT_CHUNK_SIZE]
+                result = self.db.execute(insert(table).values(chunk).returning(table.c.id))
+                transaction_ids.extend(row[0] for row in result)
+        else:
+            # No RETURNING (SQLite before 3.35): insert row by row so each id
+            # is the one the database reports, not one inferred from lastrowid
+            for record in records:
+                result = self.db.execute(insert(table).values(record))
+                transaction_ids.append(result.inserted_primary_key[0])
+        
+        return transaction_ids
+    
+    def _rollup_deltas(self, columns: Dict[str, list]) -> Dict[RollupKey, Tuple[Decimal, int]]:
+        """Sum prepared rows per rollup key"""
+        totals: Dict[RollupKey, List[int]] = {}
+        for key_and_cents in zip(
+            columns["date"], columns["type"], columns["category"], columns["province_id"],
+            columns["department_id"], columns["project_id"], columns["amount_cents"]
+        ):
+            key = key_and_cents[:-1]
+            total = totals.setdefault(key, [0, 0])
+            total[0] += key_and_cents[-1]
+            total[1] += 1
+        
+        return {key: (Decimal(cents).scaleb(-2), count) for key, (cents, count) in totals.items()}
     
     def validate_transaction_data(self, data: Dict) -> Dict:
         """Validate transaction data before creation"""
@@ -1,13 +1,25 @@
 from app.models.transaction import Transaction
-from app.models.budget import Budget
 from app.models.province import Province
-from app.database import get_db
+from app.services.rollup_service import RollupService
+from app.utils.money import cents_to_float, sql_sum_cents, to_cents
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from typing import Dict, List
+from sqlalchemy import and_
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import date
-import pandas as pd
-from io import BytesIO
+from io import BytesIO, StringIO
+from openpyxl import Workbook
+import csv
+import tempfile
+
+# (sheet name, header, rows) - rows may be a lazy iterator
+ExportSection = Tuple[str, List[str], Iterable[Tuple]]
+
+PROVINCE_EXPORT_COLUMNS = ("date", "type", "description", "amount", "category")
+
+EXPORT_BATCH_SIZE = 1000  # rows fetched per round trip when streaming
+CSV_CHUNK_SIZE = 64 * 1024  # bytes buffered before a CSV chunk is sent
+EXCEL_SPOOL_SIZE = 8 * 1024 * 1024  # workbook bytes kept in memory before spilling to disk
+EXCEL_CHUNK_SIZE = 64 * 1024
 
 class FinancialStatementsService:
     def __init__(self, db: Session):
@@ -15,47 +27,8 @@ class FinancialStatementsService:
     
     def generate_income_expenditure_statement(self, start_date: date, end_date: date) -> Dict:
         """Generate Income and Expenditure Statement"""
-        # Get all receipt transactions
-        receipts = self.db.query(
-            func.sum(Transaction.amount).label('total_receipts')
-        ).filter(
-            and_(
-                Transaction.type == "receipt",
-                Transaction.date >= start_date,
-                Transaction.date <= end_date
-            )
-        ).scalar() or 0
-        
-        # Get all expense transactions by category
-        expenses_by_category = self.db.query(
-            Transaction.category,
-            func.sum(Transaction.amount).label('total_amount')
-        ).filter(
-            and_(
-                Transaction.type == "expense",
-                Transaction.date >= start_date,
-                Transaction.date <= end_date
-            )
-        ).group_by(Transaction.category).all()
-        
-        total_expenses = sum(row.total_amount or 0 for row in expenses_by_category)
-        surplus_deficit = receipts - total_expenses
-        
-        return {
-            "period": f"{start_date} to {end_date}",
-            "receipts": {
-                "total": float(receipts)
-            },
-            "expenses": [
-                {
-                    "category": row.category,
-                    "amount": float(row.total_amount or 0)
-                }
-                for row in expenses_by_category
-            ],
-            "total_expenses": float(total_expenses),
-            "surplus_deficit": float(surplus_deficit)
-        }
+        totals = self._get_period_totals(start_date, end_date)
+        return self._build_income_expenditure_statement(start_date, end_date, totals)
     
     def generate_statement_of_financial_position(self, as_of_date: date) -> Dict:
         """Generate Statement of Financial Position (Balance Sheet)"""
@@ -70,35 +43,69 @@ class FinancialStatementsService:
     
     def generate_cash_flow_statement(self, start_date: date, end_date: date) -> Dict:
         """Generate Cash Flow Statement"""
-        # Operating activities
-        operating_receipts = self.db.query(
-            func.sum(Transaction.amount)
-        ).filter(
-            and_(
-                Transaction.type == "receipt",
-                Transaction.date >= start_date,
-                Transaction.date <= end_date
-            )
-        ).scalar() or 0
+        totals = self._get_period_totals(start_date, end_date)
+        return self._build_cash_flow_statement(start_date, end_date, totals)
+    
+    def generate_statement_bundle(self, start_date: date, end_date: date) -> Dict:
+        """Generate all period statements from a single aggregate query"""
+        totals = self._get_period_totals(start_date, end_date)
         
-        operating_expenses = self.db.query(
-            func.sum(Transaction.amount)
-        ).filter(
-            and_(
-                Transaction.type == "expense",
-                Transaction.date >= start_date,
-                Transaction.date <= end_date
-            )
-        ).scalar() or 0
+        return {
+            "income_expenditure": self._build_income_expenditure_statement(start_date, end_date, totals),
+            "cash_flow": self._build_cash_flow_statement(start_date, end_date, totals),
+            "financial_position": self.generate_statement_of_financial_position(end_date)
+        }
+    
+    def _get_period_totals(self, start_date: date, end_date: date) -> Dict:
+        """Aggregate receipts and expenses by category, in cents, for a period in one grouped query"""
+        receipts = 0
+        expenses_by_category = []
         
+        for transaction_type, category, amount in RollupService(self.db).totals_by_type_and_category(start_date, end_date):
+            if transaction_type == "receipt":
+                receipts += amount
+            elif transaction_type == "expense":
+                expenses_by_category.append((category, amount))
+        
+        return {
+            "receipts": receipts,
+            "expenses_by_category": expenses_by_category,
+            "total_expenses": sum(amount for _, amount in expenses_by_category)
+        }
+    
+    def _build_income_expenditure_statement(self, start_date: date, end_date: date, totals: Dict) -> Dict:
+        receipts = totals["receipts"]
+        total_expenses = totals["total_expenses"]
+        surplus_deficit = receipts - total_expenses
+        
+        return {
+            "period": f"{start_date} to {end_date}",
+            "receipts": {
+                "total": cents_to_float(receipts)
+            },
+            "expenses": [
+                {
+                    "category": category,
+                    "amount": cents_to_float(amount)
+                }
+                for category, amount in totals["expenses_by_category"]
+            ],
+            "total_expenses": cents_to_float(total_expenses),
+            "surplus_deficit": cents_to_float(surplus_deficit)
+        }
+    
+    def _build_cash_flow_statement(self, start_date: date, end_date: date, totals: Dict) -> Dict:
+        # Operating activities
+        operating_receipts = totals["receipts"]
+        operating_expenses = totals["total_expenses"]
         net_operating_cash_flow = operating_receipts - operating_expenses
         
         return {
             "period": f"{start_date} to {end_date}",
             "operating_activities": {
-                "receipts": float(operating_receipts),
-                "expenses": float(operating_expenses),
-                "net_cash_flow": float(net_operating_cash_flow)
+                "receipts": cents_to_float(operating_receipts),
+                "expenses": cents_to_float(operating_expenses),
+                "net_cash_flow": cents_to_float(net_operating_cash_flow)
             },
             "investing_activities": {
                 "net_cash_flow": 0  # Not implemented in current schema
@@ -106,82 +113,223 @@ class FinancialStatementsService:
             "financing_activities": {
                 "net_cash_flow": 0  # Not implemented in current schema
             },
-            "net_increase_decrease_cash": float(net_operating_cash_flow),
+            "net_increase_decrease_cash": cents_to_float(net_operating_cash_flow),
             "cash_beginning": 0,  # Would need opening balance tracking
-            "cash_ending": float(net_operating_cash_flow)
+            "cash_ending": cents_to_float(net_operating_cash_flow)
         }
     
     def generate_province_statement(self, province_id: int, start_date: date, end_date: date) -> Dict:
         """Generate detailed statement for a specific province"""
         # Get province details
-        province = self.db.query(Province).filter(Province.id == province_id).first()
+        province_name = self.db.query(Province.name).filter(Province.id == province_id).scalar()
+        
+        # Fetch only the listed columns and total them in the same pass, rather
+        # than materialising ORM objects for every transaction
+        transactions = []
+        totals = {"receipt": 0, "expense": 0}
+        for transaction_date, transaction_type, description, amount, category in self.iter_province_transactions(province_id, start_date, end_date):
+            cents = to_cents(amount)
+            if transaction_type in totals:
+                totals[transaction_type] += cents
+            transactions.append({
+                "date": transaction_date,
+                "type": transaction_type,
+                "description": description,
+                "amount": cents_to_float(cents),
+                "category": category
+            })
+        total_receipts = totals["receipt"]
+        total_expenses = totals["expense"]
+        
+        return {
+            "province_name": province_name or "Unknown",
+            "period": f"{start_date} to {end_date}",
+            "transactions": transactions,
+            "summary": {
+                "total_receipts": cents_to_float(total_receipts),
+                "total_expenses": cents_to_float(total_expenses),
+                "net_amount": cents_to_float(total_receipts - total_expenses)
+            }
+        }
+    
+    def get_export_sections(
+        self,
+        statement_type: str,
+        start_date: date,
+        end_date: date,
+        province_id: Optional[int] = None
+    ) -> List[ExportSection]:
+        """Describe a statement export as (sheet name, header, rows) sections.
         
-        # Get all transactions for this province in the date range
-        transactions = self.db.query(Transaction).filter(
+        Province transactions are not loaded up front: their rows are streamed
+        from a server-side cursor while the export is being written.
+        """
+        if statement_type == "income_expenditure":
+            statement = self.generate_income_expenditure_statement(start_date, end_date)
+        elif statement_type == "cash_flow":
+            statement = self.generate_cash_flow_statement(start_date, end_date)
+        elif statement_type == "province":
+            totals = self._get_province_totals(province_id, start_date, end_date)
+            return [
+                ("Summary", ["item", "amount"], [
+                    ("Total receipts", cents_to_float(totals["receipts"])),
+                    ("Total expenses", cents_to_float(totals["expenses"])),
+                    ("Net amount", cents_to_float(totals["receipts"] - totals["expenses"]))
+                ]),
+                ("Transactions", list(PROVINCE_EXPORT_COLUMNS), self.iter_province_transactions(province_id, start_date, end_date))
+            ]
+        else:
+            raise ValueError(f"Unsupported statement_type: {statement_type}")
+        
+        return self._sections_from_statement(statement, statement_type)
+    
+    def iter_province_transactions(self, province_id: int, start_date: date, end_date: date) -> Iterator[Tuple]:
+        """Yield (date, type, description, amount, category) rows for a province in batches"""
+        query = self.db.query(
+            Transaction.date,
+            Transaction.type,
+            Transaction.description,
+            Transaction.amount,
+            Transaction.category
+        ).filter(
             and_(
                 Transaction.province_id == province_id,
                 Transaction.date >= start_date,
                 Transaction.date <= end_date
             )
-        ).all()
+        ).order_by(Transaction.date, Transaction.id)
         
-        # Calculate totals
-        total_receipts = sum(t.amount for t in transactions if t.type == "receipt")
-        total_expenses = sum(t.amount for t in transactions if t.type == "expense")
+        # yield_per streams results (server-side cursor on Postgres) instead of fetching all rows
+        for row in query.yield_per(EXPORT_BATCH_SIZE):
+            yield tuple(row)
+    
+    def stream_statement_csv(self, sections: List[ExportSection]) -> Iterator[str]:
+        """Yield a CSV export in chunks as rows are produced"""
+        buffer = StringIO()
+        writer = csv.writer(buffer)
         
-        return {
-            "province_name": province.name if province else "Unknown",
-            "period": f"{start_date} to {end_date}",
-            "transactions": [
-                {
-                    "date": transaction.date,
-                    "type": transaction.type,
-                    "description": transaction.description,
-                    "amount": float(transaction.amount),
-                    "category": transaction.category
-                }
-                for transaction in transactions
-            ],
-            "summary": {
-                "total_receipts": float(total_receipts),
-                "total_expenses": float(total_expenses),
-                "net_amount": float(total_receipts - total_expenses)
-            }
-        }
+        for index, (name, header, rows) in enumerate(sections):
+            if len(sections) > 1:
+                if index > 0:
+                    writer.writerow([])
+                writer.writerow([name])
+            writer.writerow(header)
+            
+            for row in rows:
+                writer.writerow(row)
+                if buffer.tell() >= CSV_CHUNK_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        
+        yield buffer.getvalue()
+    
+    def stream_statement_excel(self, sections: List[ExportSection]) -> Iterator[bytes]:
+        """Yield an Excel export in chunks.
+        
+        The workbook is written in write-only mode into a spooled temporary file,
+        so memory stays bounded regardless of the number of rows.
+        """
+        with tempfile.SpooledTemporaryFile(max_size=EXCEL_SPOOL_SIZE) as spool:
+            self.write_statement_excel(sections, spool)
+            spool.seek(0)
+            while True:
+                chunk = spool.read(EXCEL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    
+    def write_statement_excel(self, sections: List[ExportSection], fileobj: BinaryIO) -> None:
+        """Write sections as sheets of a write-only workbook"""
+        workbook = Workbook(write_only=True)
+        for name, header, rows in sections:
+            sheet = workbook.create_sheet(title=name)
+            sheet.append(header)
+            for row in rows:
+                sheet.append(list(row))
+        workbook.save(fileobj)
+    
+    def export_statement_to_file(
+        self,
+        statement_type: str,
+        start_date: date,
+        end_date: date,
+        province_id: Optional[int],
+        format: str,
+        path: str
+    ) -> None:
+        """Write a statement export straight to a file, for background export jobs"""
+        sections = self.get_export_sections(statement_type, start_date, end_date, province_id)
+        if format == "csv":
+            with open(path, "w", newline="", encoding="utf-8") as fileobj:
+                for chunk in self.stream_statement_csv(sections):
+                    fileobj.write(chunk)
+        else:
+            with open(path, "wb") as fileobj:
+                self.write_statement_excel(sections, fileobj)
     
     def export_statement_to_excel(self, statement_data: Dict, statement_type: str) -> bytes:
-        """Export financial statement to Excel"""
-        # Create DataFrame from statement data
+        """Export an already generated financial statement to Excel"""
+        excel_buffer = BytesIO()
+        self.write_statement_excel(self._sections_from_statement(statement_data, statement_type), excel_buffer)
+        return excel_buffer.getvalue()
+    
+    def _sections_from_statement(self, statement_data: Dict, statement_type: str) -> List[ExportSection]:
         if statement_type == "income_expenditure":
-            # Create separate sheets for receipts and expenses
-            receipts_df = pd.DataFrame([statement_data["receipts"]])
-            expenses_df = pd.DataFrame(statement_data["expenses"])
-            
-            # Write to Excel with multiple sheets
-            excel_buffer = BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                receipts_df.to_excel(writer, sheet_name='Receipts', index=False)
-                expenses_df.to_excel(writer, sheet_name='Expenses', index=False)
-            
-            excel_buffer.seek(0)
-            return excel_buffer.getvalue()
+            return [
+                ("Receipts", ["total"], [(statement_data["receipts"]["total"],)]),
+                ("Expenses", ["category", "amount"], [
+                    (expense["category"], expense["amount"]) for expense in statement_data["expenses"]
+                ])
+            ]
+        
+        elif statement_type == "cash_flow":
+            operating = statement_data["operating_activities"]
+            return [
+                ("Cash Flow", ["item", "amount"], [
+                    ("Operating receipts", operating["receipts"]),
+                    ("Operating expenses", operating["expenses"]),
+                    ("Net cash flow from operating activities", operating["net_cash_flow"]),
+                    ("Net cash flow from investing activities", statement_data["investing_activities"]["net_cash_flow"]),
+                    ("Net cash flow from financing activities", statement_data["financing_activities"]["net_cash_flow"]),
+                    ("Net increase/(decrease) in cash", statement_data["net_increase_decrease_cash"]),
+                    ("Cash at beginning of period", statement_data["cash_beginning"]),
+                    ("Cash at end of period", statement_data["cash_ending"])
+                ])
+            ]
         
         elif statement_type == "province":
-            # Create DataFrame for transactions
-            transactions_df = pd.DataFrame(statement_data["transactions"])
-            
-            # Write to Excel
-            excel_buffer = BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                transactions_df.to_excel(writer, sheet_name='Transactions', index=False)
-            
-            excel_buffer.seek(0)
-            return excel_buffer.getvalue()
+            return [
+                ("Transactions", list(PROVINCE_EXPORT_COLUMNS), [
+                    tuple(transaction[column] for column in PROVINCE_EXPORT_COLUMNS)
+                    for transaction in statement_data["transactions"]
+                ])
+            ]
         
         else:
-            # Generic export for other statement types
-            df = pd.DataFrame([statement_data])
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False)
-            excel_buffer.seek(0)
-            return excel_buffer.getvalue()
\ No newline at end of file
+            # Generic export: one row per top-level value
+            return [
+                ("Statement", ["item", "value"], [
+                    (key, value) for key, value in statement_data.items()
+                    if not isinstance(value, (dict, list))
+                ])
+            ]
+    
+    def _get_province_totals(self, province_id: int, start_date: date, end_date: date) -> Dict:
+        """Sum receipts and expenses for a province, in cents, in the database"""
+        rows = self.db.query(
+            Transaction.type,
+            sql_sum_cents(Transaction.amount).label("total_cents")
+        ).filter(
+            and_(
+                Transaction.province_id == province_id,
+                Transaction.date >= start_date,
+                Transaction.date <= end_date
+            )
+        ).group_by(Transaction.type).all()
+        
+        totals = {row.type: int(row.total_cents) for row in rows}
+        return {
+            "receipts": totals.get("receipt", 0),
+            "expenses": totals.get("expense", 0)
+        }
@@ -0,0 +1,312 @@
+from app.models.job import Job, JobKind, JobStatus
+from app.services.bulk_upload_service import BulkUploadService
+from app.services.financial_statements_service import FinancialStatementsService
+from app.database import SessionLocal, read_session_scope, session_scope
+from app.utils.helpers import is_job_admin
+from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional
+from datetime import date, datetime, timedelta
+import asyncio
+import logging
+import shutil
+import socket
+import json
+import uuid
+import os
+
+logger = logging.getLogger(__name__)
+
+JOB_STORAGE_DIR = os.getenv("JOB_STORAGE_DIR", "./job_files")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024
+JOB_HEARTBEAT_INTERVAL_SECONDS = int(os.getenv("JOB_HEARTBEAT_INTERVAL_SECONDS", "30"))
+# A running job whose worker hasn't beaten for this long is taken to be orphaned
+JOB_HEARTBEAT_TIMEOUT_SECONDS = int(os.getenv("JOB_HEARTBEAT_TIMEOUT_SECONDS", "120"))
+
+EXPORT_EXTENSIONS = {"excel": ".xlsx", "csv": ".csv"}
+
+# Recorded on the jobs this process claims: host, pid, and a per-boot id so a
+# restarted process that reuses the pid (pid 1 in a container) isn't mistaken
+# for the one that claimed them
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+
+# Jobs run on a small in-process pool so blocking pandas/SQLAlchemy work never
+# holds up the event loop. Workers open their own sessions; the jobs table is
+# the source of truth for status, so any API worker can answer a poll.
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job-worker")
+
+class JobService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_job(self, job_id: int) -> Optional[Job]:
+        return self.db.query(Job).filter(Job.id == job_id).first()
+
+    def get_job_for_user(self, job_id: int, user_id: Optional[str], user_role: Optional[str]) -> Optional[Job]:
+        """A job, if it was submitted by the user or the user may see every job"""
+        job = self.get_job(job_id)
+        if job is None or is_job_admin(user_role):
+            return job
+        if user_id is not None and job.created_by is not None and str(job.created_by) == str(user_id):
+            return job
+        return None
+
+    def recover_interrupted(self, resubmit_queued: bool = True, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Resubmit jobs that stopped workers left behind.
+
+        Run at startup, and with resubmit_queued=False by the heartbeat. Queued
+        jobs are resubmitted; a job is claimed before it runs, so one
+        resubmitted by several workers still runs once. A running job is only
+        recovered once its owner is gone: a stale heartbeat, or a process on
+        this host that no longer exists. Exports start again, but an upload may
+        already have committed some chunks, so rerunning it could import rows
+        twice: it is marked failed instead.
+        """
+        now = now or datetime.utcnow()
+        stale_before = now - timedelta(seconds=JOB_HEARTBEAT_TIMEOUT_SECONDS)
+        statuses = [JobStatus.RUNNING, JobStatus.QUEUED] if resubmit_queued else [JobStatus.RUNNING]
+        recovered = {"resubmitted": 0, "failed": 0}
+        resubmit: List[int] = []
+        remove: List[str] = []
+        for job in self.db.query(Job).filter(Job.status.in_(statuses)).all():
+            if job.status == JobStatus.QUEUED:
+                resubmit.append(job.id)
+                continue
+            if not _owner_is_gone(job.owner, job.heartbeat_at or job.started_at, stale_before):
+                continue
+
+            if job.kind == JobKind.BULK_UPLOAD:
+                values = {
+                    "status": JobStatus.FAILED,
+                    "error": "Interrupted by a server restart; check which rows were imported before uploading the file again",
+                    "finished_at": now
+                }
+            else:
+                values = {"status": JobStatus.QUEUED, "started_at": None, "progress": 0, "owner": None, "heartbeat_at": None}
+            # Only if no other worker recovered or beat for it since it was read
+            taken = self.db.query(Job).filter(
+                Job.id == job.id,
+                Job.status == JobStatus.RUNNING,
+                Job.owner == job.owner,
+                Job.heartbeat_at == job.heartbeat_at
+            ).update(values, synchronize_session=False)
+            if not taken:
+                continue
+            if job.kind == JobKind.BULK_UPLOAD:
+                upload_path = json.loads(job.params or "{}").get("upload_path")
+                if upload_path:
+                    remove.append(upload_path)
+                recovered["failed"] += 1
+            else:
+                resubmit.append(job.id)
+        self.db.commit()
+
+        for upload_path in remove:
+            if os.path.exists(upload_path):
+                os.remove(upload_path)
+
+        for job_id in resubmit:
+            _executor.submit(_run_job, job_id)
+        recovered["resubmitted"] = len(resubmit)
+        if any(recovered.values()):
+            logger.warning("Recovered interrupted jobs: %s", recovered)
+        return recovered
+
+    def submit_bulk_upload(self, fileobj: BinaryIO, filename: str, created_by: Optional[int]) -> Job:
+        """Save an uploaded file to job storage and queue its import"""
+        extension = os.path.splitext(filename or "")[1].lower()
+        upload_path = os.path.join(self._storage_dir("uploads"), f"{uuid.uuid4().hex}{extension}")
+        with open(upload_path, "wb") as destination:
+            shutil.copyfileobj(fileobj, destination, UPLOAD_COPY_CHUNK_SIZE)
+
+        return self._submit(
+            JobKind.BULK_UPLOAD,
+            {"filename": filename, "upload_path": upload_path},
+            created_by
+        )
+
+    def submit_statement_export(
+        self,
+        statement_type: str,
+        start_date: date,
+        end_date: date,
+        province_id: Optional[int],
+        format: str,
+        created_by: Optional[int]
+    ) -> Job:
+        """Queue a statement export whose file can be downloaded when done"""
+        return self._submit(
+            JobKind.STATEMENT_EXPORT,
+            {
+                "statement_type": statement_type,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "province_id": province_id,
+                "format": format
+            },
+            created_by
+        )
+
+    def _submit(self, kind: JobKind, params: Dict, created_by: Optional[int]) -> Job:
+        job = Job(kind=kind, params=json.dumps(params), created_by=created_by)
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+
+        _executor.submit(_run_job, job.id)
+        return job
+
+    @staticmethod
+    def _storage_dir(*parts: str) -> str:
+        path = os.path.join(JOB_STORAGE_DIR, *parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+def _owner_is_gone(owner: Optional[str], last_seen: Optional[datetime], stale_before: datetime) -> bool:
+    """Whether the worker that claimed a running job has stopped"""
+    if last_seen is None or last_seen < stale_before:
+        return True
+    if owner is None or owner == WORKER_ID:
+        return False
+    host, pid, _ = owner.rsplit(":", 2) if owner.count(":") >= 2 else (owner, "", "")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        # An earlier process with this process's pid
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        # Exists but belongs to another user
+        return False
+    return False
+
+def _run_job(job_id: int) -> None:
+    """Execute a queued job on a pool worker with its own session"""
+    db = SessionLocal()
+    try:
+        # Claim the job in one UPDATE, so that it runs once even if several
+        # workers resubmitted it after a restart
+        started_at = datetime.utcnow()
+        claimed = db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.QUEUED).update(
+            {"status": JobStatus.RUNNING, "started_at": started_at, "owner": WORKER_ID, "heartbeat_at": started_at},
+            synchronize_session=False
+        )
+        db.commit()
+        if not claimed:
+            return
+        job = db.query(Job).filter(Job.id == job_id).first()
+
+        def report_progress(progress: int) -> None:
+            job.progress = progress
+            job.heartbeat_at = datetime.utcnow()
+            db.commit()
+
+        try:
+            result = JOB_HANDLERS[job.kind](db, job, json.loads(job.params or "{}"), report_progress)
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            db.rollback()
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        else:
+            job.result = json.dumps(result, default=str)
+            if result.get("success", True):
+                job.status = JobStatus.COMPLETED
+            else:
+                job.status = JobStatus.FAILED
+                job.error = result.get("error")
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+def _run_bulk_upload(db: Session, job: Job, params: Dict, report_progress: Callable[[int], None]) -> Dict:
+    upload_path = params["upload_path"]
+    try:
+        with open(upload_path, "rb") as fileobj:
+            result = BulkUploadService(db).process_streaming_upload(
+                fileobj,
+                params["filename"],
+                created_by=job.created_by,
+                on_progress=report_progress
+            )
+    finally:
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+
+    # The import's own progress record, kept distinct from this job's id
+    if "job_id" in result:
+        result["import_job_id"] = result.pop("job_id")
+    return result
+
+def _run_statement_export(db: Session, job: Job, params: Dict, report_progress: Callable[[int], None]) -> Dict:
+    export_format = params["format"]
+    result_path = os.path.join(
+        JobService._storage_dir("exports"),
+        f"job-{job.id}-{params['statement_type']}{EXPORT_EXTENSIONS[export_format]}"
+    )
+    # Reporting reads go to a replica when one is available
+    with read_session_scope() as read_db:
+        FinancialStatementsService(read_db).export_statement_to_file(
+            params["statement_type"],
+            date.fromisoformat(params["start_date"]),
+            date.fromisoformat(params["end_date"]),
+            params.get("province_id"),
+            export_format,
+            result_path
+        )
+    job.result_path = result_path
+    return {"success": True, "format": export_format, "size_bytes": os.path.getsize(result_path)}
+
+JOB_HANDLERS = {
+    JobKind.BULK_UPLOAD.value: _run_bulk_upload,
+    JobKind.STATEMENT_EXPORT.value: _run_statement_export
+}
+
+class JobHeartbeat:
+    """Keeps this worker's running jobs marked alive and recovers jobs of stopped workers"""
+
+    def __init__(self, interval_seconds: int = JOB_HEARTBEAT_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await loop.run_in_executor(None, self.beat)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job heartbeat failed")
+
+    @staticmethod
+    def beat() -> None:
+        with session_scope() as db:
+            db.query(Job).filter(Job.owner == WORKER_ID, Job.status == JobStatus.RUNNING).update(
+                {"heartbeat_at": datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+            JobService(db).recover_interrupted(resubmit_queued=False)
+
+job_heartbeat = JobHeartbeat()
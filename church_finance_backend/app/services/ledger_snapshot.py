@@ -0,0 +1,321 @@
+from app.models.transaction import Transaction, TransactionType
+from app.models.deleted_transaction import DeletedTransaction
+from app.services.response_cache import get_ledger_version
+from app.utils.money import cents_to_float, from_cents, sql_cents
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime
+import numpy as np
+import time
+
+TYPE_CODES = {transaction_type.value: code for code, transaction_type in enumerate(TransactionType)}
+RECEIPT = TYPE_CODES["receipt"]
+EXPENSE = TYPE_CODES["expense"]
+UNKNOWN_TYPE = len(TYPE_CODES)
+NO_ID = -1
+
+SNAPSHOT_COLUMNS = (
+    Transaction.id,
+    Transaction.date,
+    Transaction.type,
+    sql_cents(Transaction.amount),  # converted to integer cents by the database
+    Transaction.category,
+    Transaction.province_id,
+    Transaction.department_id,
+    Transaction.project_id
+)
+
+class LedgerSnapshot:
+    """Immutable columnar copy of the transactions table, sorted by (day, id).
+
+    Amounts are integer cents and nullable foreign keys use -1, so every
+    column is a plain NumPy array and a date range is a contiguous slice.
+    It holds every row stamped with a ledger version up to version.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        categories: List[str],
+        version: int
+    ):
+        self.ids = columns["ids"]
+        self.days = columns["days"]
+        self.months = columns["months"]
+        self.types = columns["types"]
+        self.cents = columns["cents"]
+        self.province_ids = columns["province_ids"]
+        self.department_ids = columns["department_ids"]
+        self.project_ids = columns["project_ids"]
+        self.category_codes = columns["category_codes"]
+        self.categories = categories
+        self.version = version
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._columns().values())
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple], version: int) -> "LedgerSnapshot":
+        return cls._build(rows, cls._empty_columns(), [], version)
+
+    def merge(self, rows: List[Tuple], deleted_ids: List[int], version: int) -> "LedgerSnapshot":
+        """A new snapshot with changed rows replacing their previous versions.
+
+        Rows whose ids are in deleted_ids (tombstones) are dropped unless the
+        id is among the changed rows, i.e. was reused.
+        """
+        if not rows and not deleted_ids:
+            return LedgerSnapshot(self._columns(), self.categories, version)
+        removed_ids = np.fromiter(
+            (row_id for row_id in [*(row[0] for row in rows), *deleted_ids]),
+            dtype=np.int64,
+            count=len(rows) + len(deleted_ids)
+        )
+        keep = ~np.isin(self.ids, removed_ids)
+        kept = {name: column[keep] for name, column in self._columns().items()}
+        return self._build(rows, kept, list(self.categories), version)
+
+    @classmethod
+    def _build(
+        cls,
+        rows: List[Tuple],
+        base: Dict[str, np.ndarray],
+        categories: List[str],
+        version: int
+    ) -> "LedgerSnapshot":
+        category_index = {category: code for code, category in enumerate(categories)}
+
+        def category_code(category: Optional[str]) -> int:
+            if category is None:
+                return NO_ID
+            code = category_index.get(category)
+            if code is None:
+                code = category_index[category] = len(categories)
+                categories.append(category)
+            return code
+
+        count = len(rows)
+        days = [row[1] if not isinstance(row[1], datetime) else row[1].date() for row in rows]
+        new = {
+            "ids": np.fromiter((row[0] for row in rows), dtype=np.int64, count=count),
+            "days": np.fromiter((day.toordinal() for day in days), dtype=np.int32, count=count),
+            "months": np.fromiter((day.year * 12 + day.month - 1 for day in days), dtype=np.int32, count=count),
+            "types": np.fromiter((TYPE_CODES.get(row[2], UNKNOWN_TYPE) for row in rows), dtype=np.int8, count=count),
+            "cents": np.fromiter((row[3] for row in rows), dtype=np.int64, count=count),
+            "category_codes": np.fromiter((category_code(row[4]) for row in rows), dtype=np.int32, count=count),
+            "province_ids": np.fromiter((NO_ID if row[5] is None else row[5] for row in rows), dtype=np.int32, count=count),
+            "department_ids": np.fromiter((NO_ID if row[6] is None else row[6] for row in rows), dtype=np.int32, count=count),
+            "project_ids": np.fromiter((NO_ID if row[7] is None else row[7] for row in rows), dtype=np.int32, count=count)
+        }
+        columns = {name: np.concatenate([base[name], new[name]]) for name in new}
+        order = np.lexsort((columns["ids"], columns["days"]))
+        columns = {name: column[order] for name, column in columns.items()}
+        return cls(columns, categories, version)
+
+    @staticmethod
+    def _empty_columns() -> Dict[str, np.ndarray]:
+        return {
+            "ids": np.empty(0, dtype=np.int64),
+            "days": np.empty(0, dtype=np.int32),
+            "months": np.empty(0, dtype=np.int32),
+            "types": np.empty(0, dtype=np.int8),
+            "cents": np.empty(0, dtype=np.int64),
+            "category_codes": np.empty(0, dtype=np.int32),
+            "province_ids": np.empty(0, dtype=np.int32),
+            "department_ids": np.empty(0, dtype=np.int32),
+            "project_ids": np.empty(0, dtype=np.int32)
+        }
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        return {
+            "ids": self.ids,
+            "days": self.days,
+            "months": self.months,
+            "types": self.types,
+            "cents": self.cents,
+            "category_codes": self.category_codes,
+            "province_ids": self.province_ids,
+            "department_ids": self.department_ids,
+            "project_ids": self.project_ids
+        }
+
+    def select(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        province_id: Optional[int] = None,
+        department_id: Optional[int] = None,
+        project_id: Optional[int] = None
+    ) -> np.ndarray:
+        """Positions of rows matching the filters, in (day, id) order"""
+        low = np.searchsorted(self.days, start_date.toordinal(), "left") if start_date else 0
+        high = np.searchsorted(self.days, end_date.toordinal(), "right") if end_date else self.size
+        positions = np.arange(low, high)
+
+        mask = None
+        for column, value in (
+            (self.province_ids, province_id),
+            (self.department_ids, department_id),
+            (self.project_ids, project_id)
+        ):
+            if value:
+                matches = column[low:high] == value
+                mask = matches if mask is None else mask & matches
+        return positions if mask is None else positions[mask]
+
+class LedgerAnalytics:
+    """Answers summary, breakdown and time-series queries from a ledger snapshot.
+
+    Each call checks the ledger version first; if the ledger changed, rows
+    stamped with a newer version are merged into a new snapshot and rows
+    with a newer tombstone are dropped. Versions follow commit order (see
+    bump_ledger_version), so unlike a timestamp watermark no write that was
+    slow to commit is missed. Both reads are range scans on the indexed
+    ledger_version columns. Snapshots are immutable and swapped in whole, so
+    concurrent readers never need a lock.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[LedgerSnapshot] = None
+        self._stats = {"full_loads": 0, "incremental_refreshes": 0, "last_refresh_ms": 0.0}
+
+    def snapshot(self, db: Session) -> LedgerSnapshot:
+        """The current snapshot, refreshed from db if the ledger has changed"""
+        version = get_ledger_version(db)
+        current = self._snapshot
+        if current is not None and current.version == version:
+            return current
+
+        started = time.perf_counter()
+        refreshed = self._refresh(db, current, version)
+        self._stats["last_refresh_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        # A slower concurrent refresh must not replace a newer snapshot
+        if self._snapshot is None or self._snapshot.version <= refreshed.version:
+            self._snapshot = refreshed
+        return refreshed
+
+    def summary(
+        self,
+        db: Session,
+        province_id: Optional[int] = None,
+        department_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict:
+        """Totals by type, matching TransactionService.get_transaction_summary"""
+        snapshot = self.snapshot(db)
+        positions = snapshot.select(start_date, end_date, province_id, department_id, project_id)
+        by_type = np.bincount(
+            snapshot.types[positions],
+            weights=snapshot.cents[positions],
+            minlength=UNKNOWN_TYPE + 1
+        )
+        total_receipts = from_cents(np.rint(by_type[RECEIPT]))
+        total_expenses = from_cents(np.rint(by_type[EXPENSE]))
+        return {
+            "total_amount": from_cents(snapshot.cents[positions].sum()),
+            "total_count": int(len(positions)),
+            "total_receipts": total_receipts,
+            "total_expenses": total_expenses,
+            "net_amount": total_receipts - total_expenses
+        }
+
+    def category_breakdown(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: str = "expense"
+    ) -> List[Dict]:
+        """Totals per category, matching TransactionService.get_category_breakdown"""
+        snapshot = self.snapshot(db)
+        positions = snapshot.select(start_date, end_date)
+        codes = snapshot.category_codes[positions]
+        keep = (snapshot.types[positions] == TYPE_CODES.get(transaction_type, UNKNOWN_TYPE)) & (codes != NO_ID)
+        codes = codes[keep]
+
+        minlength = len(snapshot.categories)
+        counts = np.bincount(codes, minlength=minlength)
+        totals = np.bincount(codes, weights=snapshot.cents[positions][keep], minlength=minlength)
+        return [
+            {
+                "category": snapshot.categories[code],
+                "total_amount": cents_to_float(np.rint(totals[code])),
+                "count": int(counts[code])
+            }
+            for code in np.flatnonzero(counts)
+        ]
+
+    def time_series(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        interval: str = "month",
+        province_id: Optional[int] = None
+    ) -> List[Dict]:
+        """Receipts and expenses per day or month, for periods with activity"""
+        snapshot = self.snapshot(db)
+        positions = snapshot.select(start_date, end_date, province_id)
+        if len(positions) == 0:
+            return []
+
+        # Rows are sorted by day, so each period is a contiguous run
+        periods = (snapshot.months if interval == "month" else snapshot.days)[positions]
+        starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        types = snapshot.types[positions]
+        cents = snapshot.cents[positions]
+        receipts = np.add.reduceat(np.where(types == RECEIPT, cents, 0), starts)
+        expenses = np.add.reduceat(np.where(types == EXPENSE, cents, 0), starts)
+        counts = np.diff(np.r_[starts, len(positions)])
+
+        series = []
+        for period, receipt_cents, expense_cents, count in zip(periods[starts], receipts, expenses, counts):
+            if interval == "month":
+                label = f"{period // 12:04d}-{period % 12 + 1:02d}"
+            else:
+                label = date.fromordinal(int(period)).isoformat()
+            series.append({
+                "period": label,
+                "receipts": cents_to_float(receipt_cents),
+                "expenses": cents_to_float(expense_cents),
+                "net": cents_to_float(receipt_cents - expense_cents),
+                "count": int(count)
+            })
+        return series
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            **self._stats,
+            "rows": snapshot.size if snapshot else 0,
+            "bytes": snapshot.nbytes if snapshot else 0,
+            "version": snapshot.version if snapshot else None
+        }
+
+    def _refresh(self, db: Session, current: Optional[LedgerSnapshot], version: int) -> LedgerSnapshot:
+        # A version lower than the snapshot's means the counter was reset
+        if current is not None and current.version < version:
+            changed = db.execute(
+                select(*SNAPSHOT_COLUMNS).where(Transaction.ledger_version > current.version)
+            ).all()
+            deleted_ids = db.execute(
+                select(DeletedTransaction.transaction_id).where(DeletedTransaction.ledger_version > current.version)
+            ).scalars().all()
+            self._stats["incremental_refreshes"] += 1
+            return current.merge(changed, deleted_ids, version)
+
+        # version was read before the rows, so anything committed during the
+        # load is read again, harmlessly, by the next refresh
+        self._stats["full_loads"] += 1
+        return LedgerSnapshot.from_rows(db.execute(select(*SNAPSHOT_COLUMNS)).all(), version)
+
+ledger_analytics = LedgerAnalytics()
@@ -0,0 +1,185 @@
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+
+PROFILER_MAX_SECONDS = int(os.getenv("PROFILER_MAX_SECONDS", "60"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+PROFILER_REQUEST_PROFILES = int(os.getenv("PROFILER_REQUEST_PROFILES", "20"))  # per-request profiles kept
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# Leaf frames of threads that are waiting for work rather than doing any
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+Frame = Tuple[str, str, int]  # function, file, first line
+
+class StackSampler:
+    """Samples the stacks of every thread in the process from a background thread.
+
+    Each tick reads sys._current_frames() and counts the stack of every
+    thread but its own, so the cost is one dictionary of frames per interval
+    and nothing at all in the threads being observed. Idle threads (waiting
+    on a lock, a selector or a queue) are skipped unless include_idle is set.
+    """
+
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS, include_idle: bool = False):
+        self.interval = interval_ms / 1000
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - (self.started_at or time.perf_counter())
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[Frame] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                if not self.include_idle and (os.path.basename(stack[0][1]), stack[0][0]) in IDLE_FRAMES:
+                    continue
+                stack.reverse()
+                self.stacks[(names.get(thread_id, str(thread_id)),) + tuple(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format, one "thread;frame;frame count" per line"""
+        lines = []
+        for (thread_name, *stack), count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+            frames = [f"{os.path.basename(filename)}:{function}" for function, filename, _ in stack]
+            lines.append(";".join([thread_name] + frames) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> Dict:
+        """A speedscope file with one sampled profile per thread, weighted in milliseconds"""
+        frame_index: Dict[Frame, int] = {}
+        frames: List[Dict] = []
+        by_thread: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+        weight = self.interval * 1000
+        for (thread_name, *stack), count in self.stacks.items():
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indexes.append(frame_index[frame])
+            samples, weights = by_thread.setdefault(thread_name, ([], []))
+            samples.append(indexes)
+            weights.append(count * weight)
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "church-finance-backend stack sampler",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread_name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights
+                }
+                for thread_name, (samples, weights) in sorted(by_thread.items())
+            ]
+        }
+
+    def summary(self) -> Dict:
+        return {
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": self.interval * 1000
+        }
+
+class Profiler:
+    """Runs one stack sampler at a time over the live worker.
+
+    Either for a fixed number of seconds (profile), or for the duration of
+    one request that asked for it (start_request/finish_request), whose
+    profile is then kept in a small LRU until it is fetched.
+    """
+
+    def __init__(self, max_seconds: float = PROFILER_MAX_SECONDS, kept_profiles: int = PROFILER_REQUEST_PROFILES):
+        self.max_seconds = max_seconds
+        self.kept_profiles = kept_profiles
+        self.profiles: "OrderedDict[str, Tuple[Dict, StackSampler]]" = OrderedDict()
+        self._busy = threading.Lock()
+
+    async def profile(self, seconds: float, interval_ms: float = PROFILER_INTERVAL_MS, include_idle: bool = False) -> Optional[StackSampler]:
+        """Sample the worker for seconds; None if another profile is running"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        sampler = StackSampler(interval_ms, include_idle)
+        try:
+            sampler.start()
+            await asyncio.sleep(min(seconds, self.max_seconds))
+        finally:
+            sampler.stop()
+            self._busy.release()
+        return sampler
+
+    def start_request(self, interval_ms: float = PROFILER_INTERVAL_MS) -> Optional[StackSampler]:
+        if not self._busy.acquire(blocking=False):
+            return None
+        sampler = StackSampler(interval_ms)
+        sampler.start()
+        return sampler
+
+    @staticmethod
+    def reserve_id() -> str:
+        return uuid.uuid4().hex[:12]
+
+    def finish_request(self, sampler: StackSampler, label: str, profile_id: Optional[str] = None) -> str:
+        """Stop a request's sampler and keep its profile; returns the profile id"""
+        try:
+            sampler.stop()
+        finally:
+            self._busy.release()
+        profile_id = profile_id or self.reserve_id()
+        info = {"id": profile_id, "label": label, "created_at": datetime.utcnow().isoformat(timespec="seconds"), **sampler.summary()}
+        self.profiles[profile_id] = (info, sampler)
+        while len(self.profiles) > self.kept_profiles:
+            self.profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[Tuple[Dict, StackSampler]]:
+        return self.profiles.get(profile_id)
+
+    def list(self) -> List[Dict]:
+        return [info for info, _ in reversed(self.profiles.values())]
+
+profiler = Profiler()
@@ -0,0 +1,215 @@
+from app.models.financial_year import FinancialYear
+from app.models.province import Province
+from app.models.province_performance import ProvincePerformance
+from app.models.transaction_rollup import TransactionDailyRollup
+from app.database import session_scope
+from app.utils.helpers import calculate_performance_score
+from app.utils.money import from_cents, sql_sum_cents
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, insert, select
+from typing import Dict, List, Optional, Tuple
+from datetime import date
+from decimal import Decimal
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+RANKING_REFRESH_INTERVAL_SECONDS = int(os.getenv("RANKING_REFRESH_INTERVAL_SECONDS", "900"))
+
+CENTS = Decimal("0.01")
+
+class ProvinceRankingService:
+    """Maintains the precomputed province performance ranking per financial year.
+    
+    Each province is scored on its receipts for the year against a target of
+    allocation_percent of all receipts in that year. Ledger writers mark the
+    affected years stale through RollupService; stale years are recomputed
+    from the daily rollups on the next read or scheduled refresh, so serving a
+    ranking is one indexed read of province_performance.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_ranking(self, financial_year_id: Optional[int] = None) -> Optional[Tuple[FinancialYear, List[Dict]]]:
+        """Return the financial year and its ranked provinces, refreshing it first if stale"""
+        financial_year = self.resolve_financial_year(financial_year_id)
+        if financial_year is None:
+            return None
+        
+        if self._needs_refresh(financial_year.id):
+            try:
+                self.refresh(financial_year)
+                self.db.commit()
+            except IntegrityError:
+                # Another worker refreshed the same year concurrently; read theirs
+                self.db.rollback()
+        
+        rows = self.db.query(
+            ProvincePerformance.rank,
+            ProvincePerformance.province_id,
+            Province.name.label("province_name"),
+            ProvincePerformance.receipts_total,
+            ProvincePerformance.target_amount,
+            ProvincePerformance.performance_score,
+            ProvincePerformance.refreshed_at
+        ).join(
+            Province, Province.id == ProvincePerformance.province_id
+        ).filter(
+            ProvincePerformance.financial_year_id == financial_year.id
+        ).order_by(ProvincePerformance.rank).all()
+        
+        return financial_year, [dict(row._mapping) for row in rows]
+    
+    def resolve_financial_year(self, financial_year_id: Optional[int] = None) -> Optional[FinancialYear]:
+        """Look up a financial year, defaulting to the active one covering today"""
+        if financial_year_id is not None:
+            return self.db.query(FinancialYear).filter(FinancialYear.id == financial_year_id).first()
+        
+        active = self.db.query(FinancialYear).filter(FinancialYear.is_active == True)
+        today = date.today()
+        current = active.filter(
+            FinancialYear.start_date <= today,
+            FinancialYear.end_date >= today
+        ).order_by(FinancialYear.start_date.desc()).first()
+        return current or active.order_by(FinancialYear.start_date.desc()).first()
+    
+    def refresh(self, financial_year: FinancialYear) -> int:
+        """Recompute and store the ranking for one financial year; returns the number of provinces"""
+        receipt_cents_by_province = dict(
+            self.db.query(
+                TransactionDailyRollup.province_id,
+                sql_sum_cents(TransactionDailyRollup.total_amount)
+            ).filter(
+                TransactionDailyRollup.type == "receipt",
+                TransactionDailyRollup.day >= financial_year.start_date,
+                TransactionDailyRollup.day <= financial_year.end_date
+            ).group_by(TransactionDailyRollup.province_id).all()
+        )
+        total_receipts = from_cents(sum(receipt_cents_by_province.values()))
+        
+        scored = []
+        for province_id, name, allocation_percent in self.db.query(
+            Province.id, Province.name, Province.allocation_percent
+        ).all():
+            receipts = from_cents(receipt_cents_by_province.get(province_id, 0))
+            target = (total_receipts * Decimal(str(allocation_percent or 0)) / 100).quantize(CENTS)
+            scored.append((calculate_performance_score(receipts, target), receipts, name, province_id, target))
+        
+        # Highest score first; receipts then name break ties deterministically
+        scored.sort(key=lambda item: (-item[0], -item[1], item[2]))
+        
+        self.db.query(ProvincePerformance).filter(
+            ProvincePerformance.financial_year_id == financial_year.id
+        ).delete(synchronize_session=False)
+        if scored:
+            self.db.execute(insert(ProvincePerformance.__table__), [
+                {
+                    "financial_year_id": financial_year.id,
+                    "province_id": province_id,
+                    "receipts_total": receipts,
+                    "target_amount": target,
+                    "performance_score": round(score, 2),
+                    "rank": rank,
+                    "is_stale": False
+                }
+                for rank, (score, receipts, name, province_id, target) in enumerate(scored, start=1)
+            ])
+        
+        if self._is_current(financial_year):
+            # Keep the province's own rank column in step with the current year
+            ranks = {province_id: rank for rank, (_, _, _, province_id, _) in enumerate(scored, start=1)}
+            for province in self.db.query(Province).all():
+                if province.performance_rank != ranks.get(province.id):
+                    province.performance_rank = ranks.get(province.id)
+        
+        return len(scored)
+    
+    def mark_stale(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> None:
+        """Flag rankings of financial years overlapping a date range as needing a refresh.
+        
+        Runs inside the caller's transaction so the flag commits with the ledger change.
+        """
+        years = select(FinancialYear.id)
+        if start_date:
+            years = years.where(FinancialYear.end_date >= start_date)
+        if end_date:
+            years = years.where(FinancialYear.start_date <= end_date)
+        
+        self.db.query(ProvincePerformance).filter(
+            ProvincePerformance.financial_year_id.in_(years),
+            ProvincePerformance.is_stale == False
+        ).update({ProvincePerformance.is_stale: True}, synchronize_session=False)
+    
+    def refresh_due(self) -> int:
+        """Refresh stale years plus the current one; returns the number of years refreshed"""
+        stale_ids = {
+            row[0] for row in self.db.query(ProvincePerformance.financial_year_id).filter(
+                ProvincePerformance.is_stale == True
+            ).distinct().all()
+        }
+        # The current year is always refreshed so province and allocation edits,
+        # which don't go through the ledger, are picked up on the schedule
+        current = self.resolve_financial_year()
+        if current is not None:
+            stale_ids.add(current.id)
+        
+        refreshed = 0
+        for financial_year in self.db.query(FinancialYear).filter(FinancialYear.id.in_(stale_ids)).all():
+            self.refresh(financial_year)
+            refreshed += 1
+        self.db.commit()
+        return refreshed
+    
+    def _needs_refresh(self, financial_year_id: int) -> bool:
+        state = self.db.query(
+            func.count(ProvincePerformance.id),
+            func.max(ProvincePerformance.is_stale)
+        ).filter(ProvincePerformance.financial_year_id == financial_year_id).one()
+        return not state[0] or bool(state[1])
+    
+    @staticmethod
+    def _is_current(financial_year: FinancialYear) -> bool:
+        return bool(financial_year.is_active) and financial_year.start_date <= date.today() <= financial_year.end_date
+
+class RankingRefresher:
+    """Periodically refreshes due province rankings on a worker thread"""
+    
+    def __init__(self, interval_seconds: int = RANKING_REFRESH_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.get_event_loop().create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self._refresh)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scheduled province ranking refresh failed")
+            await asyncio.sleep(self.interval_seconds)
+    
+    @staticmethod
+    def _refresh() -> None:
+        with session_scope() as db:
+            ProvinceRankingService(db).refresh_due()
+
+ranking_refresher = RankingRefresher()
@@ -0,0 +1,265 @@
+from app.database import engine, async_engine, replica_router
+from sqlalchemy import event
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+import logging
+import json
+import re
+import threading
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+QUERY_DETECTOR_ENABLED = os.getenv("QUERY_DETECTOR_ENABLED", "false").lower() in ("1", "true", "yes")
+QUERY_DETECTOR_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_DETECTOR_N_PLUS_ONE_THRESHOLD", "5"))  # repeats of one shape
+QUERY_DETECTOR_SLOW_MS = float(os.getenv("QUERY_DETECTOR_SLOW_MS", "100"))
+QUERY_DETECTOR_EXPLAIN = os.getenv("QUERY_DETECTOR_EXPLAIN", "true").lower() in ("1", "true", "yes")
+# PostgreSQL sequential scans estimated below this many rows are not worth an index
+QUERY_DETECTOR_SEQ_SCAN_MIN_ROWS = int(os.getenv("QUERY_DETECTOR_SEQ_SCAN_MIN_ROWS", "1000"))
+QUERY_DETECTOR_RECENT_REPORTS = int(os.getenv("QUERY_DETECTOR_RECENT_REPORTS", "100"))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"VALUES\s*\(\?\.\.\.\)(?:\s*,\s*\(\?\.\.\.\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """The shape of a statement: literals, placeholders and IN/VALUES lists collapsed"""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?...)", shape)
+    shape = _VALUES_LIST.sub("VALUES (?...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+class QueryBudgetExceeded(AssertionError):
+    """A block ran more statements than budgeted, or repeated one shape N+1 style"""
+
+class QueryLog:
+    """Statements run on behalf of one request or tracked block"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.sql_seconds = 0.0
+        # fingerprint -> [executions, total seconds, example statement]
+        self.shapes: Dict[str, List] = {}
+        self.slow: List[Tuple[str, float]] = []
+        self.unindexed: List[Tuple[str, str]] = []
+
+    def record(self, statement: str, seconds: float, slow_seconds: float) -> str:
+        shape = fingerprint(statement)
+        self.count += 1
+        self.sql_seconds += seconds
+        entry = self.shapes.get(shape)
+        if entry is None:
+            self.shapes[shape] = [1, seconds, statement]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+        if seconds >= slow_seconds:
+            self.slow.append((shape, seconds))
+        return shape
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int, float]]:
+        """Shapes executed at least threshold times, most frequent first"""
+        return sorted(
+            ((shape, executions, seconds) for shape, (executions, seconds, _) in self.shapes.items() if executions >= threshold),
+            key=lambda item: -item[1]
+        )
+
+current_query_log: ContextVar[Optional[QueryLog]] = ContextVar("current_query_log", default=None)
+
+class QueryShapeDetector:
+    """Flags N+1 patterns, slow statements and unindexed reads per request.
+
+    Engine listeners fingerprint every statement run while a QueryLog is
+    active (a request under the middleware, or a block under track() or
+    query_budget()). At the end, shapes repeated n_plus_one_threshold times
+    or more, statements slower than slow_ms and SELECTs whose plan scans a
+    whole table are reported. Plans come from EXPLAIN (QUERY PLAN on SQLite,
+    FORMAT JSON on PostgreSQL), run once per shape on the same connection.
+    Meant for development and CI: leave it disabled in production.
+    """
+
+    def __init__(
+        self,
+        n_plus_one_threshold: int = QUERY_DETECTOR_N_PLUS_ONE_THRESHOLD,
+        slow_ms: float = QUERY_DETECTOR_SLOW_MS,
+        explain: bool = QUERY_DETECTOR_EXPLAIN,
+        seq_scan_min_rows: int = QUERY_DETECTOR_SEQ_SCAN_MIN_ROWS,
+        recent_reports: int = QUERY_DETECTOR_RECENT_REPORTS
+    ):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_seconds = slow_ms / 1000
+        self.explain = explain
+        self.seq_scan_min_rows = seq_scan_min_rows
+        self.recent: Deque[Dict] = deque(maxlen=recent_reports)
+        self.requests_checked = 0
+        self.requests_flagged = 0
+        # fingerprint -> full-scan description, or None when the plan uses indexes
+        self._plans: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._instrumented = set()
+
+    def instrument_engine(self, sync_engine) -> None:
+        if id(sync_engine) in self._instrumented:
+            return
+        self._instrumented.add(id(sync_engine))
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if current_query_log.get() is not None:
+                conn.info.setdefault("detector_started", []).append(time.perf_counter())
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            log = current_query_log.get()
+            if log is None or not conn.info.get("detector_started"):
+                return
+            seconds = time.perf_counter() - conn.info["detector_started"].pop()
+            shape = log.record(statement, seconds, self.slow_seconds)
+            if self.explain and not executemany and shape not in self._plans and statement.lstrip()[:6].upper() == "SELECT":
+                self._plans[shape] = self._full_scan(conn, statement, parameters)
+            scan = self._plans.get(shape)
+            if scan is not None and log.shapes[shape][0] == 1:
+                log.unindexed.append((shape, scan))
+
+        def handle_error(exception_context):
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("detector_started"):
+                connection.info["detector_started"].pop()
+
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(sync_engine, "handle_error", handle_error)
+
+    def instrument_engines(self) -> None:
+        """Instrument the primary engines and every replica's"""
+        self.instrument_engine(engine)
+        self.instrument_engine(async_engine.sync_engine)
+        for replica in replica_router.replicas:
+            self.instrument_engine(replica.engine)
+            self.instrument_engine(replica.async_engine.sync_engine)
+
+    def _full_scan(self, conn, statement: str, parameters) -> Optional[str]:
+        """Explain a SELECT on a fresh cursor; describe a full table scan if the plan has one"""
+        dialect = conn.dialect.name
+        if dialect not in ("sqlite", "postgresql"):
+            return None
+        prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN (FORMAT JSON) "
+        # On PostgreSQL a failed EXPLAIN would abort the request's transaction
+        savepoint = dialect == "postgresql"
+        cursor = conn.connection.cursor()
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT query_detector_explain")
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT query_detector_explain")
+        except Exception:
+            logger.debug("Could not explain statement", exc_info=True)
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_detector_explain")
+            return None
+        finally:
+            cursor.close()
+
+        if dialect == "sqlite":
+            for row in rows:
+                match = _SQLITE_FULL_SCAN.match(row[-1])
+                if match:
+                    return f"full scan of {match.group(1)}"
+            return None
+
+        # psycopg2 decodes the JSON plan; asyncpg hands back the text
+        plan = rows[0][0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return self._postgres_seq_scan(plan[0]["Plan"])
+
+    def _postgres_seq_scan(self, node: Dict) -> Optional[str]:
+        if node.get("Node Type") == "Seq Scan" and node.get("Plan Rows", 0) >= self.seq_scan_min_rows:
+            return f"sequential scan of {node.get('Relation Name')} (~{node.get('Plan Rows')} rows)"
+        for child in node.get("Plans", []):
+            found = self._postgres_seq_scan(child)
+            if found:
+                return found
+        return None
+
+    @contextmanager
+    def track(self, label: str) -> Iterator[QueryLog]:
+        """Log every statement run inside the block"""
+        self.instrument_engines()
+        log = QueryLog(label)
+        token = current_query_log.set(log)
+        try:
+            yield log
+        finally:
+            current_query_log.reset(token)
+
+    def findings(self, log: QueryLog) -> List[Dict]:
+        findings = [
+            {"kind": "n_plus_one", "shape": shape, "executions": executions, "seconds": round(seconds, 4)}
+            for shape, executions, seconds in log.repeated(self.n_plus_one_threshold)
+        ]
+        findings.extend({"kind": "slow", "shape": shape, "seconds": round(seconds, 4)} for shape, seconds in log.slow)
+        findings.extend({"kind": "unindexed", "shape": shape, "plan": plan} for shape, plan in log.unindexed)
+        return findings
+
+    def report(self, log: QueryLog) -> List[Dict]:
+        """Log and keep the findings for a finished request"""
+        findings = self.findings(log)
+        with self._lock:
+            self.requests_checked += 1
+            if findings:
+                self.requests_flagged += 1
+                self.recent.append({
+                    "label": log.label,
+                    "queries": log.count,
+                    "sql_seconds": round(log.sql_seconds, 4),
+                    "findings": findings
+                })
+        for finding in findings:
+            logger.warning("%s: %s query %s", log.label, finding["kind"], {k: v for k, v in finding.items() if k != "kind"})
+        return findings
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": QUERY_DETECTOR_ENABLED,
+                "requests_checked": self.requests_checked,
+                "requests_flagged": self.requests_flagged,
+                "shapes_explained": len(self._plans),
+                "recent": list(self.recent)
+            }
+
+query_detector = QueryShapeDetector()
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "query budget", allow_n_plus_one: bool = False) -> Iterator[QueryLog]:
+    """Fail a block that runs more than max_queries statements or repeats a shape N+1 style.
+
+    For tests and CI checks of an endpoint or service call, with any runner:
+
+        with query_budget(3, "GET /api/v1/analytics/dashboard"):
+            client.get("/api/v1/analytics/dashboard", headers=headers)
+    """
+    with query_detector.track(label) as log:
+        yield log
+    if log.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{label}: {log.count} queries, budget {max_queries}: "
+            + "; ".join(f"{executions}x {shape}" for shape, (executions, _, _) in log.shapes.items())
+        )
+    repeated = log.repeated(query_detector.n_plus_one_threshold)
+    if repeated and not allow_n_plus_one:
+        shape, executions, _ = repeated[0]
+        raise QueryBudgetExceeded(f"{label}: N+1 pattern, {executions}x {shape}")
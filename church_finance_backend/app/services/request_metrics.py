@@ -0,0 +1,204 @@
+from app.database import engine, async_engine, replica_router, pool_status
+from sqlalchemy import event
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import bisect
+import threading
+import time
+import os
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """A labelled Prometheus histogram kept in process memory"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in sorted(self._series.items())]
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_number(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class RequestStats:
+    """Work done on behalf of one request, filled in by the engine listeners"""
+
+    __slots__ = ("queries", "sql_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+# The stats of the request being served; copied into handler threads and the
+# async engine's greenlets along with the rest of the context
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+class RequestMetrics:
+    """Per-route latency, SQL and response size histograms, rendered for Prometheus.
+
+    Statement timing comes from before/after_cursor_execute listeners on the
+    engines; each statement is added to the current request's RequestStats,
+    if any, and to a per-engine histogram that also covers background work.
+    """
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "Time to serve a request, including streaming the body.",
+            ("method", "route", "status"), LATENCY_BUCKETS
+        )
+        self.request_queries = Histogram(
+            "http_request_db_queries", "SQL statements executed per request.",
+            ("method", "route"), QUERY_COUNT_BUCKETS
+        )
+        self.request_sql_time = Histogram(
+            "http_request_db_seconds", "Cumulative SQL time per request.",
+            ("method", "route"), LATENCY_BUCKETS
+        )
+        self.response_size = Histogram(
+            "http_response_size_bytes", "Response body size.",
+            ("method", "route"), SIZE_BUCKETS
+        )
+        self.auth_duration = Histogram(
+            "http_auth_duration_seconds", "Time spent authenticating a request, by how the token was verified.",
+            ("path",), LATENCY_BUCKETS
+        )
+        self.query_duration = Histogram(
+            "db_query_duration_seconds", "SQL statement latency, requests and background work alike.",
+            ("engine",), QUERY_LATENCY_BUCKETS
+        )
+        self.in_progress = 0
+        self._lock = threading.Lock()
+        self._instrumented = set()
+
+    def instrument_engine(self, sync_engine, name: str) -> None:
+        """Time every statement run on an engine (the sync_engine of an async one)"""
+        if id(sync_engine) in self._instrumented:
+            return
+        self._instrumented.add(id(sync_engine))
+        labels = (name,)
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["query_started"].pop()
+            elapsed = time.perf_counter() - started
+            self.query_duration.observe(labels, elapsed)
+            stats = current_request_stats.get()
+            if stats is not None:
+                stats.queries += 1
+                stats.sql_seconds += elapsed
+
+        def handle_error(exception_context):
+            # Keep the start-time stack balanced when a statement fails
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("query_started"):
+                connection.info["query_started"].pop()
+
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(sync_engine, "handle_error", handle_error)
+
+    def instrument_engines(self) -> None:
+        """Instrument the primary engines and every replica's"""
+        self.instrument_engine(engine, "primary")
+        self.instrument_engine(async_engine.sync_engine, "primary_async")
+        for index, replica in enumerate(replica_router.replicas):
+            self.instrument_engine(replica.engine, f"replica{index}")
+            self.instrument_engine(replica.async_engine.sync_engine, f"replica{index}_async")
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_progress += 1
+
+    def request_finished(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        stats: RequestStats,
+        size: Optional[int],
+        auth_path: Optional[str],
+        auth_seconds: Optional[float]
+    ) -> None:
+        with self._lock:
+            self.in_progress -= 1
+        self.request_duration.observe((method, route, str(status)), seconds)
+        self.request_queries.observe((method, route), stats.queries)
+        self.request_sql_time.observe((method, route), stats.sql_seconds)
+        if size is not None:
+            self.response_size.observe((method, route), size)
+        if auth_path is not None and auth_seconds is not None:
+            self.auth_duration.observe((auth_path,), auth_seconds)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for histogram in (
+            self.request_duration, self.request_queries, self.request_sql_time,
+            self.response_size, self.auth_duration, self.query_duration
+        ):
+            lines.extend(histogram.render())
+        lines.extend([
+            "# HELP http_requests_in_progress Requests currently being served.",
+            "# TYPE http_requests_in_progress gauge",
+            f"http_requests_in_progress {self.in_progress}"
+        ])
+        lines.extend(_pool_gauges(pool_status()))
+        return "\n".join(lines) + "\n"
+
+def _pool_gauges(status: Dict) -> Iterable[str]:
+    pools = [("sync", status["sync"]), ("async", status["async"])]
+    for index, replica in enumerate(status["replicas"]):
+        pools.extend([(f"replica{index}_sync", replica["sync"]), (f"replica{index}_async", replica["async"])])
+    for field in ("checked_out", "max_checked_out", "checkouts", "connections_opened", "wait_count", "wait_seconds_total"):
+        name = f"db_pool_{field}"
+        yield f"# TYPE {name} gauge"
+        for pool, values in pools:
+            yield f'{name}{{pool="{pool}"}} {_format_number(values[field])}'
+
+request_metrics = RequestMetrics()
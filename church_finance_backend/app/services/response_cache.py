@@ -0,0 +1,293 @@
+from app.models.ledger_version import LedgerVersion
+from app.models.transaction import Transaction
+from app.models.deleted_transaction import DeletedTransaction
+from app.models.province import Province
+from app.models.department import Department
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from datetime import date, datetime
+import itertools
+import threading
+import hashlib
+import logging
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # memory, redis or off
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+# Larger bodies are served but not stored, so one huge report can't evict the rest
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+LEDGER_VERSION_ID = 1
+
+def get_ledger_version(db: Session) -> int:
+    """Current ledger version; 0 before the first write"""
+    version = db.query(LedgerVersion.version).filter(LedgerVersion.id == LEDGER_VERSION_ID).scalar()
+    return version or 0
+
+def seed_ledger_version(db: Session) -> None:
+    """Create the ledger version row if it is missing; safe to run from every worker at startup"""
+    if db.query(LedgerVersion.id).filter(LedgerVersion.id == LEDGER_VERSION_ID).first() is not None:
+        return
+    try:
+        db.execute(insert(LedgerVersion.__table__).values(id=LEDGER_VERSION_ID, version=0))
+        db.commit()
+    except IntegrityError:
+        # Another worker seeded it first
+        db.rollback()
+
+def bump_ledger_version(db: Session) -> None:
+    """Invalidate cached reports; runs inside the writer's transaction.
+    
+    The UPDATE holds the row lock until commit and serializes writers, so
+    call it once per write or batch, as the last statement before commit.
+    
+    Committed ledger rows not yet stamped (NULL ledger_version), including
+    this transaction's, get the new version. Versions are handed out under
+    the row lock, so they follow commit order: a reader that has seen
+    version v has seen every row stamped v or lower, whenever its write began.
+    """
+    # Write pending ORM changes first, so they are stamped too
+    db.flush()
+    _increment_ledger_version(db)
+
+def _increment_ledger_version(db: Session) -> None:
+    table = LedgerVersion.__table__
+    result = db.execute(
+        update(table).where(table.c.id == LEDGER_VERSION_ID).values(version=table.c.version + 1)
+    )
+    if result.rowcount == 0:
+        raise RuntimeError("ledger_version row is missing; run the migrations or restart the app to seed it")
+    
+    version = select(table.c.version).where(table.c.id == LEDGER_VERSION_ID).scalar_subquery()
+    transactions = Transaction.__table__
+    db.execute(
+        update(transactions).where(transactions.c.ledger_version.is_(None)).values(
+            # Keep updated_at as the row's write time, not the stamp's
+            ledger_version=version, updated_at=transactions.c.updated_at
+        )
+    )
+    tombstones = DeletedTransaction.__table__
+    db.execute(update(tombstones).where(tombstones.c.ledger_version.is_(None)).values(ledger_version=version))
+
+# Reports show these rows' names, so writing them invalidates cached reports too
+REFERENCE_MODELS = (Province, Department)
+# Reference columns no cached report shows; the ranking refresh keeps
+# performance_rank in step with the ledger, which has already bumped
+UNCACHED_REFERENCE_ATTRIBUTES = {"performance_rank"}
+
+def _changes_cached_fields(instance) -> bool:
+    changed = {attribute.key for attribute in inspect(instance).attrs if attribute.history.has_changes()}
+    return bool(changed - UNCACHED_REFERENCE_ATTRIBUTES)
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_reference_write(session: Session, flush_context) -> None:
+    added_or_deleted = itertools.chain(session.new, session.deleted)
+    if any(isinstance(instance, REFERENCE_MODELS) for instance in added_or_deleted) or any(
+        isinstance(instance, REFERENCE_MODELS) and _changes_cached_fields(instance) for instance in session.dirty
+    ):
+        # Already flushing, so this flush's rows are written
+        _increment_ledger_version(session)
+
+class MemoryCacheBackend:
+    """In-process LRU of serialized responses with a per-entry TTL"""
+    
+    blocking = False
+    
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body
+    
+    def set(self, key: str, body: bytes, ttl: int) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (body, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def size(self) -> int:
+        return len(self._entries)
+
+class RedisCacheBackend:
+    """Shares cached responses between workers through a Redis-compatible server.
+    
+    Needs the optional redis package. Calls block, so ResponseCache runs them
+    in the threadpool.
+    """
+    
+    blocking = True
+    
+    def __init__(self, url: str = RESPONSE_CACHE_REDIS_URL, prefix: str = "church-finance:response:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the redis package")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+    
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+    
+    def set(self, key: str, body: bytes, ttl: int) -> None:
+        self._client.set(self.prefix + key, body, ex=ttl)
+    
+    def clear(self) -> None:
+        for key in self._client.scan_iter(match=self.prefix + "*"):
+            self._client.delete(key)
+    
+    def size(self) -> Optional[int]:
+        return None
+
+class ResponseCache:
+    """Caches JSON report responses keyed by endpoint, parameters and ledger version.
+    
+    Every ledger write bumps the version, so entries never need explicit
+    invalidation: later requests simply miss and stale entries age out. The
+    ETag is derived from the same key, so a client holding the current
+    version gets a 304 without the report being computed or even looked up.
+    Bodies over max_entry_bytes are served but not stored. Backend errors
+    are logged and treated as misses.
+    """
+    
+    def __init__(
+        self,
+        backend=None,
+        ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS,
+        max_entry_bytes: int = RESPONSE_CACHE_MAX_ENTRY_BYTES
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entry_bytes = max_entry_bytes
+        self._stats = {"hits": 0, "misses": 0, "not_modified": 0, "oversized": 0, "errors": 0}
+    
+    async def respond(
+        self,
+        request: Request,
+        db: AsyncSession,
+        endpoint: str,
+        params: Dict[str, Any],
+        compute: Callable[[Session], Any],
+        response_model: Optional[Type] = None
+    ) -> Response:
+        """Serve a report from cache, computing it with compute(session) on a miss"""
+        version = await db.run_sync(get_ledger_version)
+        key = self.make_key(endpoint, params, version)
+        etag = f'W/"{key}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        
+        if etag in _parse_if_none_match(request.headers.get("if-none-match")):
+            self._stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        
+        body = await self._get(key)
+        if body is not None:
+            self._stats["hits"] += 1
+            return Response(body, media_type="application/json", headers={**headers, "X-Cache": "HIT"})
+        
+        self._stats["misses"] += 1
+        result = await db.run_sync(compute)
+        if response_model is not None:
+            result = response_model.parse_obj(result)
+        body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode("utf-8")
+        await self._set(key, body)
+        return Response(body, media_type="application/json", headers={**headers, "X-Cache": "MISS"})
+    
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any], version: int) -> str:
+        normalized = json.dumps(
+            {name: _normalize(value) for name, value in params.items() if value is not None},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        digest = hashlib.sha256(f"{endpoint}|{normalized}".encode("utf-8")).hexdigest()[:32]
+        return f"{endpoint}:{version}:{digest}"
+    
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "size": self.backend.size() if self.backend is not None else 0,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+    
+    async def _get(self, key: str) -> Optional[bytes]:
+        if self.backend is None:
+            return None
+        try:
+            if self.backend.blocking:
+                return await run_in_threadpool(self.backend.get, key)
+            return self.backend.get(key)
+        except Exception:
+            self._stats["errors"] += 1
+            logger.warning("Response cache read failed", exc_info=True)
+            return None
+    
+    async def _set(self, key: str, body: bytes) -> None:
+        if self.backend is None:
+            return
+        if len(body) > self.max_entry_bytes:
+            self._stats["oversized"] += 1
+            return
+        try:
+            if self.backend.blocking:
+                await run_in_threadpool(self.backend.set, key, body, self.ttl_seconds)
+            else:
+                self.backend.set(key, body, self.ttl_seconds)
+        except Exception:
+            self._stats["errors"] += 1
+            logger.warning("Response cache write failed", exc_info=True)
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _parse_if_none_match(header: Optional[str]):
+    if not header:
+        return set()
+    return {tag.strip() for tag in header.split(",")}
+
+def _build_backend():
+    if RESPONSE_CACHE_BACKEND == "redis":
+        return RedisCacheBackend()
+    if RESPONSE_CACHE_BACKEND == "off":
+        return None
+    return MemoryCacheBackend()
+
+response_cache = ResponseCache(_build_backend())
@@ -0,0 +1,225 @@
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionDailyRollup, ROLLUP_KEY
+from app.services.province_ranking_service import ProvinceRankingService
+from app.services.budget_reconciliation_service import BudgetReconciliationService
+from app.services.response_cache import bump_ledger_version
+from app.utils.money import Cents, sql_from_cents, sql_sum_cents
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime
+from decimal import Decimal
+
+# Columns that identify a rollup row, in key order
+KEY_FIELDS = ("day", "type", "category", "province_id", "department_id", "project_id")
+
+RollupKey = Tuple[date, str, Optional[str], Optional[int], Optional[int], Optional[int]]
+
+# INSERT constructs with ON CONFLICT support, by dialect
+UPSERT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+class RollupService:
+    """Maintains and queries the daily transaction rollups.
+    
+    Writers call record()/record_many()/remove() inside their own database
+    transaction, so the rollups commit or roll back together with the ledger,
+    and bump the ledger version once before committing.
+    Readers sum over rollup rows, which keeps dashboards and statements
+    proportional to the number of days in range rather than transactions.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def record(self, transaction: Transaction) -> None:
+        """Add a single new transaction to the rollups"""
+        self.record_many([transaction])
+    
+    def remove(self, transaction: Transaction) -> None:
+        """Take a deleted transaction out of the rollups"""
+        self.apply_deltas({self.key_for(transaction): (-Decimal(transaction.amount), -1)})
+    
+    def replace(self, old_key: RollupKey, old_amount: Decimal, transaction: Transaction) -> None:
+        """Move an updated transaction from its previous key/amount to its current one"""
+        deltas = {old_key: (-Decimal(old_amount), -1)}
+        new_key = self.key_for(transaction)
+        amount, count = deltas.get(new_key, (Decimal("0"), 0))
+        deltas[new_key] = (amount + Decimal(transaction.amount), count + 1)
+        self.apply_deltas(deltas)
+    
+    def record_many(self, transactions: Iterable[Transaction]) -> None:
+        """Add a batch of new transactions, issuing one write per distinct key"""
+        deltas: Dict[RollupKey, Tuple[Decimal, int]] = {}
+        for transaction in transactions:
+            key = self.key_for(transaction)
+            amount, count = deltas.get(key, (Decimal("0"), 0))
+            deltas[key] = (amount + Decimal(transaction.amount), count + 1)
+        self.apply_deltas(deltas)
+    
+    def apply_deltas(self, deltas: Dict[RollupKey, Tuple[Decimal, int]]) -> None:
+        """Apply (amount, count) deltas to the rollup rows for each key.
+        
+        A single executemany upsert on the unique rollup key inserts new keys
+        and increments existing rows in SQL, so concurrent writers neither
+        duplicate a key nor lose an increment.
+        """
+        merged: Dict[RollupKey, Tuple[Decimal, int]] = {}
+        for key, (amount, count) in deltas.items():
+            # Blank and missing categories share a row (see ROLLUP_KEY)
+            key = key[:2] + (key[2] or None,) + key[3:]
+            total_amount, total_count = merged.get(key, (Decimal("0"), 0))
+            merged[key] = (total_amount + amount, total_count + count)
+        deltas = {key: delta for key, delta in merged.items() if delta[0] != 0 or delta[1] != 0}
+        if not deltas:
+            return
+        
+        table = TransactionDailyRollup.__table__
+        statement = UPSERT_INSERTS[self.db.get_bind().dialect.name](table)
+        self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=ROLLUP_KEY,
+                set_={
+                    "total_amount": table.c.total_amount + statement.excluded.total_amount,
+                    "transaction_count": table.c.transaction_count + statement.excluded.transaction_count,
+                    "updated_at": func.now()
+                }
+            ),
+            [
+                dict(zip(KEY_FIELDS, key), total_amount=amount, transaction_count=count)
+                for key, (amount, count) in deltas.items()
+            ]
+        )
+        
+        # Drop rows for keys that no longer have any transactions. The upsert
+        # holds their row locks until commit, so no other writer can have
+        # incremented them in between
+        emptied = [key for key, (_, count) in deltas.items() if count < 0]
+        if emptied:
+            self.db.query(TransactionDailyRollup).filter(
+                or_(*[self._key_filter(key) for key in emptied]),
+                TransactionDailyRollup.transaction_count <= 0
+            ).delete(synchronize_session=False)
+        
+        # Receipts feed the province rankings; flag the affected years for refresh
+        receipt_days = [key[0] for key in deltas if key[1] == "receipt"]
+        if receipt_days:
+            ProvinceRankingService(self.db).mark_stale(min(receipt_days), max(receipt_days))
+        
+        # Departmental expenses move the matching budget's actuals
+        expense_deltas: Dict[Tuple[date, int], Decimal] = {}
+        for key, (amount, _) in deltas.items():
+            if key[1] == "expense" and key[4] is not None:
+                expense_deltas[(key[0], key[4])] = expense_deltas.get((key[0], key[4]), Decimal("0")) + amount
+        if expense_deltas:
+            BudgetReconciliationService(self.db).apply_expense_deltas(expense_deltas)
+    
+    def rebuild(self) -> None:
+        """Recompute all rollups from the transactions table"""
+        self.db.query(TransactionDailyRollup).delete(synchronize_session=False)
+        
+        category = func.nullif(Transaction.category, "")
+        grouped = select(
+            Transaction.date,
+            Transaction.type,
+            category,
+            Transaction.province_id,
+            Transaction.department_id,
+            Transaction.project_id,
+            sql_from_cents(sql_sum_cents(Transaction.amount)),
+            func.count(Transaction.id)
+        ).group_by(
+            Transaction.date,
+            Transaction.type,
+            category,
+            Transaction.province_id,
+            Transaction.department_id,
+            Transaction.project_id
+        )
+        
+        self.db.execute(
+            insert(TransactionDailyRollup).from_select(
+                list(KEY_FIELDS) + ["total_amount", "transaction_count"],
+                grouped
+            )
+        )
+        ProvinceRankingService(self.db).mark_stale()
+        bump_ledger_version(self.db)
+    
+    def backfill_if_empty(self) -> bool:
+        """Rebuild the rollups when they are empty but the ledger is not"""
+        has_rollups = self.db.query(TransactionDailyRollup.id).first() is not None
+        has_transactions = self.db.query(Transaction.id).first() is not None
+        if has_rollups or not has_transactions:
+            return False
+        
+        self.rebuild()
+        self.db.commit()
+        return True
+    
+    def totals_by_type(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[str, Cents]:
+        """Sum amounts per transaction type, in cents, over an optional date range"""
+        query = self._filter_days(
+            self.db.query(
+                TransactionDailyRollup.type,
+                sql_sum_cents(TransactionDailyRollup.total_amount).label("total_cents")
+            ),
+            start_date,
+            end_date
+        ).group_by(TransactionDailyRollup.type)
+        
+        return {row.type: int(row.total_cents) for row in query.all()}
+    
+    def totals_by_type_and_category(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Tuple[str, Optional[str], Cents]]:
+        """Sum amounts per (type, category), in cents, over an optional date range"""
+        query = self._filter_days(
+            self.db.query(
+                TransactionDailyRollup.type,
+                TransactionDailyRollup.category,
+                sql_sum_cents(TransactionDailyRollup.total_amount).label("total_cents")
+            ),
+            start_date,
+            end_date
+        ).group_by(TransactionDailyRollup.type, TransactionDailyRollup.category)
+        
+        return [(row.type, row.category, int(row.total_cents)) for row in query.all()]
+    
+    @staticmethod
+    def key_for(transaction: Transaction) -> RollupKey:
+        """Build the rollup key for a transaction"""
+        day = transaction.date
+        if isinstance(day, datetime):
+            day = day.date()
+        return (
+            day,
+            transaction.type,
+            transaction.category,
+            transaction.province_id,
+            transaction.department_id,
+            transaction.project_id
+        )
+    
+    @staticmethod
+    def _key_filter(key: RollupKey):
+        return and_(*[
+            getattr(TransactionDailyRollup, field).is_(None) if value is None
+            else getattr(TransactionDailyRollup, field) == value
+            for field, value in zip(KEY_FIELDS, key)
+        ])
+    
+    @staticmethod
+    def _filter_days(query, start_date: Optional[date], end_date: Optional[date]):
+        if start_date:
+            query = query.filter(TransactionDailyRollup.day >= start_date)
+        if end_date:
+            query = query.filter(TransactionDailyRollup.day <= end_date)
+        return query
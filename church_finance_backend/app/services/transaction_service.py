@@ -1,11 +1,15 @@
 from app.models.transaction import Transaction
-from app.models.user import User
+from app.models.deleted_transaction import DeletedTransaction
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
-from app.database import get_db
+from app.services.rollup_service import RollupService
+from app.services.response_cache import bump_ledger_version
+from app.services.auto_tag_service import get_expense_tagger
+from app.utils.helpers import encode_cursor, decode_cursor
+from app.utils.money import cents_to_float, from_cents, sql_sum_cents
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
-from typing import List, Optional
-from datetime import date, datetime
+from typing import List, Optional, Tuple
+from datetime import date
 import re
 
 class TransactionService:
@@ -30,6 +34,8 @@ class TransactionService:
         )
         
         self.db.add(db_transaction)
+        RollupService(self.db).record(db_transaction)
+        bump_ledger_version(self.db)
         self.db.commit()
         self.db.refresh(db_transaction)
         return db_transaction
@@ -52,9 +58,82 @@ class TransactionService:
         approved_only: bool = False
     ) -> List[Transaction]:
         """Get a list of transactions with filtering"""
-        query = self.db.query(Transaction)
+        query = self._filter_transactions(
+            self.db.query(Transaction),
+            province_id=province_id,
+            department_id=department_id,
+            project_id=project_id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            category=category,
+            approved_only=approved_only
+        )
         
-        # Apply filters
+        return query.offset(skip).limit(limit).all()
+    
+    def get_transactions_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        province_id: Optional[int] = None,
+        department_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        category: Optional[str] = None,
+        approved_only: bool = False
+    ) -> Tuple[List[Transaction], Optional[str]]:
+        """Get a page of transactions using keyset pagination on (date, id).
+        
+        Transactions are returned newest first. The returned cursor points at
+        the last row of the page and is None when there are no more rows.
+        """
+        query = self._filter_transactions(
+            self.db.query(Transaction),
+            province_id=province_id,
+            department_id=department_id,
+            project_id=project_id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            category=category,
+            approved_only=approved_only
+        )
+        
+        if cursor:
+            last_date, last_id = decode_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Transaction.date < last_date,
+                    and_(Transaction.date == last_date, Transaction.id < last_id)
+                )
+            )
+        
+        # Fetch one extra row to know whether another page exists
+        rows = query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+        
+        return rows, next_cursor
+    
+    def _filter_transactions(
+        self,
+        query,
+        province_id: Optional[int] = None,
+        department_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: Optional[str] = None,
+        category: Optional[str] = None,
+        approved_only: bool = False
+    ):
+        """Apply the common listing filters to a transaction query"""
         if province_id:
             query = query.filter(Transaction.province_id == province_id)
         if department_id:
@@ -72,7 +151,7 @@ class TransactionService:
         if approved_only:
             query = query.filter(Transaction.approved_by.isnot(None))
         
-        return query.offset(skip).limit(limit).all()
+        return query
     
     def update_transaction(self, transaction_id: int, transaction_data: TransactionUpdate, updated_by: int) -> Optional[Transaction]:
         """Update a transaction"""
@@ -89,11 +168,16 @@ class TransactionService:
             category = self._auto_tag_expense(transaction_data.description, db_transaction.type)
             transaction_data.category = category
         
+        rollups = RollupService(self.db)
+        old_key = rollups.key_for(db_transaction)
+        old_amount = db_transaction.amount
+        
         update_data = transaction_data.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_transaction, key, value)
         
-        db_transaction.updated_at = datetime.utcnow()
+        rollups.replace(old_key, old_amount, db_transaction)
+        bump_ledger_version(self.db)
         self.db.commit()
         self.db.refresh(db_transaction)
         return db_transaction
@@ -108,7 +192,10 @@ class TransactionService:
         if db_transaction.approved_by is not None:
             raise Exception("Cannot delete an approved transaction")
         
+        RollupService(self.db).remove(db_transaction)
+        self.db.add(DeletedTransaction(transaction_id=db_transaction.id))
         self.db.delete(db_transaction)
+        bump_ledger_version(self.db)
         self.db.commit()
         return True
     
@@ -123,7 +210,6 @@ class TransactionService:
             raise Exception("Transaction already approved")
         
         db_transaction.approved_by = approved_by
-        db_transaction.updated_at = datetime.utcnow()
         self.db.commit()
         self.db.refresh(db_transaction)
         return db_transaction
@@ -133,29 +219,7 @@ class TransactionService:
         if not description or transaction_type != "expense":
             return None
         
-        description_lower = description.lower()
-        
-        # Define category keywords
-        categories = {
-            "Travel": ["travel", "transport", "fuel", "gas", "mileage", "cab", "taxi"],
-            "Office Supplies": ["office", "supplies", "stationery", "paper", "pen", "printer"],
-            "Equipment": ["equipment", "computer", "laptop", "software", "hardware"],
-            "Utilities": ["electricity", "water", "internet", "phone", "utility"],
-            "Food": ["food", "meal", "lunch", "dinner", "restaurant"],
-            "Maintenance": ["maintenance", "repair", "service", "fix"],
-            "Training": ["training", "course", "seminar", "workshop", "education"],
-            "Insurance": ["insurance", "premium", "policy"],
-            "Rent": ["rent", "lease", "facility"],
-            "Marketing": ["marketing", "advertising", "promotion", "campaign"]
-        }
-        
-        # Find matching category
-        for category, keywords in categories.items():
-            for keyword in keywords:
-                if keyword in description_lower:
-                    return category
-        
-        return "Other"
+        return get_expense_tagger().tag(description)
     
     def get_transaction_summary(
         self,
@@ -167,10 +231,10 @@ class TransactionService:
     ) -> dict:
         """Get transaction summary statistics"""
         query = self.db.query(
-            func.sum(Transaction.amount).label("total_amount"),
+            sql_sum_cents(Transaction.amount).label("total_cents"),
             func.count(Transaction.id).label("total_count"),
-            func.sum(Transaction.amount).filter(Transaction.type == "receipt").label("total_receipts"),
-            func.sum(Transaction.amount).filter(Transaction.type == "expense").label("total_expenses")
+            sql_sum_cents(Transaction.amount, Transaction.type == "receipt").label("receipt_cents"),
+            sql_sum_cents(Transaction.amount, Transaction.type == "expense").label("expense_cents")
         )
         
         # Apply filters
@@ -186,13 +250,15 @@ class TransactionService:
             query = query.filter(Transaction.date <= end_date)
         
         result = query.first()
+        receipt_cents = int(result.receipt_cents)
+        expense_cents = int(result.expense_cents)
         
         return {
-            "total_amount": result.total_amount or 0,
+            "total_amount": from_cents(result.total_cents),
             "total_count": result.total_count or 0,
-            "total_receipts": result.total_receipts or 0,
-            "total_expenses": result.total_expenses or 0,
-            "net_amount": (result.total_receipts or 0) - (result.total_expenses or 0)
+            "total_receipts": from_cents(receipt_cents),
+            "total_expenses": from_cents(expense_cents),
+            "net_amount": from_cents(receipt_cents - expense_cents)
         }
     
     def get_category_breakdown(
@@ -203,7 +269,7 @@ class TransactionService:
         """Get expense breakdown by category"""
         query = self.db.query(
             Transaction.category,
-            func.sum(Transaction.amount).label("total_amount"),
+            sql_sum_cents(Transaction.amount).label("total_cents"),
             func.count(Transaction.id).label("count")
         ).filter(
             Transaction.type == "expense",
@@ -222,7 +288,7 @@ class TransactionService:
         return [
             {
                 "category": result.category,
-                "total_amount": float(result.total_amount or 0),
+                "total_amount": cents_to_float(result.total_cents),
                 "count": result.count
             }
             for result in results
@@ -1,11 +1,18 @@
-from datetime import datetime, date
+from app.utils.money import from_cents, to_cents
+from datetime import date
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict, Tuple
+import base64
+import json
 import re
 
 def format_currency(amount: Decimal) -> str:
-    """Format decimal amount as currency string"""
-    return f"${amount:,.2f}"
+    """Format decimal amount as currency string, e.g. $1,234.50 or $-1,234.50.
+
+    Rounds half up to the cent like the rest of the money code. Negatives keep
+    the sign after the symbol as this helper always has, unlike format_cents.
+    """
+    return f"${from_cents(to_cents(amount)):,.2f}"
 
 def validate_date_range(start_date: date, end_date: date) -> bool:
     """Validate that start date is before end date"""
@@ -34,6 +41,10 @@ def get_financial_year_dates(year: int) -> Dict[str, date]:
         "end_date": date(year + 1, 3, 31)
     }
 
+def get_financial_year(day: date) -> int:
+    """Get the financial year (by its starting calendar year) that a date falls in"""
+    return day.year if day.month >= 4 else day.year - 1
+
 def calculate_performance_score(actual: Decimal, target: Decimal) -> float:
     """Calculate performance score as percentage of target achieved"""
     if target == 0:
@@ -45,6 +56,20 @@ def generate_report_filename(report_type: str, start_date: date, end_date: date)
     date_str = f"{start_date.strftime('%Y%m%d')}-{end_date.strftime('%Y%m%d')}"
     return f"{report_type}_{date_str}.xlsx"
 
+def encode_cursor(last_date: date, last_id: int) -> str:
+    """Encode the (date, id) of the last row on a page as an opaque cursor"""
+    payload = json.dumps({"d": last_date.isoformat(), "i": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return date.fromisoformat(payload["d"]), int(payload["i"])
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
 def is_transaction_approvable(user_role: str) -> bool:
     """Check if user role can approve transactions"""
     approvable_roles = ["Admin", "FinanceChair"]
@@ -58,4 +83,19 @@ def is_transaction_creatable(user_role: str) -> bool:
 def is_transaction_deletable(user_role: str) -> bool:
     """Check if user role can delete transactions"""
     deletable_roles = ["Admin", "FinanceChair"]
-    return user_role in deletable_roles
\ No newline at end of file
+    return user_role in deletable_roles
+
+def is_job_admin(user_role: str) -> bool:
+    """Check if user role can see background jobs submitted by other users"""
+    job_admin_roles = ["Admin"]
+    return user_role in job_admin_roles
+
+def is_metrics_allowed(user_role: str) -> bool:
+    """Check if user role can read operational metrics"""
+    metrics_roles = ["Admin"]
+    return user_role in metrics_roles
+
+def is_profiling_allowed(user_role: str) -> bool:
+    """Check if user role can run the sampling profiler"""
+    profiling_roles = ["Admin"]
+    return user_role in profiling_roles
\ No newline at end of file
@@ -0,0 +1,58 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, Union
+from sqlalchemy import BigInteger, Numeric, cast, func, literal_column
+
+# Money is carried as an int number of cents between the database and the
+# response; Decimal/float only appear at the edges
+Cents = int
+
+CENT = Decimal("0.01")
+
+def to_cents(amount: Union[Decimal, float, int, str, None]) -> Cents:
+    """Convert an amount in currency units to whole cents, rounding half up"""
+    if amount is None:
+        return 0
+    if isinstance(amount, int):
+        return amount * 100
+    if isinstance(amount, float):
+        # Go through the shortest repr so 0.1 is 10 cents, not 9.99...
+        amount = repr(amount)
+    return int((Decimal(amount) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def from_cents(cents: Cents) -> Decimal:
+    """Exact Decimal amount for a number of cents"""
+    return Decimal(int(cents)).scaleb(-2).quantize(CENT)
+
+def cents_to_float(cents: Cents) -> float:
+    """Serialize cents for JSON responses that carry amounts as numbers"""
+    return int(cents) / 100
+
+def sum_cents(amounts: Iterable) -> Cents:
+    """Sum currency amounts exactly as integer cents"""
+    return sum(to_cents(amount) for amount in amounts)
+
+def format_cents(cents: Cents) -> str:
+    """Format cents as a currency string, e.g. -$1,234.50"""
+    sign = "-" if cents < 0 else ""
+    units, remainder = divmod(abs(int(cents)), 100)
+    return f"{sign}${units:,}.{remainder:02d}"
+
+def sql_cents(column):
+    """SQL expression for a money column as integer cents"""
+    return cast(func.round(column * 100), BigInteger)
+
+def sql_sum_cents(column, *filters):
+    """SQL SUM of a money column in integer cents, optionally FILTERed.
+
+    Summing integers keeps totals exact on backends that store NUMERIC as
+    floating point (SQLite) and is cheaper than NUMERIC addition elsewhere.
+    """
+    expression = func.sum(sql_cents(column))
+    if filters:
+        expression = expression.filter(*filters)
+    return func.coalesce(expression, 0)
+
+def sql_from_cents(expression):
+    """SQL expression turning integer cents back into a money amount, e.g. to store a sum"""
+    # A decimal literal so the division doesn't truncate to whole units
+    return cast(expression / literal_column("100.0"), Numeric(precision=15, scale=2))
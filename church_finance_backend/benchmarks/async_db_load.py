@@ -0,0 +1,145 @@
+"""Concurrent-request throughput: blocking sync sessions vs. the async session layer.
+
+Serves the analytics, statement and transaction listing routes twice from one
+uvicorn worker: under /async as they ship (AsyncSession), and under /sync as
+they were before (async def handlers calling the synchronous Session). Each
+mix of requests is then driven with N concurrent clients.
+
+Run from church_finance_backend against a seeded database:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.async_db_load --requests 500 --concurrency 25
+
+Requires httpx (see benchmarks/requirements.txt).
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import threading
+import time
+from datetime import date
+from typing import Dict, List
+
+import httpx
+import uvicorn
+from fastapi import APIRouter, Depends, FastAPI
+from sqlalchemy.orm import Session
+
+from app.database import Base, engine, get_db
+from app.routes import analytics, financial_statements, transactions
+from app.services.financial_statements_service import FinancialStatementsService
+from app.services.rollup_service import RollupService
+from app.services.transaction_service import TransactionService
+from app.utils.money import cents_to_float
+
+REQUEST_TIMEOUT_SECONDS = 10
+
+# The pre-async handlers: declared async but blocking the loop on every query
+legacy = APIRouter()
+
+
+@legacy.get("/analytics/dashboard")
+async def legacy_dashboard(db: Session = Depends(get_db)):
+    totals = RollupService(db).totals_by_type()
+    return {key: cents_to_float(value) for key, value in totals.items()}
+
+
+@legacy.get("/statements/bundle")
+async def legacy_bundle(start_date: date, end_date: date, db: Session = Depends(get_db)):
+    return FinancialStatementsService(db).generate_statement_bundle(start_date, end_date)
+
+
+@legacy.get("/transactions/")
+async def legacy_transactions(limit: int = 50, db: Session = Depends(get_db)):
+    return [row.id for row in TransactionService(db).get_transactions(limit=limit)]
+
+
+def build_app() -> FastAPI:
+    Base.metadata.create_all(bind=engine)
+    app = FastAPI()
+    app.include_router(legacy, prefix="/sync")
+    app.include_router(analytics.router, prefix="/async/analytics")
+    app.include_router(financial_statements.router, prefix="/async")
+    app.include_router(transactions.router, prefix="/async/transactions")
+    return app
+
+
+def request_mix(year: int) -> List[str]:
+    return [
+        "/analytics/dashboard",
+        f"/statements/bundle?start_date={year}-01-01&end_date={year}-12-31",
+        "/transactions/?limit=50",
+    ]
+
+
+async def drive(base_url: str, paths: List[str], total: int, concurrency: int) -> Dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                response = await client.get(base_url + paths[index % len(paths)])
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=REQUEST_TIMEOUT_SECONDS) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def run_phase(prefix: str, paths: List[str], total: int, concurrency: int) -> Dict:
+    """Measure one handler style on a fresh server, so a stalled phase can't skew the next"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(build_app(), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        base_url = f"http://127.0.0.1:{port}{prefix}"
+        # Warm up connection pools and caches before measuring
+        asyncio.run(drive(base_url, paths, len(paths) * 2, 1))
+        return asyncio.run(drive(base_url, paths, total, concurrency))
+    finally:
+        server.should_exit = True
+        # A stalled sync handler can hold the loop; don't wait on it forever
+        thread.join(timeout=REQUEST_TIMEOUT_SECONDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--year", type=int, default=date.today().year)
+    args = parser.parse_args()
+
+    paths = request_mix(args.year)
+    for label, prefix in (("before (sync Session)", "/sync"), ("after (AsyncSession)", "/async")):
+        result = run_phase(prefix, paths, args.requests, args.concurrency)
+        print(f"{label:24} {result}")
+
+
+if __name__ == "__main__":
+    main()
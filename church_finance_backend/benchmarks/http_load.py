@@ -0,0 +1,388 @@
+"""HTTP load test of the full application, authentication included.
+
+Boots app.main:app under uvicorn against the configured database and drives
+weighted request mixes from concurrent httpx clients: dashboard polling,
+transaction listing, statement generation and exports, and bulk uploads.
+Latency percentiles (p50/p95/p99) and throughput are reported per endpoint
+and per authentication path.
+
+Requests carry either a local JWT minted with jwt_handler.create_access_token
+or a Microsoft Entra token signed by a throwaway RSA key whose JWKS is served
+from a local stub (MS_ENTRA_JWKS_URL), so both paths through auth_middleware
+run. By default each client reuses its token, as a browser session would, so
+the verified-token cache is exercised; --fresh-token-share sends a share of
+requests with never-seen tokens to measure full verification.
+
+Run from church_finance_backend against a generated database (the upload mix
+writes to it, so use a scratch copy):
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.suite --generate 200000
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.http_load --mix mixed --requests 2000 --concurrency 20
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.http_load --mix dashboard --entra-share 1 --fresh-token-share 0.2
+
+Requires httpx (see benchmarks/requirements.txt).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from dotenv import load_dotenv
+from jose import jwk, jwt
+
+REQUEST_TIMEOUT_SECONDS = 60
+UPLOAD_ROWS = 200
+ENTRA_TOKEN_LIFETIME_MINUTES = 60
+
+
+class JWKSStub:
+    """A local stand-in for the Entra keys endpoint, and the key that signs its tokens"""
+
+    def __init__(self):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.kid = uuid.uuid4().hex
+        self._private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+        public_jwk.update({"kid": self.kid, "use": "sig", "alg": "RS256"})
+        body = json.dumps({"keys": [public_jwk]}).encode("utf-8")
+        self.requests = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/discovery/v2.0/keys"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def sign(self, claims: Dict) -> str:
+        return jwt.encode(claims, self._private_pem, algorithm="RS256", headers={"kid": self.kid})
+
+    def stop(self) -> None:
+        self._server.shutdown()
+
+
+class TokenFactory:
+    """Bearer tokens for one user on either authentication path"""
+
+    def __init__(self, stub: JWKSStub, user_id: int, email: str, role: str):
+        self.stub = stub
+        self.user_id = user_id
+        self.email = email
+        self.role = role
+        self._session_tokens: Dict[str, str] = {}
+
+    def token(self, auth_path: str, fresh: bool) -> str:
+        """A reused session token, or with fresh a never-seen one that must be fully verified"""
+        if fresh:
+            return self._mint(auth_path)
+        if auth_path not in self._session_tokens:
+            self._session_tokens[auth_path] = self._mint(auth_path)
+        return self._session_tokens[auth_path]
+
+    def _mint(self, auth_path: str) -> str:
+        # jti keeps every minted token distinct, so the verified-token cache can't serve it
+        if auth_path == "local":
+            from app.auth.jwt_handler import create_access_token
+            return create_access_token({"id": str(self.user_id), "role": self.role, "jti": uuid.uuid4().hex})
+
+        from app.auth.ms_entra_jwt import MS_ENTRA_CLIENT_ID, MS_ENTRA_TENANT_ID
+        now = datetime.utcnow()
+        return self.stub.sign({
+            "iss": f"https://login.microsoftonline.com/{MS_ENTRA_TENANT_ID}/v2.0",
+            "aud": MS_ENTRA_CLIENT_ID,
+            "preferred_username": self.email,
+            "iat": int(now.timestamp()),
+            "nbf": int(now.timestamp()),
+            "exp": int((now + timedelta(minutes=ENTRA_TOKEN_LIFETIME_MINUTES)).timestamp()),
+            "jti": uuid.uuid4().hex
+        })
+
+
+@dataclass
+class Scenario:
+    """Dates and ids the request mixes are built from"""
+    start_date: str
+    end_date: str
+    year: int
+    province_ids: List[int]
+    upload_csv: bytes
+
+
+# (weight, endpoint label, request builder returning method, path and httpx keyword arguments)
+Request = Tuple[str, str, Dict]
+MixEntry = Tuple[int, str, Callable[[Scenario, random.Random], Request]]
+
+
+def _get(path: str) -> Request:
+    return "GET", path, {}
+
+
+MIXES: Dict[str, List[MixEntry]] = {
+    "dashboard": [
+        (6, "GET /analytics/dashboard", lambda s, rng: _get("/api/v1/analytics/dashboard")),
+        (2, "GET /analytics/dashboard/{year}", lambda s, rng: _get(f"/api/v1/analytics/dashboard/{s.year}")),
+        (2, "GET /analytics/timeseries", lambda s, rng: _get(
+            f"/api/v1/analytics/timeseries?start_date={s.start_date}&end_date={s.end_date}&interval=month")),
+        (1, "GET /provinces/performance-ranking", lambda s, rng: _get("/api/v1/provinces/performance-ranking")),
+    ],
+    "listing": [
+        (4, "GET /transactions (cursor)", lambda s, rng: _get("/api/v1/transactions/?pagination=cursor&limit=50")),
+        (2, "GET /transactions (province)", lambda s, rng: _get(
+            f"/api/v1/transactions/?pagination=cursor&limit=50&province_id={rng.choice(s.province_ids)}"
+            f"&start_date={s.start_date}&end_date={s.end_date}")),
+        (1, "GET /transactions (offset)", lambda s, rng: _get(f"/api/v1/transactions/?skip={rng.randrange(0, 5000, 50)}&limit=50")),
+        (2, "GET /transactions/summary", lambda s, rng: _get(
+            f"/api/v1/transactions/summary?start_date={s.start_date}&end_date={s.end_date}")),
+        (1, "GET /transactions/categories", lambda s, rng: _get(
+            f"/api/v1/transactions/categories?start_date={s.start_date}&end_date={s.end_date}")),
+    ],
+    "statements": [
+        (3, "GET /income-expenditure", lambda s, rng: _get(
+            f"/api/v1/income-expenditure?start_date={s.start_date}&end_date={s.end_date}")),
+        (2, "GET /cash-flow", lambda s, rng: _get(f"/api/v1/cash-flow?start_date={s.start_date}&end_date={s.end_date}")),
+        (2, "GET /statements/bundle", lambda s, rng: _get(
+            f"/api/v1/statements/bundle?start_date={s.start_date}&end_date={s.end_date}")),
+        (2, "GET /province/{id}", lambda s, rng: _get(
+            f"/api/v1/province/{rng.choice(s.province_ids)}?start_date={s.start_date}&end_date={s.end_date}")),
+        (1, "GET /export (province csv)", lambda s, rng: _get(
+            f"/api/v1/export?statement_type=province&province_id={rng.choice(s.province_ids)}"
+            f"&start_date={s.start_date}&end_date={s.end_date}&format=csv")),
+    ],
+    "upload": [
+        (1, "POST /bulk-upload/transactions", lambda s, rng: (
+            "POST", "/api/v1/bulk-upload/transactions",
+            {"files": {"file": ("upload.csv", s.upload_csv, "text/csv")}})),
+    ],
+}
+# A working day: mostly polling and browsing, some reporting, the odd upload
+MIXES["mixed"] = (
+    [(weight * 8, label, build) for weight, label, build in MIXES["dashboard"]]
+    + [(weight * 6, label, build) for weight, label, build in MIXES["listing"]]
+    + [(weight * 3, label, build) for weight, label, build in MIXES["statements"]]
+    + [(weight * 2, label, build) for weight, label, build in MIXES["upload"]]
+)
+
+
+@dataclass
+class Recorder:
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+    def add(self, labels: Tuple[str, ...], elapsed: float, status_code: Optional[int]) -> None:
+        failed = status_code is None or status_code >= 400
+        for label in labels:
+            self.latencies.setdefault(label, []).append(elapsed)
+            if failed:
+                self.errors[label] = self.errors.get(label, 0) + 1
+        self.statuses[status_code or 0] = self.statuses.get(status_code or 0, 0) + 1
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarise(recorder: Recorder, elapsed: float) -> Dict[str, Dict]:
+    report = {}
+    for label, samples in sorted(recorder.latencies.items()):
+        ordered = sorted(samples)
+        report[label] = {
+            "requests": len(ordered),
+            "errors": recorder.errors.get(label, 0),
+            "throughput_rps": round(len(ordered) / elapsed, 1),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+    return report
+
+
+async def drive(
+    base_url: str,
+    mix: List[MixEntry],
+    scenario: Scenario,
+    tokens: TokenFactory,
+    total: int,
+    concurrency: int,
+    entra_share: float,
+    fresh_share: float,
+    seed: int
+) -> Tuple[Recorder, float]:
+    recorder = Recorder()
+    counter = iter(range(total))
+    weights = [weight for weight, _, _ in mix]
+
+    async def client_loop(client: httpx.AsyncClient, rng: random.Random):
+        for _ in counter:
+            _, label, build = rng.choices(mix, weights=weights)[0]
+            method, path, kwargs = build(scenario, rng)
+            auth_path = "entra" if rng.random() < entra_share else "local"
+            fresh = rng.random() < fresh_share
+            headers = {"Authorization": f"Bearer {tokens.token(auth_path, fresh)}"}
+
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, base_url + path, headers=headers, **kwargs)
+                status_code = response.status_code
+            except httpx.HTTPError:
+                status_code = None
+            elapsed = time.perf_counter() - started
+            recorder.add((label, f"auth: {auth_path} ({'fresh' if fresh else 'cached'} token)", "all"), elapsed, status_code)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=REQUEST_TIMEOUT_SECONDS) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, random.Random(seed + index)) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return recorder, elapsed
+
+
+def prepare_scenario(year: Optional[int]) -> Tuple[Scenario, Tuple[int, str, str]]:
+    """Read the dates and ids to request from the database, and make sure the benchmark user exists"""
+    import tempfile
+    from sqlalchemy import func
+    from app.database import session_scope
+    from app.models.transaction import Transaction
+    from app.models.user import User, UserRole
+    from app.utils.helpers import get_financial_year, get_financial_year_dates
+    from benchmarks import synthetic
+
+    with session_scope() as db:
+        if year is None:
+            latest = db.query(func.max(Transaction.date)).scalar()
+            if latest is None:
+                raise SystemExit("the database has no transactions; generate one with benchmarks.suite --generate N")
+            year = get_financial_year(latest)
+        dates = get_financial_year_dates(year)
+        reference = synthetic.reference_ids(db)
+        if not reference["province_ids"]:
+            raise SystemExit("the database has no provinces; generate one with benchmarks.suite --generate N")
+
+        user = db.query(User).filter(User.email == synthetic.BENCHMARK_USER_EMAIL).first()
+        if user is None:
+            user = User(name="Benchmark", email=synthetic.BENCHMARK_USER_EMAIL, role=UserRole.ADMIN.value, auth_provider="local")
+            db.add(user)
+            db.commit()
+
+        with tempfile.NamedTemporaryFile(suffix=".csv") as upload:
+            synthetic.write_upload_csv(upload.name, UPLOAD_ROWS, reference, start=dates["start_date"])
+            upload_csv = upload.read()
+
+        scenario = Scenario(
+            start_date=dates["start_date"].isoformat(),
+            end_date=dates["end_date"].isoformat(),
+            year=year,
+            province_ids=reference["province_ids"],
+            upload_csv=upload_csv
+        )
+        return scenario, (user.id, user.email, user.role)
+
+
+def boot_server():
+    """Start app.main:app on a free port in a background thread"""
+    from app.main import app
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit("the application failed to start")
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=50, help="requests sent before measuring")
+    parser.add_argument("--entra-share", type=float, default=0.5, help="share of requests with Entra tokens")
+    parser.add_argument("--fresh-token-share", type=float, default=0.0, help="share of requests with never-seen tokens")
+    parser.add_argument("--year", type=int, help="financial year to report on (default: the latest with data)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    # Entra tokens are checked against the local stub; this must be set before
+    # app.auth.ms_entra_jwt is imported, as it reads its settings at import time
+    load_dotenv()
+    stub = JWKSStub()
+    os.environ["MS_ENTRA_JWKS_URL"] = stub.url
+    os.environ.setdefault("MS_ENTRA_TENANT_ID", "benchmark-tenant")
+    os.environ.setdefault("MS_ENTRA_CLIENT_ID", "benchmark-client")
+
+    scenario, (user_id, email, role) = prepare_scenario(args.year)
+    tokens = TokenFactory(stub, user_id, email, role)
+    mix = MIXES[args.mix]
+    server, thread, base_url = boot_server()
+    try:
+        asyncio.run(drive(base_url, mix, scenario, tokens, args.warmup, min(args.concurrency, 4),
+                          args.entra_share, args.fresh_token_share, args.seed + 1000))
+        recorder, elapsed = asyncio.run(drive(base_url, mix, scenario, tokens, args.requests, args.concurrency,
+                                              args.entra_share, args.fresh_token_share, args.seed))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=REQUEST_TIMEOUT_SECONDS)
+        stub.stop()
+
+    report = summarise(recorder, elapsed)
+    print(f"mix {args.mix}: {args.requests} requests, concurrency {args.concurrency}, "
+          f"{elapsed:.1f} s, financial year {scenario.year}, status codes {dict(sorted(recorder.statuses.items()))}")
+    print(f"{'endpoint':44} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for label, row in report.items():
+        print(f"{label:44} {row['requests']:>8} {row['errors']:>6} {row['throughput_rps']:>8} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}")
+    print(f"JWKS fetches: {stub.requests}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fileobj:
+            json.dump({
+                "meta": {
+                    "mix": args.mix, "requests": args.requests, "concurrency": args.concurrency,
+                    "entra_share": args.entra_share, "fresh_token_share": args.fresh_token_share,
+                    "financial_year": scenario.year, "elapsed_s": round(elapsed, 2),
+                    "status_codes": recorder.statuses
+                },
+                "endpoints": report
+            }, fileobj, indent=2)
+
+
+if __name__ == "__main__":
+    main()
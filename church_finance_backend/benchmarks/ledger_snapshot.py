@@ -0,0 +1,132 @@
+"""Analytics query latency: SQL aggregates vs. the columnar ledger snapshot.
+
+Runs the transaction summary, expense category breakdown and monthly time
+series both ways against the configured database, checks that the answers
+agree, and reports the median of several runs. Also times the snapshot's
+full load and an incremental refresh after a small batch of new rows.
+
+Run from church_finance_backend against a seeded database, or let the
+benchmark seed synthetic transactions first:
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.ledger_snapshot --seed 200000
+"""
+import argparse
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func
+
+from app.database import Base, engine, session_scope
+from app.models import department, ledger_version, project, province, user  # noqa: F401  registers tables for create_all
+from app.models.province import Province
+from app.models.transaction import Transaction
+from app.services.ledger_snapshot import LedgerAnalytics
+from app.services.response_cache import bump_ledger_version
+from app.services.transaction_service import TransactionService
+from benchmarks import synthetic
+
+def seed(rows: int, start: date, end: date, changed_before: Optional[datetime] = None) -> None:
+    """Add synthetic transactions to the generated ledger, creating it first if the database is empty"""
+    with session_scope() as db:
+        if not db.query(Province.id).first():
+            synthetic.generate(db, 0, start=start, years=1)
+        synthetic.append_transactions(db, rows, start, end, synthetic.reference_ids(db), changed_before=changed_before)
+        bump_ledger_version(db)
+        db.commit()
+
+
+def sql_time_series(db, start: date, end: date) -> List[Dict]:
+    """The equivalent per-month aggregate in SQL, grouping per day and folding months in Python"""
+    rows = db.query(
+        Transaction.date,
+        Transaction.type,
+        func.sum(Transaction.amount)
+    ).filter(
+        Transaction.date >= start,
+        Transaction.date <= end,
+        Transaction.type.in_(["receipt", "expense"])
+    ).group_by(Transaction.date, Transaction.type).all()
+
+    months: Dict[str, Dict[str, Decimal]] = {}
+    for day, transaction_type, amount in rows:
+        month = months.setdefault(f"{day.year:04d}-{day.month:02d}", {"receipt": Decimal("0"), "expense": Decimal("0")})
+        month[transaction_type] += Decimal(amount)
+    return [
+        {"period": period, "receipts": float(totals["receipt"]), "expenses": float(totals["expense"])}
+        for period, totals in sorted(months.items())
+    ]
+
+
+def timed(function: Callable, repeat: int) -> Dict:
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(samples) * 1000, 2), "result": result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic transactions first")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--year", type=int, default=date.today().year)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    start, end = date(args.year, 1, 1), date(args.year, 12, 31)
+    if args.seed:
+        # Historical rows, so the incremental refresh below only re-reads the new batch
+        seed(args.seed, start, end, changed_before=datetime.utcnow() - timedelta(days=1))
+
+    analytics = LedgerAnalytics()
+    with session_scope() as db:
+        rows = db.query(func.count(Transaction.id)).scalar()
+        print(f"transactions: {rows}")
+
+        load = timed(lambda: LedgerAnalytics().snapshot(db), 1)
+        print(f"{'snapshot full load':28} {load['median_ms']:>10} ms")
+        analytics.snapshot(db)
+
+        service = TransactionService(db)
+        cases = [
+            ("summary (province 1)",
+             lambda: service.get_transaction_summary(province_id=1, start_date=start, end_date=end),
+             lambda: analytics.summary(db, province_id=1, start_date=start, end_date=end)),
+            ("expense categories",
+             lambda: service.get_category_breakdown(start, end),
+             lambda: analytics.category_breakdown(db, start, end)),
+            ("monthly time series",
+             lambda: sql_time_series(db, start, end),
+             lambda: analytics.time_series(db, start, end, "month")),
+        ]
+        for label, sql_query, snapshot_query in cases:
+            sql = timed(sql_query, args.repeat)
+            snapshot = timed(snapshot_query, args.repeat)
+            agree = _agree(label, sql["result"], snapshot["result"])
+            speedup = sql["median_ms"] / snapshot["median_ms"] if snapshot["median_ms"] else float("inf")
+            print(f"{label:28} sql {sql['median_ms']:>9} ms  snapshot {snapshot['median_ms']:>8} ms  x{speedup:,.1f}  agree={agree}")
+
+    seed(100, start, end)
+    with session_scope() as db:
+        refresh = timed(lambda: analytics.snapshot(db), 1)
+        print(f"{'incremental refresh (+100)':28} {refresh['median_ms']:>10} ms  {analytics.stats()}")
+
+
+def _agree(label: str, sql_result, snapshot_result) -> bool:
+    if label.startswith("summary"):
+        keys = ("total_count", "total_receipts", "total_expenses")
+        return all(Decimal(str(sql_result[key])) == Decimal(str(snapshot_result[key])) for key in keys)
+    if label.startswith("expense"):
+        by_category = lambda rows: {row["category"]: (round(row["total_amount"], 2), row["count"]) for row in rows}
+        return by_category(sql_result) == by_category(snapshot_result)
+    by_period = lambda rows: {row["period"]: (round(row["receipts"], 2), round(row["expenses"], 2)) for row in rows}
+    return by_period(sql_result) == by_period(snapshot_result)
+
+
+if __name__ == "__main__":
+    main()
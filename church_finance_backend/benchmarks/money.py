@@ -0,0 +1,80 @@
+"""Money aggregation: Decimal/float arithmetic vs. integer cents.
+
+Times summing and serialising amounts the old way (Decimal sums, float()
+conversions) against int cents, and checks exactness of each approach,
+including SQL SUM over a NUMERIC column on SQLite (stored as floating point)
+against the integer-cents SUM used by the services.
+
+Run from church_finance_backend:
+
+    python -m benchmarks.money --values 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+from decimal import Decimal
+from typing import Callable, Dict
+
+from sqlalchemy import Column, Integer, MetaData, Numeric, Table, create_engine, func, insert, select
+
+from app.utils.money import cents_to_float, from_cents, sql_sum_cents, to_cents
+
+
+def timed(function: Callable, repeat: int) -> Dict:
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(samples) * 1000, 2), "result": result}
+
+
+def report(label: str, before: Dict, after: Dict, exact: bool) -> None:
+    speedup = before["median_ms"] / after["median_ms"] if after["median_ms"] else float("inf")
+    print(f"{label:30} before {before['median_ms']:>9} ms  after {after['median_ms']:>9} ms  x{speedup:,.1f}  exact={exact}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--values", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    decimals = [Decimal(rng.randrange(1, 1000000)) / 100 for _ in range(args.values)]
+    cents = [to_cents(amount) for amount in decimals]
+    expected = sum(decimals)
+
+    # Summing amounts in the service layer
+    before = timed(lambda: sum(decimals), args.repeat)
+    after = timed(lambda: sum(cents), args.repeat)
+    report("sum", before, after, from_cents(after["result"]) == expected)
+
+    # The float() totals the statements used to build, vs. converting once at the end
+    before = timed(lambda: sum(float(amount) for amount in decimals), args.repeat)
+    after = timed(lambda: cents_to_float(sum(cents)), args.repeat)
+    report("sum for JSON (float)", before, after, Decimal(str(after["result"])) == expected)
+    print(f"{'':30} float sum drift: {Decimal(repr(before['result'])) - expected}")
+
+    # Serialising each row amount
+    before = timed(lambda: [float(amount) for amount in decimals], args.repeat)
+    after = timed(lambda: [cents_to_float(value) for value in cents], args.repeat)
+    report("per-row serialisation", before, after, before["result"] == after["result"])
+
+    # Summing in SQL over a NUMERIC column
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    ledger = Table("ledger", metadata, Column("id", Integer, primary_key=True), Column("amount", Numeric(15, 2)))
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(ledger), [{"amount": amount} for amount in decimals])
+        before = timed(lambda: connection.execute(select(func.sum(ledger.c.amount))).scalar(), args.repeat)
+        after = timed(lambda: connection.execute(select(sql_sum_cents(ledger.c.amount))).scalar(), args.repeat)
+    report("SQL SUM (SQLite)", before, after, from_cents(after["result"]) == expected)
+    print(f"{'':30} NUMERIC sum: {before['result']}  cents sum: {from_cents(after['result'])}  expected: {expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""Regression benchmark suite for the ledger's read, report and import paths.
+
+Each case below is timed against the configured database (SQLite or
+PostgreSQL, from DATABASE_URL) after a warm-up round. Results are written as
+JSON to benchmarks/results/ and can be compared with an earlier run, in which
+case the exit status is non-zero when any case's median got slower than the
+threshold allows.
+
+Run from church_finance_backend. The first run against an empty database
+generates the synthetic ledger (see benchmarks/synthetic.py):
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.suite --generate 1000000
+    DATABASE_URL=postgresql://localhost/church_bench python -m benchmarks.suite --generate 1000000
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.suite --compare benchmarks/results/<baseline>.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from fnmatch import fnmatch
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+
+from app.database import Base, engine, session_scope
+from app.models import (  # noqa: F401  registers tables for create_all
+    audit, budget, category_rule, deleted_transaction, department, financial_year, import_job, job,
+    ledger_version, obligation, project, province, province_performance, transaction_attachment,
+    transaction_rollup, user
+)
+from app.models.deleted_transaction import DeletedTransaction
+from app.models.transaction import Transaction
+from app.services.bulk_upload_service import BulkUploadService
+from app.services.financial_statements_service import FinancialStatementsService
+from app.services.ledger_snapshot import LedgerAnalytics
+from app.services.response_cache import bump_ledger_version
+from app.services.rollup_service import RollupKey, RollupService
+from app.services.transaction_service import TransactionService
+from app.utils.helpers import get_financial_year, get_financial_year_dates
+from benchmarks import synthetic
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_THRESHOLD = 1.25
+PAGE_SIZE = 100
+
+Case = Tuple[str, Callable[[Dict], object], Optional[Callable[[Dict], None]]]
+CASES: List[Case] = []
+
+
+def case(name: str, teardown: Optional[Callable[[Dict], None]] = None):
+    """Register a benchmark; teardown runs after every round, outside the timing"""
+    def register(function: Callable[[Dict], object]) -> Callable[[Dict], object]:
+        CASES.append((name, function, teardown))
+        return function
+    return register
+
+
+# Listing
+
+@case("listing.first_page")
+def listing_first_page(ctx: Dict):
+    return TransactionService(ctx["db"]).get_transactions_page(limit=PAGE_SIZE)
+
+
+@case("listing.cursor_walk_10_pages")
+def listing_cursor_walk(ctx: Dict):
+    service = TransactionService(ctx["db"])
+    cursor = None
+    for _ in range(10):
+        rows, cursor = service.get_transactions_page(cursor=cursor, limit=PAGE_SIZE)
+        if cursor is None:
+            break
+    return rows
+
+
+@case("listing.offset_page_100")
+def listing_offset_page(ctx: Dict):
+    return TransactionService(ctx["db"]).get_transactions(skip=100 * PAGE_SIZE, limit=PAGE_SIZE)
+
+
+@case("listing.filtered_province_year")
+def listing_filtered(ctx: Dict):
+    return TransactionService(ctx["db"]).get_transactions_page(
+        limit=PAGE_SIZE, province_id=ctx["province_id"], start_date=ctx["start"], end_date=ctx["end"]
+    )
+
+
+# Summary and category breakdown
+
+@case("summary.sql")
+def summary_sql(ctx: Dict):
+    return TransactionService(ctx["db"]).get_transaction_summary(start_date=ctx["start"], end_date=ctx["end"])
+
+
+@case("summary.sql_province")
+def summary_sql_province(ctx: Dict):
+    return TransactionService(ctx["db"]).get_transaction_summary(
+        province_id=ctx["province_id"], start_date=ctx["start"], end_date=ctx["end"]
+    )
+
+
+@case("summary.snapshot")
+def summary_snapshot(ctx: Dict):
+    return ctx["analytics"].summary(ctx["db"], start_date=ctx["start"], end_date=ctx["end"])
+
+
+@case("categories.sql")
+def categories_sql(ctx: Dict):
+    return TransactionService(ctx["db"]).get_category_breakdown(ctx["start"], ctx["end"])
+
+
+@case("categories.snapshot")
+def categories_snapshot(ctx: Dict):
+    return ctx["analytics"].category_breakdown(ctx["db"], ctx["start"], ctx["end"])
+
+
+# Statements
+
+@case("statements.income_expenditure")
+def statement_income_expenditure(ctx: Dict):
+    return FinancialStatementsService(ctx["db"]).generate_income_expenditure_statement(ctx["start"], ctx["end"])
+
+
+@case("statements.cash_flow")
+def statement_cash_flow(ctx: Dict):
+    return FinancialStatementsService(ctx["db"]).generate_cash_flow_statement(ctx["start"], ctx["end"])
+
+
+@case("statements.financial_position")
+def statement_financial_position(ctx: Dict):
+    return FinancialStatementsService(ctx["db"]).generate_statement_of_financial_position(ctx["end"])
+
+
+@case("statements.bundle")
+def statement_bundle(ctx: Dict):
+    return FinancialStatementsService(ctx["db"]).generate_statement_bundle(ctx["start"], ctx["end"])
+
+
+@case("statements.province")
+def statement_province(ctx: Dict):
+    return FinancialStatementsService(ctx["db"]).generate_province_statement(ctx["province_id"], ctx["start"], ctx["end"])
+
+
+# Exports
+
+def _export(ctx: Dict, statement_type: str, export_format: str) -> int:
+    path = os.path.join(ctx["workdir"], f"{statement_type}.{export_format}")
+    FinancialStatementsService(ctx["db"]).export_statement_to_file(
+        statement_type, ctx["start"], ctx["end"], ctx["province_id"], export_format, path
+    )
+    return os.path.getsize(path)
+
+
+@case("export.income_expenditure_csv")
+def export_income_expenditure_csv(ctx: Dict):
+    return _export(ctx, "income_expenditure", "csv")
+
+
+@case("export.province_csv")
+def export_province_csv(ctx: Dict):
+    return _export(ctx, "province", "csv")
+
+
+@case("export.province_excel")
+def export_province_excel(ctx: Dict):
+    return _export(ctx, "province", "excel")
+
+
+# Bulk upload (last: it writes, and each round's rows are removed again)
+
+def _remove_imported(ctx: Dict) -> None:
+    """Delete the rows a bulk upload round added and take them back out of the rollups"""
+    db = ctx["db"]
+    imported = db.query(Transaction).filter(Transaction.created_by == ctx["importer_id"])
+    deltas: Dict[RollupKey, Tuple[Decimal, int]] = {}
+    for transaction in imported:
+        key = RollupService.key_for(transaction)
+        amount, count = deltas.get(key, (Decimal("0"), 0))
+        deltas[key] = (amount - Decimal(transaction.amount), count - 1)
+    RollupService(db).apply_deltas(deltas)
+    # Tombstones, so the analytics snapshot drops the rows on its next refresh
+    db.execute(insert(DeletedTransaction.__table__).from_select(
+        ["transaction_id"], select(Transaction.id).where(Transaction.created_by == ctx["importer_id"])
+    ))
+    imported.delete(synchronize_session=False)
+    bump_ledger_version(db)
+    db.commit()
+    db.expire_all()
+
+
+@case("bulk_upload.csv", teardown=_remove_imported)
+def bulk_upload_csv(ctx: Dict):
+    with open(ctx["upload_path"], "rb") as fileobj:
+        result = BulkUploadService(ctx["db"]).process_streaming_upload(fileobj, "upload.csv", created_by=ctx["importer_id"])
+    if not result.get("success"):
+        raise RuntimeError(f"bulk upload failed: {result.get('error') or result.get('errors')}")
+    return result
+
+
+def run_case(ctx: Dict, function: Callable, teardown: Optional[Callable], repeat: int, warmup: int) -> Dict:
+    samples = []
+    for round_number in range(warmup + repeat):
+        started = time.perf_counter()
+        function(ctx)
+        elapsed = time.perf_counter() - started
+        if round_number >= warmup:
+            samples.append(elapsed)
+        if teardown:
+            teardown(ctx)
+    samples_ms = sorted(sample * 1000 for sample in samples)
+    return {
+        "rounds": len(samples_ms),
+        "min_ms": round(samples_ms[0], 3),
+        "median_ms": round(statistics.median(samples_ms), 3),
+        "mean_ms": round(statistics.fmean(samples_ms), 3),
+        "p95_ms": round(samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))], 3),
+        "max_ms": round(samples_ms[-1], 3)
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline_path: str, threshold: float) -> List[str]:
+    """Print each case's median against the baseline and return the names that regressed"""
+    with open(baseline_path, encoding="utf-8") as fileobj:
+        baseline = json.load(fileobj)
+
+    regressions = []
+    print(f"\ncompared with {baseline_path} ({baseline['meta'].get('git_commit')}, {baseline['meta'].get('dialect')})")
+    for name, result in results["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:36} {'new':>12}")
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        flag = "REGRESSION" if ratio > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:36} {before['median_ms']:>10.2f} -> {result['median_ms']:>10.2f} ms  x{ratio:.2f}  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generate", type=int, default=0, help="transactions to generate when the database is empty")
+    parser.add_argument("--seed", type=int, default=synthetic.DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--upload-rows", type=int, default=10000, help="rows in the bulk upload file")
+    parser.add_argument("--filter", default="*", help="glob on case names, e.g. 'statements.*'")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="median ratio counted as a regression")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    selected = [entry for entry in CASES if fnmatch(entry[0], args.filter)]
+    if args.list:
+        print("\n".join(name for name, _, _ in selected))
+        return
+
+    Base.metadata.create_all(bind=engine)
+    with session_scope() as db:
+        if args.generate and not db.query(Transaction.id).first():
+            started = time.perf_counter()
+            generated = synthetic.generate(db, args.generate, seed=args.seed)
+            print(f"generated {generated} in {time.perf_counter() - started:.1f} s")
+        rows = synthetic.counts(db)
+        if not rows["transactions"]:
+            sys.exit("the database has no transactions; run with --generate N")
+
+        # The latest financial year that has data, and its busiest province
+        latest = db.query(func.max(Transaction.date)).scalar()
+        year = get_financial_year(latest)
+        dates = get_financial_year_dates(year)
+        province_id = db.query(Transaction.province_id).filter(
+            Transaction.province_id.isnot(None)
+        ).group_by(Transaction.province_id).order_by(func.count(Transaction.id).desc()).limit(1).scalar()
+
+        workdir = tempfile.mkdtemp(prefix="church-finance-bench-")
+        upload_path = os.path.join(workdir, "upload.csv")
+        synthetic.write_upload_csv(upload_path, args.upload_rows, synthetic.reference_ids(db), seed=args.seed, start=dates["start_date"])
+
+        ctx = {
+            "db": db,
+            "analytics": LedgerAnalytics(),
+            "start": dates["start_date"],
+            "end": dates["end_date"],
+            "province_id": province_id,
+            "importer_id": synthetic.benchmark_user_id(db),
+            "upload_path": upload_path,
+            "workdir": workdir
+        }
+        results = {
+            "meta": {
+                "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+                "git_commit": git_commit(),
+                "dialect": engine.dialect.name,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "financial_year": year,
+                "repeat": args.repeat,
+                "warmup": args.warmup,
+                "upload_rows": args.upload_rows,
+                "rows": rows
+            },
+            "results": {}
+        }
+
+        print(f"{engine.dialect.name}: {rows['transactions']} transactions, financial year {year}, province {province_id}")
+        for name, function, teardown in selected:
+            result = run_case(ctx, function, teardown, args.repeat, args.warmup)
+            results["results"][name] = result
+            print(f"{name:36} median {result['median_ms']:>10.2f} ms  min {result['min_ms']:>10.2f}  p95 {result['p95_ms']:>10.2f}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    output_path = os.path.join(args.output_dir, f"{engine.dialect.name}-{stamp}-{results['meta']['git_commit'] or 'nogit'}.json")
+    with open(output_path, "w", encoding="utf-8") as fileobj:
+        json.dump(results, fileobj, indent=2)
+    print(f"\nresults written to {output_path}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(f"{len(regressions)} case(s) slower than x{args.threshold}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
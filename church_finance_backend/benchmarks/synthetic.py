@@ -0,0 +1,282 @@
+"""Deterministic synthetic ledger for benchmarks.
+
+The same seed always produces the same provinces, departments, projects,
+financial years, budgets and transactions, so results from different runs
+and databases are comparable. Transactions follow the skew of a real church
+ledger: receipts cluster on Sundays and in December, expenses at month end,
+a few provinces and categories dominate, and amounts are log-normal.
+
+    from benchmarks.synthetic import generate
+    with session_scope() as db:
+        generate(db, transactions=1_000_000)
+"""
+import csv
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.models.budget import Budget
+from app.models.department import Department
+from app.models.financial_year import FinancialYear
+from app.models.project import Project
+from app.models.province import Province
+from app.models.transaction import Transaction
+from app.models.user import User, UserRole
+from app.services.budget_reconciliation_service import BudgetReconciliationService
+from app.services.response_cache import bump_ledger_version
+from app.services.rollup_service import RollupService
+from app.utils.helpers import get_financial_year_dates
+
+DEFAULT_SEED = 42
+DEFAULT_START = date(2022, 4, 1)
+DEFAULT_YEARS = 3
+INSERT_BATCH_SIZE = 20000
+
+TYPES = np.array(["receipt", "expense", "transfer"])
+TYPE_WEIGHTS = [0.55, 0.40, 0.05]
+
+RECEIPT_CATEGORIES = np.array(["Tithe", "Offering", "Donation", "Pledge", "Fundraising", "Grant"])
+EXPENSE_CATEGORIES = np.array([
+    "Utilities", "Maintenance", "Travel", "Food", "Office Supplies",
+    "Rent", "Training", "Equipment", "Insurance", "Marketing", "Other"
+])
+EXPENSE_DESCRIPTIONS = {
+    "Utilities": "electricity bill", "Maintenance": "roof repair", "Travel": "fuel for outreach",
+    "Food": "lunch for volunteers", "Office Supplies": "printer paper", "Rent": "hall lease",
+    "Training": "leadership workshop", "Equipment": "laptop", "Insurance": "building insurance premium",
+    "Marketing": "event advertising", "Other": "sundry"
+}
+
+BENCHMARK_USER_EMAIL = "benchmark@example.org"
+
+
+def zipf_weights(count: int, exponent: float = 1.1) -> np.ndarray:
+    """Probabilities for count items where the k-th most common has weight 1/k^exponent"""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate(
+    db: Session,
+    transactions: int,
+    seed: int = DEFAULT_SEED,
+    start: date = DEFAULT_START,
+    years: int = DEFAULT_YEARS,
+    provinces: int = 12,
+    departments: int = 15,
+    projects: int = 40
+) -> Dict[str, int]:
+    """Populate an empty database and bring rollups, budgets and the ledger version up to date"""
+    rng = np.random.default_rng(seed)
+    reference = create_reference_data(db, rng, start, years, provinces, departments, projects)
+    end = get_financial_year_dates(start.year + years - 1)["end_date"]
+    append_transactions(db, transactions, start, end, reference, seed=seed, refresh=False)
+
+    RollupService(db).rebuild()
+    BudgetReconciliationService(db).reconcile_all()
+    bump_ledger_version(db)
+    db.commit()
+    return counts(db)
+
+
+def create_reference_data(
+    db: Session,
+    rng: np.random.Generator,
+    start: date,
+    years: int,
+    provinces: int,
+    departments: int,
+    projects: int
+) -> Dict[str, List[int]]:
+    """Provinces, departments, projects, financial years, budgets and the benchmark user"""
+    allocations = zipf_weights(provinces, 0.8) * 100
+    db.add_all([
+        Province(name=f"Province {index + 1:02d}", region=f"Region {index % 4 + 1}", allocation_percent=round(float(allocation), 2))
+        for index, allocation in enumerate(allocations)
+    ])
+    db.add_all([Department(name=f"Department {index + 1:02d}") for index in range(departments)])
+    db.add(User(name="Benchmark", email=BENCHMARK_USER_EMAIL, role=UserRole.ADMIN.value, auth_provider="local"))
+    db.flush()
+
+    province_ids = [row[0] for row in db.query(Province.id).order_by(Province.id)]
+    department_ids = [row[0] for row in db.query(Department.id).order_by(Department.id)]
+
+    db.add_all([
+        Project(name=f"Project {index + 1:03d}", type="outreach", province_id=int(rng.choice(province_ids)), status="active")
+        for index in range(projects)
+    ])
+    for offset in range(years):
+        dates = get_financial_year_dates(start.year + offset)
+        db.add(FinancialYear(start_date=dates["start_date"], end_date=dates["end_date"], year=start.year + offset, is_active=True))
+        db.add_all([
+            Budget(year=start.year + offset, department_id=department_id, allocated_amount=Decimal(int(rng.integers(20, 400)) * 1000))
+            for department_id in department_ids
+        ])
+    db.flush()
+
+    return {
+        "province_ids": province_ids,
+        "department_ids": department_ids,
+        "project_ids": [row[0] for row in db.query(Project.id).order_by(Project.id)]
+    }
+
+
+def reference_ids(db: Session) -> Dict[str, List[int]]:
+    """Ids of existing reference data, for appending to a generated database"""
+    return {
+        "province_ids": [row[0] for row in db.query(Province.id).order_by(Province.id)],
+        "department_ids": [row[0] for row in db.query(Department.id).order_by(Department.id)],
+        "project_ids": [row[0] for row in db.query(Project.id).order_by(Project.id)]
+    }
+
+
+def benchmark_user_id(db: Session) -> Optional[int]:
+    return db.query(User.id).filter(User.email == BENCHMARK_USER_EMAIL).scalar()
+
+
+def sample_transactions(
+    rng: np.random.Generator,
+    count: int,
+    start: date,
+    end: date,
+    reference: Dict[str, List[int]]
+) -> Dict[str, np.ndarray]:
+    """Columns for count synthetic transactions between start and end"""
+    days = np.arange(start.toordinal(), end.toordinal() + 1)
+    weekday = (days - 1) % 7  # date.fromordinal(1) is a Monday
+    month = np.array([date.fromordinal(int(day)).month for day in days])
+    day_of_month = np.array([date.fromordinal(int(day)).day for day in days])
+
+    types = rng.choice(TYPES, size=count, p=TYPE_WEIGHTS)
+    is_receipt = types == "receipt"
+    is_expense = types == "expense"
+
+    # Receipts arrive on Sundays and in December; expenses are paid at month end
+    receipt_weights = np.where(weekday == 6, 6.0, 1.0) * np.where(month == 12, 1.6, 1.0)
+    expense_weights = np.where(day_of_month >= 25, 3.0, 1.0)
+    ordinals = np.empty(count, dtype=np.int64)
+    for mask, weights in ((is_receipt, receipt_weights), (~is_receipt, expense_weights)):
+        ordinals[mask] = rng.choice(days, size=int(mask.sum()), p=weights / weights.sum())
+
+    categories = np.empty(count, dtype=object)
+    categories[is_receipt] = rng.choice(RECEIPT_CATEGORIES, size=int(is_receipt.sum()), p=zipf_weights(len(RECEIPT_CATEGORIES)))
+    categories[~is_receipt] = rng.choice(EXPENSE_CATEGORIES, size=int((~is_receipt).sum()), p=zipf_weights(len(EXPENSE_CATEGORIES)))
+    categories[types == "transfer"] = None
+
+    amounts = np.where(
+        is_receipt,
+        rng.lognormal(mean=4.5, sigma=1.2, size=count),
+        rng.lognormal(mean=5.5, sigma=1.0, size=count)
+    )
+    cents = np.clip(np.round(amounts * 100), 100, 5_000_000).astype(np.int64)
+
+    def optional_ids(ids: List[int], probability: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        chosen = rng.choice(np.array(ids), size=count, p=weights)
+        return np.where(rng.random(count) < probability, chosen, 0)
+
+    province_ids = optional_ids(reference["province_ids"], np.full(count, 0.9), zipf_weights(len(reference["province_ids"])))
+    department_ids = optional_ids(reference["department_ids"], np.where(is_expense, 0.85, 0.2))
+    project_ids = optional_ids(reference["project_ids"], np.full(count, 0.1))
+
+    return {
+        "ordinals": ordinals,
+        "types": types,
+        "cents": cents,
+        "categories": categories,
+        "province_ids": province_ids,
+        "department_ids": department_ids,
+        "project_ids": project_ids
+    }
+
+
+def append_transactions(
+    db: Session,
+    count: int,
+    start: date,
+    end: date,
+    reference: Dict[str, List[int]],
+    seed: int = DEFAULT_SEED,
+    changed_before: Optional[datetime] = None,
+    refresh: bool = True
+) -> None:
+    """Insert count synthetic transactions in batches.
+
+    With changed_before, updated_at is spread over the 30 days before it
+    instead of being the insert time. With refresh (the default) the new
+    rows are added to the rollups and budgets like any other ledger write.
+    """
+    rng = np.random.default_rng(seed + count)
+    now = datetime.utcnow()
+    for offset in range(0, count, INSERT_BATCH_SIZE):
+        size = min(INSERT_BATCH_SIZE, count - offset)
+        columns = sample_transactions(rng, size, start, end, reference)
+        if changed_before is not None:
+            updated = [changed_before - timedelta(seconds=int(seconds)) for seconds in rng.integers(0, 30 * 86400, size)]
+        else:
+            updated = [now] * size
+
+        rows = [
+            {
+                "date": date.fromordinal(ordinal),
+                "type": transaction_type,
+                "amount": Decimal(cents).scaleb(-2),
+                "description": EXPENSE_DESCRIPTIONS.get(category) or (category or "transfer").lower(),
+                "category": category,
+                "province_id": province_id or None,
+                "department_id": department_id or None,
+                "project_id": project_id or None,
+                "updated_at": updated_at
+            }
+            for ordinal, transaction_type, cents, category, province_id, department_id, project_id, updated_at in zip(
+                columns["ordinals"].tolist(),
+                columns["types"].tolist(),
+                columns["cents"].tolist(),
+                columns["categories"].tolist(),
+                columns["province_ids"].tolist(),
+                columns["department_ids"].tolist(),
+                columns["project_ids"].tolist(),
+                updated
+            )
+        ]
+        db.execute(insert(Transaction.__table__), rows)
+        if refresh:
+            rollups = RollupService(db)
+            rollups.record_many([Transaction(**row) for row in rows])
+    if refresh:
+        bump_ledger_version(db)
+    db.commit()
+
+
+def write_upload_csv(path: str, rows: int, reference: Dict[str, List[int]], seed: int = DEFAULT_SEED, start: date = DEFAULT_START) -> None:
+    """Write a bulk upload file in the template's column layout"""
+    rng = np.random.default_rng(seed + rows)
+    columns = sample_transactions(rng, rows, start, get_financial_year_dates(start.year)["end_date"], reference)
+    with open(path, "w", newline="", encoding="utf-8") as fileobj:
+        writer = csv.writer(fileobj)
+        writer.writerow(["date", "type", "amount", "description", "category", "project_id", "department_id", "province_id"])
+        for index in range(rows):
+            category = columns["categories"][index]
+            writer.writerow([
+                date.fromordinal(int(columns["ordinals"][index])).isoformat(),
+                columns["types"][index],
+                f"{columns['cents'][index] / 100:.2f}",
+                EXPENSE_DESCRIPTIONS.get(category) or (category or "transfer").lower(),
+                category or "",
+                columns["project_ids"][index] or "",
+                columns["department_ids"][index] or "",
+                columns["province_ids"][index] or ""
+            ])
+
+
+def counts(db: Session) -> Dict[str, int]:
+    return {
+        "transactions": db.query(func.count(Transaction.id)).scalar(),
+        "provinces": db.query(func.count(Province.id)).scalar(),
+        "departments": db.query(func.count(Department.id)).scalar(),
+        "projects": db.query(func.count(Project.id)).scalar(),
+        "budgets": db.query(func.count(Budget.id)).scalar()
+    }
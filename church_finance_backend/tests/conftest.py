@@ -0,0 +1,94 @@
+"""Shared fixtures: the app's engines point at a throwaway SQLite database.
+
+Run from church_finance_backend:
+
+    pip install -r tests/requirements.txt
+    python -m pytest
+
+Tests that need PostgreSQL read TEST_POSTGRES_URL and are skipped without it.
+"""
+import os
+import tempfile
+
+# Must be set before app.database creates its engines; explicit values also
+# keep a local .env from pointing the tests at a real database
+_database_path = os.path.join(tempfile.mkdtemp(prefix="church-finance-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database_path}"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_database_path}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["JOB_STORAGE_DIR"] = os.path.join(os.path.dirname(_database_path), "job_files")
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, engine, get_db
+from app.models import (  # noqa: F401  registers tables for create_all
+    audit, budget, category_rule, deleted_transaction, department, financial_year, import_job, job,
+    ledger_version, obligation, project, province, province_performance, transaction,
+    transaction_attachment, transaction_rollup, user
+)
+from app.models.ledger_version import LedgerVersion
+from app.services.query_detector import query_budget
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    """A session on the test database; every table is emptied afterwards.
+
+    The ledger version keeps counting across tests, so the module-level
+    response cache and analytics snapshot never serve an earlier test's data.
+    """
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                if table is not LedgerVersion.__table__:
+                    connection.execute(table.delete())
+
+
+@pytest.fixture
+def client_for(db):
+    """Build a TestClient for (prefix, router) pairs, acting as a user with the given role.
+
+    app.main isn't imported: it connects to Microsoft Entra at import time.
+    Sync routes share the db session; async ones open their own on the same
+    database, so commit what they should see.
+    """
+    def build(*routers, role="Admin", user_id="1"):
+        app = FastAPI()
+
+        @app.middleware("http")
+        async def test_user(request: Request, call_next):
+            request.state.user_id = user_id
+            request.state.user_role = role
+            return await call_next(request)
+
+        for prefix, router in routers:
+            app.include_router(router, prefix=prefix)
+        app.dependency_overrides[get_db] = lambda: db
+        return TestClient(app)
+    return build
+
+
+@pytest.fixture
+def max_queries(request):
+    """Fail the test if a block runs more statements than budgeted, or repeats one N+1 style:
+
+        with max_queries(2):
+            client.get("/api/v1/analytics/dashboard")
+    """
+    def budget(limit, allow_n_plus_one=False):
+        return query_budget(limit, request.node.name, allow_n_plus_one)
+    return budget
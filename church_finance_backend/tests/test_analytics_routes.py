@@ -0,0 +1,58 @@
+"""Dashboard and summary endpoints stay within their query budgets"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.transaction import Transaction
+from app.routes import analytics, transactions
+from app.services.rollup_service import RollupService
+from app.services.response_cache import bump_ledger_version
+
+DAY = date(2024, 5, 1)
+
+
+@pytest.fixture
+def client(client_for, db):
+    ledger = [
+        Transaction(date=DAY, type="receipt", amount=Decimal("100.00"), category="Tithe", province_id=1),
+        Transaction(date=DAY, type="receipt", amount=Decimal("20.50"), category="Offering", province_id=2),
+        Transaction(date=DAY, type="expense", amount=Decimal("30.25"), category="Utilities", province_id=1),
+    ]
+    db.add_all(ledger)
+    RollupService(db).record_many(ledger)
+    bump_ledger_version(db)
+    # The async routes read through their own sessions
+    db.commit()
+    return client_for(
+        ("/api/v1/analytics", analytics.router),
+        ("/api/v1/transactions", transactions.router),
+        role="Viewer"
+    )
+
+
+def test_dashboard_is_two_queries_then_served_from_cache(client, max_queries):
+    with max_queries(2):
+        response = client.get("/api/v1/analytics/dashboard")
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["total_receipts"] == 120.5
+    assert response.json()["total_expenses"] == 30.25
+
+    # A hit only reads the ledger version
+    with max_queries(1):
+        cached = client.get("/api/v1/analytics/dashboard")
+    assert cached.headers["X-Cache"] == "HIT"
+    assert cached.content == response.content
+
+
+def test_summary_loads_the_snapshot_once(client, max_queries):
+    # Ledger version and the rows
+    with max_queries(2):
+        summary = client.get("/api/v1/transactions/summary", params={"province_id": 1})
+    assert summary.status_code == 200
+    assert summary.json()["total_count"] == 2
+    assert Decimal(str(summary.json()["net_amount"])) == Decimal("69.75")
+
+    with max_queries(1):
+        client.get("/api/v1/transactions/categories")
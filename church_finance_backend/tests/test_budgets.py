@@ -0,0 +1,66 @@
+"""Budget routes keep actuals reconciled when a budget moves or is deleted"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.budget import Budget
+from app.models.department import Department
+from app.models.transaction import Transaction
+from app.routes import budgets
+from app.utils.helpers import get_financial_year, get_financial_year_dates
+
+YEAR = get_financial_year(date.today())
+
+
+@pytest.fixture
+def client(client_for):
+    return client_for(("/budgets", budgets.router))
+
+
+@pytest.fixture
+def departments(db):
+    music, youth = Department(name="Music"), Department(name="Youth")
+    db.add_all([music, youth])
+    db.flush()
+    start = get_financial_year_dates(YEAR)["start_date"]
+    db.add_all([
+        Transaction(date=start, type="expense", amount=Decimal("40.00"), department_id=music.id),
+        Transaction(date=start, type="expense", amount=Decimal("15.00"), department_id=youth.id),
+    ])
+    db.commit()
+    return music, youth
+
+
+def create_budget(client, department_id, allocated="100.00"):
+    response = client.post("/budgets/", json={"year": YEAR, "department_id": department_id, "allocated_amount": allocated})
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_moving_a_budget_reconciles_both_departments(client, db, departments):
+    music, youth = departments
+    budget = create_budget(client, music.id)
+    assert Decimal(budget["actual_spent"]) == Decimal("40.00")
+
+    response = client.put(f"/budgets/{budget['id']}", json={"department_id": youth.id})
+
+    assert response.status_code == 200
+    assert Decimal(response.json()["actual_spent"]) == Decimal("15.00")
+    assert Decimal(response.json()["variance"]) == Decimal("85.00")
+    db.expire_all()
+    assert music.budget_spent == Decimal("0")
+    assert youth.budget_spent == Decimal("15.00")
+
+
+def test_deleting_a_budget_clears_the_department_mirror(client, db, departments):
+    music, _ = departments
+    budget = create_budget(client, music.id)
+    db.expire_all()
+    assert music.budget_spent == Decimal("40.00")
+
+    assert client.delete(f"/budgets/{budget['id']}").status_code == 204
+
+    db.expire_all()
+    assert db.query(Budget).count() == 0
+    assert music.budget_spent == Decimal("0")
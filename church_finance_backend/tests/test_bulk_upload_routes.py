@@ -0,0 +1,87 @@
+"""Resuming chunked uploads: only the job's owner may resume, and only with the same rows"""
+from decimal import Decimal
+from functools import partialmethod
+
+import pytest
+
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.models.transaction import Transaction
+from app.routes import bulk_upload
+from app.services.bulk_upload_service import RESUME_MISMATCH_ERROR, BulkUploadService
+
+HEADER = "date,type,amount,description\n"
+GOOD = [f"2024-05-01,receipt,{amount},Row {amount}\n" for amount in range(1, 5)]
+
+
+def upload(client, rows, job_id=None):
+    params = {"job_id": job_id} if job_id is not None else {}
+    files = {"file": ("upload.csv", (HEADER + "".join(rows)).encode(), "text/csv")}
+    response = client.post("/bulk-upload/transactions", files=files, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def stored_amounts(db):
+    return [amount for (amount,) in db.query(Transaction.amount).order_by(Transaction.id).all()]
+
+
+@pytest.fixture
+def client_as(client_for, monkeypatch):
+    # Two-row chunks, so a bad fourth row fails after the first chunk commits
+    monkeypatch.setattr(
+        BulkUploadService, "process_streaming_upload", partialmethod(BulkUploadService.process_streaming_upload, chunk_size=2)
+    )
+
+    def build(user_id="1", role="Treasurer"):
+        return client_for(("/bulk-upload", bulk_upload.router), role=role, user_id=user_id)
+    return build
+
+
+@pytest.fixture
+def failed_job(client_as, db):
+    result = upload(client_as(), GOOD[:3] + ["2024-05-01,receipt,0,Bad\n"])
+    assert not result["success"]
+    assert result["rows_committed"] == 2
+    return result["job_id"]
+
+
+def test_a_corrected_file_resumes_after_the_committed_rows(client_as, db, failed_job):
+    result = upload(client_as(), GOOD, job_id=failed_job)
+
+    assert result["success"], result
+    assert result["rows_committed"] == 4
+    assert stored_amounts(db) == [Decimal(amount) for amount in range(1, 5)]
+
+
+@pytest.mark.parametrize("rows", [
+    # A committed row changed
+    ["2024-05-01,receipt,9,Row 1\n"] + GOOD[1:],
+    # Shorter than what was committed
+    GOOD[:1],
+])
+def test_a_different_file_cannot_resume(client_as, db, failed_job, rows):
+    result = upload(client_as(), rows, job_id=failed_job)
+
+    assert not result["success"]
+    assert result["error"] == RESUME_MISMATCH_ERROR
+    assert stored_amounts(db) == [Decimal(1), Decimal(2)]
+
+
+def test_other_users_imports_are_not_found(client_as, db, failed_job):
+    other = client_as(user_id="2")
+
+    assert other.get(f"/bulk-upload/imports/{failed_job}").status_code == 404
+    response = other.post(
+        "/bulk-upload/transactions",
+        files={"file": ("upload.csv", (HEADER + "".join(GOOD)).encode(), "text/csv")},
+        params={"job_id": failed_job},
+    )
+    assert response.status_code == 404
+    db.expire_all()
+    assert db.get(ImportJob, failed_job).status == ImportJobStatus.FAILED
+    assert stored_amounts(db) == [Decimal(1), Decimal(2)]
+
+
+def test_owners_and_admins_can_see_an_import(client_as, failed_job):
+    assert client_as().get(f"/bulk-upload/imports/{failed_job}").json()["rows_committed"] == 2
+    assert client_as(user_id="2", role="Admin").get(f"/bulk-upload/imports/{failed_job}").status_code == 200
@@ -0,0 +1,87 @@
+"""Bulk import converts amounts to cents exactly, like single transactions"""
+from decimal import Decimal
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionDailyRollup
+from app.services.bulk_upload_service import BulkUploadService
+from app.utils.money import to_cents
+
+
+def frame(amounts):
+    return pd.DataFrame({
+        "date": ["2024-05-01"] * len(amounts),
+        "type": ["receipt"] * len(amounts),
+        "amount": amounts,
+        "description": [f"Row {position}" for position in range(len(amounts))],
+    })
+
+
+def stored_amounts(db):
+    return [amount for (amount,) in db.query(Transaction.amount).order_by(Transaction.id).all()]
+
+
+def test_half_cents_round_half_up(db):
+    amounts = ["2.675", "0.125", 1.005, 10, " 1e3"]
+    result = BulkUploadService(db).import_dataframe(frame(amounts), created_by=None)
+
+    assert result["success"], result
+    assert stored_amounts(db) == [Decimal("2.68"), Decimal("0.13"), Decimal("1.01"), Decimal("10.00"), Decimal("1000.00")]
+    assert [to_cents(amount) for amount in stored_amounts(db)] == [to_cents(Decimal(str(amount).strip())) for amount in amounts]
+
+
+def test_csv_amounts_are_read_as_text(db):
+    csv = "date,type,amount,description\n2024-05-01,receipt,0.015,A\n2024-05-01,receipt,0.025,B\n"
+    result = BulkUploadService(db).process_streaming_upload(BytesIO(csv.encode()), "upload.csv", created_by=None)
+
+    assert result["success"], result
+    assert stored_amounts(db) == [Decimal("0.02"), Decimal("0.03")]
+    assert db.query(TransactionDailyRollup.total_amount).scalar() == Decimal("0.05")
+
+
+def test_amounts_that_round_to_zero_are_rejected(db):
+    result = BulkUploadService(db).import_dataframe(frame(["0.004", "abc", "inf", "5"]), created_by=None)
+
+    assert not result["success"]
+    assert [error["row"] for error in result["errors"]] == [1, 2, 3]
+    assert stored_amounts(db) == []
+
+
+
+def test_vectorised_cents_match_to_cents(db):
+    # Every thousandth from 0.005 to 20, plus large amounts given to the cent
+    amounts = [f"{thousandths / 1000:.3f}" for thousandths in range(5, 20001)] + ["9999999999999.99", "123456789.015"]
+    columns, errors = BulkUploadService(db)._prepare_columns(frame(amounts))
+
+    assert errors == {}
+    assert columns["amount_cents"] == [to_cents(amount) for amount in amounts]
+
+
+def test_amounts_beyond_the_column_are_rejected(db):
+    result = BulkUploadService(db).import_dataframe(frame(["1e13", "1e300", "5"]), created_by=None)
+
+    assert not result["success"]
+    assert [error["row"] for error in result["errors"]] == [1, 2]
+    assert stored_amounts(db) == []
+
+
+@pytest.mark.parametrize("capabilities", [
+    {"insert_executemany_returning": False},
+    {"insert_executemany_returning": False, "insert_returning": False},
+])
+def test_returned_ids_are_the_inserted_rows(db, monkeypatch, capabilities):
+    dialect = db.get_bind().dialect
+    for name, value in capabilities.items():
+        monkeypatch.setattr(dialect, name, value)
+    # A gap in the rowids, as left by deleted transactions
+    db.add(Transaction(id=500, date=pd.Timestamp("2024-05-01").date(), type="receipt", amount=Decimal("1.00")))
+    db.commit()
+
+    result = BulkUploadService(db).import_dataframe(frame(["1", "2", "3"]), created_by=None)
+
+    assert result["success"], result
+    amounts = dict(db.query(Transaction.id, Transaction.amount).filter(Transaction.id.in_(result["transaction_ids"])))
+    assert [amounts[row_id] for row_id in result["transaction_ids"]] == [Decimal("1.00"), Decimal("2.00"), Decimal("3.00")]
@@ -0,0 +1,152 @@
+"""Background jobs: ownership checks and recovery after a restart"""
+import json
+import os
+import socket
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.job import Job, JobKind, JobStatus
+from app.services import job_service
+from app.services.job_service import JobService
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        self.submitted.append(args)
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    recording = RecordingExecutor()
+    monkeypatch.setattr(job_service, "_executor", recording)
+    return recording
+
+
+def add_job(db, kind=JobKind.STATEMENT_EXPORT, status=JobStatus.QUEUED, started_at=None, created_by=1, params=None,
+            owner=None, heartbeat_at=None):
+    job = Job(
+        kind=kind, status=status, started_at=started_at, created_by=created_by, params=json.dumps(params or {}),
+        owner=owner, heartbeat_at=heartbeat_at
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def running(db, heartbeat_at, owner=job_service.WORKER_ID, **kwargs):
+    return add_job(db, status=JobStatus.RUNNING, started_at=heartbeat_at, owner=owner, heartbeat_at=heartbeat_at, **kwargs)
+
+
+def dead_pid():
+    pid = 2 ** 22 + 1
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return pid
+        except OSError:
+            pass
+        pid += 1
+
+
+def test_jobs_are_visible_to_their_owner_and_admins_only(db):
+    job = add_job(db, created_by=7)
+    service = JobService(db)
+
+    assert service.get_job_for_user(job.id, "7", "Viewer") is job
+    assert service.get_job_for_user(job.id, "8", "Treasurer") is None
+    assert service.get_job_for_user(job.id, None, None) is None
+    assert service.get_job_for_user(job.id, "8", "Admin") is job
+
+
+def test_recovery_resubmits_queued_jobs_and_restarts_orphaned_exports(db, executor):
+    now = datetime.utcnow()
+    live = now - timedelta(seconds=5)
+    queued = add_job(db)
+    stale = running(db, now - timedelta(minutes=10), owner="other-host:12:abc")
+    other_live_worker = running(db, live, owner="other-host:12:abc")
+    this_worker = running(db, live)
+    # Same host and pid as this process but an earlier boot, e.g. a restarted container
+    earlier_boot = running(db, live, owner=f"{socket.gethostname()}:{os.getpid()}:earlier")
+    exited = running(db, live, owner=f"{socket.gethostname()}:{dead_pid()}:abc")
+    finished = add_job(db, status=JobStatus.COMPLETED, started_at=now - timedelta(minutes=10))
+
+    recovered = JobService(db).recover_interrupted(now=now)
+
+    assert recovered == {"resubmitted": 4, "failed": 0}
+    assert sorted(args[0] for args in executor.submitted) == sorted([queued.id, stale.id, earlier_boot.id, exited.id])
+    db.expire_all()
+    assert stale.status == JobStatus.QUEUED and stale.started_at is None and stale.owner is None
+    assert other_live_worker.status == JobStatus.RUNNING
+    assert this_worker.status == JobStatus.RUNNING
+    assert finished.status == JobStatus.COMPLETED
+
+
+def test_recovery_skips_jobs_that_beat_after_they_were_read(db, executor, monkeypatch):
+    now = datetime.utcnow()
+    job = running(db, now - timedelta(minutes=10), owner="other-host:12:abc")
+    query, calls = db.query, []
+
+    def beat_before_takeover(*entities):
+        # The owner beats between recovery reading the job and taking it over
+        calls.append(entities)
+        if len(calls) == 2:
+            db.execute(Job.__table__.update().where(Job.id == job.id).values(heartbeat_at=now))
+        return query(*entities)
+    monkeypatch.setattr(db, "query", beat_before_takeover)
+
+    assert JobService(db).recover_interrupted(resubmit_queued=False, now=now) == {"resubmitted": 0, "failed": 0}
+    assert len(calls) == 2
+    db.expire_all()
+    assert job.status == JobStatus.RUNNING
+
+
+def test_recovery_fails_interrupted_uploads(db, executor, tmp_path):
+    upload_path = tmp_path / "upload.csv"
+    upload_path.write_text("date,type,amount,description\n")
+    upload = running(
+        db, datetime.utcnow() - timedelta(minutes=10), owner="other-host:12:abc",
+        kind=JobKind.BULK_UPLOAD, params={"upload_path": str(upload_path)}
+    )
+
+    JobService(db).recover_interrupted()
+
+    db.expire_all()
+    assert upload.status == JobStatus.FAILED
+    assert "restart" in upload.error
+    assert not os.path.exists(upload_path)
+    assert executor.submitted == []
+
+
+def test_heartbeat_refreshes_this_workers_jobs(db, executor, monkeypatch):
+    monkeypatch.setattr(job_service, "session_scope", lambda: nullcontext(db))
+    long_ago = datetime.utcnow() - timedelta(minutes=10)
+    mine = running(db, long_ago)
+    theirs = running(db, long_ago, owner="other-host:12:abc")
+
+    job_service.JobHeartbeat.beat()
+
+    db.expire_all()
+    assert mine.status == JobStatus.RUNNING and mine.heartbeat_at > long_ago
+    # The heartbeat also recovers other workers' orphaned jobs
+    assert theirs.status == JobStatus.QUEUED
+    assert [args[0] for args in executor.submitted] == [theirs.id]
+
+
+def test_a_job_submitted_twice_runs_once(db, monkeypatch):
+    runs = []
+    monkeypatch.setitem(job_service.JOB_HANDLERS, JobKind.STATEMENT_EXPORT.value, lambda *args: runs.append(args) or {})
+    job = add_job(db)
+
+    job_service._run_job(job.id)
+    job_service._run_job(job.id)
+
+    db.expire_all()
+    assert len(runs) == 1
+    assert job.status == JobStatus.COMPLETED
+    assert job.owner == job_service.WORKER_ID and job.heartbeat_at is not None
@@ -0,0 +1,154 @@
+"""Entra signing keys: single-flight fetches, rotation and serving stale keys, against a local JWKS stub"""
+import asyncio
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import rsa
+from jose import jwt
+
+from app.auth import ms_entra_jwt
+from app.auth.ms_entra_jwt import JWKSKeyStore, validate_entra_jwt
+
+
+def b64(number: int) -> str:
+    raw = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+@pytest.fixture(scope="module")
+def keys():
+    """Two RSA key pairs by kid, with their public halves as JWKs"""
+    pairs = {}
+    for kid in ("old", "new"):
+        public, private = rsa.newkeys(1024)
+        jwk = {"kty": "RSA", "use": "sig", "alg": "RS256", "kid": kid, "n": b64(public.n), "e": b64(public.e)}
+        pairs[kid] = (jwk, private.save_pkcs1().decode("ascii"))
+    return pairs
+
+
+class JWKSStub:
+    """A JWKS endpoint whose key set, latency and availability tests control"""
+
+    def __init__(self):
+        self.jwks = {"keys": []}
+        self.down = False
+        self.delay = 0.0
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.delay)
+                if stub.down:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps(stub.jwks).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/keys"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def serve(self, *jwks):
+        self.jwks = {"keys": list(jwks)}
+
+
+@pytest.fixture
+def stub():
+    server = JWKSStub()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_cold_start_callers_share_one_fetch(stub, keys):
+    stub.serve(keys["old"][0])
+    stub.delay = 0.2
+    store = JWKSKeyStore(jwks_url=stub.url)
+
+    async def cold_start():
+        return await asyncio.gather(*(store.get_key("old") for _ in range(20)))
+
+    found = run(cold_start())
+
+    assert stub.requests == 1
+    assert len({id(key) for key in found}) == 1
+
+
+def test_an_unknown_kid_refetches_after_rotation(stub, keys):
+    stub.serve(keys["old"][0])
+    store = JWKSKeyStore(jwks_url=stub.url, min_refresh_interval=0)
+    run(store.get_key("old"))
+
+    stub.serve(keys["new"][0])
+    key = run(store.get_key("new"))
+
+    assert key is store._keys["new"]
+    assert stub.requests == 2
+    assert "old" not in store._keys
+
+
+def test_unknown_kids_refetch_at_most_once_per_interval(stub, keys):
+    stub.serve(keys["old"][0])
+    store = JWKSKeyStore(jwks_url=stub.url, min_refresh_interval=60)
+    run(store.get_key("old"))
+
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            run(store.get_key("forged"))
+
+    assert stub.requests == 1
+
+
+def test_stale_keys_are_served_while_the_endpoint_is_down(stub, keys):
+    stub.serve(keys["old"][0])
+    # Every lookup finds the keys expired and tries to refresh
+    store = JWKSKeyStore(jwks_url=stub.url, ttl=0)
+    cached = run(store.get_key("old"))
+
+    stub.down = True
+    assert run(store.get_key("old")) is cached
+    assert stub.requests == 2
+
+
+def test_a_cold_store_fails_while_the_endpoint_is_down(stub):
+    stub.down = True
+    store = JWKSKeyStore(jwks_url=stub.url)
+
+    with pytest.raises(Exception):
+        run(store.get_key("old"))
+
+
+def test_tokens_signed_with_a_rotated_key_validate(stub, keys, monkeypatch):
+    monkeypatch.setattr(ms_entra_jwt, "MS_ENTRA_TENANT_ID", "tenant")
+    monkeypatch.setattr(ms_entra_jwt, "MS_ENTRA_CLIENT_ID", "client")
+    stub.serve(keys["old"][0])
+    store = JWKSKeyStore(jwks_url=stub.url, min_refresh_interval=0)
+    run(store.get_key("old"))
+    stub.serve(keys["old"][0], keys["new"][0])
+    claims = {
+        "iss": "https://login.microsoftonline.com/tenant/v2.0",
+        "aud": "client",
+        "exp": int(time.time()) + 300,
+        "preferred_username": "ada@example.org",
+    }
+    token = jwt.encode(claims, keys["new"][1], algorithm="RS256", headers={"kid": "new"})
+
+    assert run(validate_entra_jwt(token, key_store=store))["preferred_username"] == "ada@example.org"
@@ -0,0 +1,88 @@
+"""The analytics snapshot follows updates and deletes without reloading"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services.ledger_snapshot import LedgerAnalytics
+from app.services.response_cache import bump_ledger_version, get_ledger_version
+from app.services.transaction_service import TransactionService
+
+DAY = date(2024, 5, 1)
+
+
+def create(service, amount, transaction_type="receipt"):
+    return service.create_transaction(
+        TransactionCreate(date=DAY, type=transaction_type, amount=Decimal(amount)), created_by=None
+    )
+
+
+def test_updates_and_deletes_are_merged_incrementally(db):
+    service = TransactionService(db)
+    kept = create(service, "10.00")
+    changed = create(service, "5.00", "expense")
+    removed = create(service, "7.50")
+    analytics = LedgerAnalytics()
+    assert analytics.summary(db)["total_count"] == 3
+
+    service.update_transaction(changed.id, TransactionUpdate(amount=Decimal("6.25")), updated_by=None)
+    service.delete_transaction(removed.id)
+    summary = analytics.summary(db)
+
+    assert summary["total_count"] == 2
+    assert summary["total_receipts"] == Decimal("10.00")
+    assert summary["total_expenses"] == Decimal("6.25")
+    assert analytics.snapshot(db).ids.tolist() == [kept.id, changed.id]
+    assert analytics.stats()["full_loads"] == 1
+    assert analytics.stats()["incremental_refreshes"] == 1
+
+
+def test_a_fresh_load_skips_tombstones_already_applied(db):
+    service = TransactionService(db)
+    removed = create(service, "7.50")
+    service.delete_transaction(removed.id)
+    kept = create(service, "1.00")
+
+    analytics = LedgerAnalytics()
+    snapshot = analytics.snapshot(db)
+    assert snapshot.ids.tolist() == [kept.id]
+
+    create(service, "2.00")
+    assert analytics.summary(db)["total_receipts"] == Decimal("3.00")
+
+
+def test_writes_that_commit_long_after_they_began_are_picked_up(db):
+    service = TransactionService(db)
+    create(service, "1.00")
+    analytics = LedgerAnalytics()
+    analytics.snapshot(db)
+    create(service, "2.00")
+    analytics.snapshot(db)
+
+    # A transaction that began an hour ago: on PostgreSQL its rows carry
+    # that start time as updated_at, older than anything the snapshot saw
+    began = datetime.utcnow() - timedelta(hours=1)
+    slow = Transaction(date=DAY, type="receipt", amount=Decimal("4.00"), created_at=began, updated_at=began)
+    db.add(slow)
+    bump_ledger_version(db)
+    db.commit()
+
+    summary = analytics.summary(db)
+    assert summary["total_receipts"] == Decimal("7.00")
+    assert analytics.stats()["full_loads"] == 1
+    # Stamping the version leaves the write time alone
+    db.expire_all()
+    assert slow.updated_at == began
+    assert slow.ledger_version == get_ledger_version(db)
+
+
+def test_rows_are_stamped_with_the_version_that_committed_them(db):
+    service = TransactionService(db)
+    first = create(service, "1.00")
+    first_version = get_ledger_version(db)
+    second = create(service, "2.00")
+    service.update_transaction(first.id, TransactionUpdate(amount=Decimal("1.50")), updated_by=None)
+
+    db.expire_all()
+    assert second.ledger_version == first_version + 1
+    assert first.ledger_version == first_version + 2 == get_ledger_version(db)
@@ -0,0 +1,34 @@
+"""One-off maintenance: rollup backfill and budget reconciliation, safe to rerun"""
+from datetime import date
+from decimal import Decimal
+
+from app.maintenance import run_maintenance
+from app.models.budget import Budget
+from app.models.department import Department
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionDailyRollup
+from app.utils.helpers import get_financial_year, get_financial_year_dates
+
+YEAR = get_financial_year(date.today())
+
+
+def test_backfills_rollups_and_reconciles_budgets_once(db):
+    music = Department(name="Music")
+    db.add(music)
+    db.flush()
+    start = get_financial_year_dates(YEAR)["start_date"]
+    db.add_all([
+        Transaction(date=start, type="expense", amount=Decimal("40.00"), department_id=music.id),
+        Transaction(date=start, type="expense", amount=Decimal("2.50"), department_id=music.id),
+        Budget(year=YEAR, department_id=music.id, allocated_amount=Decimal("100.00"), actual_spent=Decimal("0")),
+    ])
+    db.commit()
+
+    assert run_maintenance(db) == {"rollups_backfilled": 1, "budgets_reconciled": 1}
+
+    assert db.query(TransactionDailyRollup.total_amount).scalar() == Decimal("42.50")
+    budget = db.query(Budget).one()
+    assert budget.actual_spent == Decimal("42.50")
+    assert budget.variance == Decimal("57.50")
+    assert run_maintenance(db)["rollups_backfilled"] == 0
+    assert db.query(TransactionDailyRollup).count() == 1
@@ -0,0 +1,102 @@
+"""Money helpers: cents conversion and formatting, and exact SQL sums"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionDailyRollup
+from app.services.rollup_service import RollupService
+from app.utils.helpers import format_currency
+from app.utils.money import format_cents, from_cents, sql_from_cents, sql_sum_cents, sum_cents, to_cents
+
+DAY = date(2024, 5, 1)
+# Amounts whose float sums drift: 0.1 and 0.2 have no exact binary form
+AMOUNTS = ["0.10", "0.20", "0.10", "1234567.89", "-0.30", "0.07", "19.99", "-5.01"] * 25
+
+
+@pytest.mark.parametrize("amount, cents", [
+    ("2.675", 268),
+    ("0.125", 13),
+    ("0.124", 12),
+    ("-0.125", -13),
+    ("-2.675", -268),
+    (0.1, 10),
+    (1.005, 101),
+    (-1.005, -101),
+    (7, 700),
+    (-7, -700),
+    (Decimal("1e3"), 100000),
+    (None, 0),
+])
+def test_to_cents_rounds_half_away_from_zero(amount, cents):
+    assert to_cents(amount) == cents
+
+
+@pytest.mark.parametrize("cents, amount", [
+    (0, "0.00"),
+    (5, "0.05"),
+    (-5, "-0.05"),
+    (123450, "1234.50"),
+    (-268, "-2.68"),
+])
+def test_from_cents_is_exact(cents, amount):
+    assert from_cents(cents) == Decimal(amount)
+    assert str(from_cents(cents)) == amount
+    assert to_cents(from_cents(cents)) == cents
+
+
+@pytest.mark.parametrize("cents, text", [
+    (0, "$0.00"),
+    (5, "$0.05"),
+    (-5, "-$0.05"),
+    (-123450, "-$1,234.50"),
+    (123456789, "$1,234,567.89"),
+])
+def test_format_cents(cents, text):
+    assert format_cents(cents) == text
+
+
+@pytest.mark.parametrize("amount, text", [
+    (Decimal("0"), "$0.00"),
+    (Decimal("1234.5"), "$1,234.50"),
+    (Decimal("-1234.5"), "$-1,234.50"),
+    (Decimal("2.675"), "$2.68"),
+    (Decimal("-0.125"), "$-0.13"),
+    (Decimal("1234567.891"), "$1,234,567.89"),
+])
+def test_format_currency_keeps_its_sign_after_the_symbol(amount, text):
+    assert format_currency(amount) == text
+
+
+def test_sum_cents_matches_decimal():
+    assert from_cents(sum_cents(AMOUNTS)) == sum(Decimal(amount) for amount in AMOUNTS)
+    assert sum_cents([0.1] * 10) == 100
+
+
+def test_sql_cents_sums_match_decimal(db):
+    db.add_all([
+        Transaction(date=DAY, type="receipt" if amount[0] != "-" else "expense", amount=Decimal(amount))
+        for amount in AMOUNTS
+    ])
+    db.flush()
+
+    total = db.execute(select(sql_sum_cents(Transaction.amount))).scalar()
+    receipts = db.execute(select(sql_sum_cents(Transaction.amount, Transaction.type == "receipt"))).scalar()
+    none = db.execute(select(sql_sum_cents(Transaction.amount, Transaction.type == "transfer"))).scalar()
+
+    assert from_cents(total) == sum(Decimal(amount) for amount in AMOUNTS)
+    assert from_cents(receipts) == sum(Decimal(amount) for amount in AMOUNTS if amount[0] != "-")
+    assert none == 0
+
+
+def test_rebuilt_rollups_store_exact_sums(db):
+    db.add_all([Transaction(date=DAY, type="receipt", amount=Decimal(amount)) for amount in AMOUNTS])
+    db.flush()
+
+    RollupService(db).rebuild()
+
+    stored = db.query(TransactionDailyRollup.total_amount).scalar()
+    assert stored == sum(Decimal(amount) for amount in AMOUNTS)
+    assert db.execute(select(sql_from_cents(sql_sum_cents(Transaction.amount)))).scalar() == stored
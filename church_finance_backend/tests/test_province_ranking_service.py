@@ -0,0 +1,98 @@
+"""Province ranking: ordering and ties, provinces without receipts, and refreshing in place"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.financial_year import FinancialYear
+from app.models.province import Province
+from app.models.province_performance import ProvincePerformance
+from app.models.transaction import Transaction
+from app.services.province_ranking_service import ProvinceRankingService
+from app.services.response_cache import get_ledger_version
+from app.services.rollup_service import RollupService
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def year(db):
+    financial_year = FinancialYear(
+        start_date=TODAY - timedelta(days=30), end_date=TODAY + timedelta(days=30), year=TODAY.year, is_active=True
+    )
+    db.add(financial_year)
+    db.commit()
+    return financial_year
+
+
+@pytest.fixture
+def provinces(db, year):
+    # Beta and Alpha tie on score and receipts; Central and Delta have no receipts
+    named = {
+        name: Province(name=name, allocation_percent=allocation)
+        for name, allocation in [("Beta", 25), ("Alpha", 25), ("Central", 50), ("Delta", 0)]
+    }
+    db.add_all(named.values())
+    db.flush()
+    add_receipts(db, named["Alpha"], "50.00")
+    add_receipts(db, named["Beta"], "50.00")
+    return named
+
+
+def add_receipts(db, province, amount):
+    transaction = Transaction(date=TODAY, type="receipt", amount=Decimal(amount), province_id=province.id)
+    db.add(transaction)
+    RollupService(db).record(transaction)
+    db.commit()
+
+
+def ranking(db, year):
+    _, rows = ProvinceRankingService(db).get_ranking(year.id)
+    return [(row["rank"], row["province_name"], row["receipts_total"], row["target_amount"], row["performance_score"]) for row in rows]
+
+
+def test_ties_are_broken_by_receipts_then_name(db, year, provinces):
+    assert ranking(db, year) == [
+        (1, "Alpha", Decimal("50.00"), Decimal("25.00"), 200.0),
+        (2, "Beta", Decimal("50.00"), Decimal("25.00"), 200.0),
+        (3, "Central", Decimal("0.00"), Decimal("50.00"), 0.0),
+        (4, "Delta", Decimal("0.00"), Decimal("0.00"), 0.0),
+    ]
+
+
+def test_provinces_with_no_transactions_are_ranked_last(db, year, provinces):
+    add_receipts(db, provinces["Delta"], "1.00")
+    ProvinceRankingService(db).mark_stale(TODAY, TODAY)
+    db.commit()
+
+    # Delta's receipts break its zero-score tie with Central
+    assert [name for _, name, *_ in ranking(db, year)] == ["Alpha", "Beta", "Delta", "Central"]
+
+
+def test_a_refresh_replaces_the_years_rows(db, year, provinces):
+    service = ProvinceRankingService(db)
+    ranking(db, year)
+    add_receipts(db, provinces["Central"], "400.00")
+    service.mark_stale(TODAY, TODAY)
+    db.commit()
+
+    assert ranking(db, year)[0][:2] == (1, "Central")
+    rows = db.query(ProvincePerformance).filter(ProvincePerformance.financial_year_id == year.id).all()
+    assert len(rows) == len(provinces)
+    assert not any(row.is_stale for row in rows)
+
+    assert service.refresh(year) == len(provinces)
+    db.commit()
+    assert db.query(ProvincePerformance).filter(ProvincePerformance.financial_year_id == year.id).count() == len(provinces)
+
+
+def test_the_current_years_rank_is_copied_without_invalidating_reports(db, year, provinces):
+    before = get_ledger_version(db)
+
+    ranking(db, year)
+
+    db.expire_all()
+    assert {name: province.performance_rank for name, province in provinces.items()} == {
+        "Alpha": 1, "Beta": 2, "Central": 3, "Delta": 4
+    }
+    assert get_ledger_version(db) == before
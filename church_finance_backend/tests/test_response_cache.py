@@ -0,0 +1,94 @@
+"""Ledger version bumps and the response cache's entry size cap"""
+import asyncio
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+
+from app.models.ledger_version import LedgerVersion
+from app.models.province import Province
+from app.schemas.transaction import TransactionCreate
+from app.services.bulk_upload_service import BulkUploadService
+from app.services.response_cache import (
+    MemoryCacheBackend, ResponseCache, bump_ledger_version, get_ledger_version, seed_ledger_version
+)
+from app.services.transaction_service import TransactionService
+
+
+def test_the_version_row_exists_from_table_creation(db):
+    assert db.query(LedgerVersion.id).all() == [(1,)]
+
+
+def test_bump_requires_the_seeded_row(db):
+    before = get_ledger_version(db)
+    db.query(LedgerVersion).delete()
+    with pytest.raises(RuntimeError):
+        bump_ledger_version(db)
+
+    seed_ledger_version(db)
+    seed_ledger_version(db)
+    assert db.query(LedgerVersion.version).all() == [(0,)]
+    # Carry on from the old version so cached entries of other tests stay stale
+    db.query(LedgerVersion).update({LedgerVersion.version: before})
+    bump_ledger_version(db)
+    db.commit()
+    assert get_ledger_version(db) == before + 1
+
+
+def test_each_transaction_write_bumps_once(db):
+    before = get_ledger_version(db)
+    service = TransactionService(db)
+    transaction = service.create_transaction(
+        TransactionCreate(date=date(2024, 5, 1), type="receipt", amount=Decimal("10.00")), created_by=None
+    )
+    assert get_ledger_version(db) == before + 1
+
+    service.delete_transaction(transaction.id)
+    assert get_ledger_version(db) == before + 2
+
+
+def test_streaming_upload_bumps_once_per_upload(db):
+    before = get_ledger_version(db)
+    rows = "".join(f"2024-05-01,receipt,{amount},Row\n" for amount in range(1, 8))
+    upload = BytesIO(f"date,type,amount,description\n{rows}".encode())
+
+    result = BulkUploadService(db).process_streaming_upload(upload, "upload.csv", created_by=None, chunk_size=2)
+
+    assert result["success"], result
+    assert result["chunks_committed"] == 4
+    assert get_ledger_version(db) == before + 1
+
+
+def test_failed_upload_still_invalidates_committed_chunks(db):
+    before = get_ledger_version(db)
+    upload = BytesIO(b"date,type,amount,description\n2024-05-01,receipt,5,A\n2024-05-01,receipt,0,B\n")
+
+    result = BulkUploadService(db).process_streaming_upload(upload, "upload.csv", created_by=None, chunk_size=1)
+
+    assert not result["success"]
+    assert get_ledger_version(db) == before + 1
+
+
+def test_province_writes_bump_the_version(db):
+    before = get_ledger_version(db)
+    province = Province(name="North")
+    db.add(province)
+    db.commit()
+    assert get_ledger_version(db) == before + 1
+
+    province.name = "Northern"
+    db.commit()
+    assert get_ledger_version(db) == before + 2
+
+
+def test_oversized_bodies_are_not_stored():
+    backend = MemoryCacheBackend(max_size=10)
+    cache = ResponseCache(backend, max_entry_bytes=8)
+
+    asyncio.run(cache._set("small", b"{}"))
+    asyncio.run(cache._set("large", b'{"rows":[1,2,3]}'))
+
+    assert backend.get("small") == b"{}"
+    assert backend.get("large") is None
+    assert cache.stats()["oversized"] == 1
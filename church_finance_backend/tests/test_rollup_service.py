@@ -0,0 +1,105 @@
+"""Daily rollups: upserts on the unique key, removal and rebuild"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionDailyRollup
+from app.services.rollup_service import RollupService
+
+DAY = date(2024, 5, 1)
+
+
+def transaction(amount, category=None, province_id=None, transaction_type="expense", day=DAY):
+    return Transaction(
+        date=day, type=transaction_type, amount=Decimal(amount), category=category,
+        province_id=province_id, department_id=None, project_id=None
+    )
+
+
+def rollup_rows(db):
+    return db.query(
+        TransactionDailyRollup.type,
+        TransactionDailyRollup.category,
+        TransactionDailyRollup.province_id,
+        TransactionDailyRollup.total_amount,
+        TransactionDailyRollup.transaction_count
+    ).order_by(TransactionDailyRollup.type, TransactionDailyRollup.category).all()
+
+
+def test_writes_to_the_same_key_share_one_row(db):
+    rollups = RollupService(db)
+    rollups.record(transaction("10.10"))
+    db.commit()
+    rollups.record(transaction("0.20"))
+    rollups.record_many([transaction("5.00"), transaction("1.00", category="Utilities", province_id=2)])
+    db.commit()
+
+    assert rollup_rows(db) == [
+        ("expense", None, None, Decimal("15.30"), 3),
+        ("expense", "Utilities", 2, Decimal("1.00"), 1),
+    ]
+
+
+def test_blank_and_missing_categories_share_a_row(db):
+    RollupService(db).record_many([transaction("1.00", category=""), transaction("2.00")])
+    db.commit()
+
+    assert rollup_rows(db) == [("expense", None, None, Decimal("3.00"), 2)]
+
+
+def test_unique_key_rejects_a_duplicate_row(db):
+    RollupService(db).record(transaction("1.00"))
+    db.commit()
+
+    with pytest.raises(IntegrityError):
+        db.execute(insert(TransactionDailyRollup.__table__).values(
+            day=DAY, type="expense", total_amount=1, transaction_count=1
+        ))
+        db.commit()
+
+
+def test_removing_the_last_transaction_deletes_only_its_row(db):
+    rollups = RollupService(db)
+    first = transaction("4.00")
+    rollups.record_many([first, transaction("2.00", province_id=1)])
+    db.commit()
+
+    rollups.remove(first)
+    db.commit()
+
+    assert rollup_rows(db) == [("expense", None, 1, Decimal("2.00"), 1)]
+
+
+def test_replace_moves_the_amount_between_keys(db):
+    rollups = RollupService(db)
+    moved = transaction("7.50", category="Rent")
+    rollups.record(moved)
+    db.commit()
+
+    old_key, old_amount = rollups.key_for(moved), moved.amount
+    moved.category, moved.amount = "Utilities", Decimal("8.00")
+    rollups.replace(old_key, old_amount, moved)
+    db.commit()
+
+    assert rollup_rows(db) == [("expense", "Utilities", None, Decimal("8.00"), 1)]
+
+
+def test_rebuild_matches_incremental_maintenance(db):
+    rows = [
+        transaction("3.33", category="Rent", province_id=1),
+        transaction("1.11", category="Rent", province_id=1),
+        transaction("9.99", transaction_type="receipt"),
+    ]
+    db.add_all(rows)
+    RollupService(db).record_many(rows)
+    db.commit()
+    incremental = rollup_rows(db)
+
+    RollupService(db).rebuild()
+    db.commit()
+
+    assert rollup_rows(db) == incremental
@@ -0,0 +1,130 @@
+"""Verified token cache: LRU bound, TTL and exp expiry, and its use by the auth middleware"""
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.auth import token_cache
+from app.auth.token_cache import VerifiedTokenCache
+from app.middleware import auth_middleware
+from app.models.user import User
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(token_cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def test_hits_return_the_cached_user(clock):
+    cache = VerifiedTokenCache(max_size=10, ttl_seconds=60)
+    cache.put("token", "7", "Treasurer", exp=None)
+
+    assert cache.get("token") == ("7", "Treasurer")
+    assert cache.get("other") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = VerifiedTokenCache(max_size=10, ttl_seconds=60)
+    cache.put("token", "7", "Treasurer", exp=None)
+
+    clock.value += 59
+    assert cache.get("token") == ("7", "Treasurer")
+    clock.value += 1
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_the_tokens_exp_caps_the_ttl(clock):
+    cache = VerifiedTokenCache(max_size=10, ttl_seconds=60)
+    cache.put("short", "7", "Treasurer", exp=clock.value + 10)
+    cache.put("long", "8", "Viewer", exp=clock.value + 3600)
+    cache.put("expired", "9", "Viewer", exp=clock.value - 1)
+
+    clock.value += 10
+    assert cache.get("short") is None
+    assert cache.get("long") == ("8", "Viewer")
+    assert cache.get("expired") is None
+    clock.value += 50
+    assert cache.get("long") is None
+
+
+def test_the_least_recently_used_entry_is_evicted(clock):
+    cache = VerifiedTokenCache(max_size=2, ttl_seconds=60)
+    cache.put("a", "1", "Viewer", exp=None)
+    cache.put("b", "2", "Viewer", exp=None)
+    cache.get("a")
+    cache.put("c", "3", "Viewer", exp=None)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ("1", "Viewer")
+    assert cache.get("c") == ("3", "Viewer")
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
+
+
+def test_raw_tokens_are_not_kept(clock):
+    cache = VerifiedTokenCache(max_size=2, ttl_seconds=60)
+    cache.put("secret-token", "1", "Viewer", exp=None)
+
+    assert "secret-token" not in cache._entries
+
+
+@pytest.fixture
+def entra_client(db, monkeypatch, clock):
+    """An app behind the auth middleware that accepts any token as an Entra token for ada@example.org"""
+    db.add(User(name="Ada", email="ada@example.org", role="Treasurer", auth_provider="microsoft"))
+    db.commit()
+    monkeypatch.setattr(auth_middleware, "verified_tokens", VerifiedTokenCache(max_size=10, ttl_seconds=60))
+
+    async def validate(token):
+        return {"preferred_username": "ada@example.org", "exp": clock.value + 3600}
+    monkeypatch.setattr(auth_middleware, "validate_entra_jwt", validate)
+
+    lookups, loop_threads = [], []
+    find_user = auth_middleware._find_user
+
+    def recording_find_user(email):
+        lookups.append(threading.current_thread())
+        return find_user(email)
+    monkeypatch.setattr(auth_middleware, "_find_user", recording_find_user)
+
+    app = FastAPI()
+    app.middleware("http")(auth_middleware.auth_middleware)
+
+    @app.get("/whoami")
+    async def whoami(request: Request):
+        loop_threads.append(threading.current_thread())
+        return {"user_id": request.state.user_id, "role": request.state.user_role, "path": request.state.auth_path}
+
+    return TestClient(app), lookups, loop_threads
+
+
+def test_entra_lookups_run_in_the_threadpool_and_are_cached(entra_client, db):
+    client, lookups, loop_threads = entra_client
+    headers = {"Authorization": "Bearer entra-token"}
+    user_id = str(db.query(User.id).scalar())
+
+    first = client.get("/whoami", headers=headers).json()
+    second = client.get("/whoami", headers=headers).json()
+
+    assert first == {"user_id": user_id, "role": "Treasurer", "path": "entra"}
+    assert second == {"user_id": user_id, "role": "Treasurer", "path": "cached"}
+    assert len(lookups) == 1
+    # Not on the thread running the event loop
+    assert lookups[0] is not loop_threads[0]
+
+
+def test_expired_entries_verify_again(entra_client, clock):
+    client, lookups, _ = entra_client
+    headers = {"Authorization": "Bearer entra-token"}
+
+    client.get("/whoami", headers=headers)
+    clock.value += 60
+    response = client.get("/whoami", headers=headers)
+
+    assert response.json()["path"] == "entra"
+    assert len(lookups) == 2
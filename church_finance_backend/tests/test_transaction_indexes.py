@@ -0,0 +1,171 @@
+"""Statement, dashboard and budget queries are served by indexes, not table scans.
+
+Each case runs a real service call, captures the SELECTs it sent for one
+table and EXPLAINs them on the same connection. On PostgreSQL sequential
+scans are disabled for the session first: the tables here are tiny, so the
+question is whether an index can serve the query at all.
+"""
+import os
+import re
+import uuid
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.services.budget_reconciliation_service import BudgetReconciliationService
+from app.services.financial_statements_service import FinancialStatementsService
+from app.services.ledger_snapshot import LedgerAnalytics, LedgerSnapshot
+from app.services.rollup_service import RollupService
+from app.services.transaction_service import TransactionService
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+START = date(2024, 4, 1)
+END = date(2025, 3, 31)
+
+
+def refresh_snapshot(db):
+    """Incrementally refresh a snapshot loaded at ledger version 1"""
+    current = LedgerSnapshot(LedgerSnapshot._empty_columns(), [], 1)
+    LedgerAnalytics()._refresh(db, current, 2)
+
+
+# (case, service call, table, indexes any of which may serve the query)
+CASES = [
+    (
+        "province statement",
+        lambda db: FinancialStatementsService(db).generate_province_statement(1, START, END),
+        "transactions",
+        {"ix_transactions_province_date"},
+    ),
+    (
+        "province totals",
+        lambda db: FinancialStatementsService(db)._get_province_totals(1, START, END),
+        "transactions",
+        {"ix_transactions_province_date"},
+    ),
+    (
+        "province summary",
+        lambda db: TransactionService(db).get_transaction_summary(province_id=1, start_date=START, end_date=END),
+        "transactions",
+        {"ix_transactions_province_date"},
+    ),
+    (
+        "expense totals by category",
+        lambda db: TransactionService(db).get_category_breakdown(START, END),
+        "transactions",
+        {"ix_transactions_type_category_date", "ix_transactions_type_date_amount"},
+    ),
+    (
+        "budget expense totals",
+        lambda db: BudgetReconciliationService(db).reconcile(2024),
+        "transactions",
+        {"ix_transactions_type_date_amount", "ix_transactions_department_date"},
+    ),
+    (
+        "dashboard totals",
+        lambda db: RollupService(db).totals_by_type(START, END),
+        "transaction_daily_rollups",
+        {"ix_rollups_type_day", "uq_rollups_key"},
+    ),
+    (
+        "statement totals",
+        lambda db: RollupService(db).totals_by_type_and_category(START, END),
+        "transaction_daily_rollups",
+        {"ix_rollups_type_day", "uq_rollups_key"},
+    ),
+    (
+        "snapshot changed rows",
+        refresh_snapshot,
+        "transactions",
+        {"ix_transactions_ledger_version"},
+    ),
+    (
+        "snapshot deleted rows",
+        refresh_snapshot,
+        "deleted_transactions",
+        {"ix_deleted_transactions_ledger_version"},
+    ),
+]
+
+
+def query_plans(db: Session, call, table: str):
+    """Run call(db) and return the plan text of each SELECT it sent for table"""
+    statements = []
+    from_table = re.compile(rf"\bFROM {table}\b", re.IGNORECASE)
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() == "SELECT" and from_table.search(statement):
+            statements.append((statement, parameters))
+
+    bind = db.get_bind()
+    event.listen(bind, "before_cursor_execute", capture)
+    try:
+        call(db)
+    finally:
+        event.remove(bind, "before_cursor_execute", capture)
+    assert statements, f"no SELECT on {table} was run"
+
+    dialect = bind.dialect.name
+    cursor = db.connection().connection.cursor()
+    try:
+        plans = []
+        for statement, parameters in statements:
+            if dialect == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+                plans.append("\n".join(row[-1] for row in cursor.fetchall()))
+            else:
+                cursor.execute("SET enable_seqscan = off")
+                cursor.execute("EXPLAIN " + statement, parameters)
+                plans.append("\n".join(row[0] for row in cursor.fetchall()))
+        return plans
+    finally:
+        cursor.close()
+
+
+def assert_uses_index(plan: str, dialect: str, table: str, indexes):
+    if dialect == "sqlite":
+        full_scan = re.search(rf"^SCAN (TABLE )?{table}$", plan, re.MULTILINE)
+        used = any(re.search(rf"INDEX {index}\b", plan) for index in indexes)
+    else:
+        full_scan = re.search(rf"Seq Scan on {table}\b", plan)
+        used = any(re.search(rf"\b{index}\b", plan) for index in indexes)
+    assert not full_scan, f"full scan of {table}:\n{plan}"
+    assert used, f"expected one of {sorted(indexes)}:\n{plan}"
+
+
+@pytest.fixture
+def postgres_db():
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    # Each run gets its own schema, dropped afterwards
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    engine = create_engine(TEST_POSTGRES_URL, connect_args={"options": f"-csearch_path={schema}"})
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA "{schema}"'))
+    try:
+        Base.metadata.create_all(bind=engine)
+        session = Session(bind=engine)
+        try:
+            yield session
+        finally:
+            session.close()
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        engine.dispose()
+
+
+@pytest.mark.parametrize("case, call, table, indexes", CASES, ids=[case[0] for case in CASES])
+def test_sqlite_plans_use_indexes(db, case, call, table, indexes):
+    for plan in query_plans(db, call, table):
+        assert_uses_index(plan, "sqlite", table, indexes)
+
+
+@pytest.mark.parametrize("case, call, table, indexes", CASES, ids=[case[0] for case in CASES])
+def test_postgres_plans_use_indexes(postgres_db, case, call, table, indexes):
+    for plan in query_plans(postgres_db, call, table):
+        assert_uses_index(plan, "postgresql", table, indexes)
@@ -0,0 +1,97 @@
+"""Cursor pagination of the transaction list"""
+import base64
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.transaction import Transaction
+from app.routes import transactions
+from app.utils.helpers import encode_cursor
+
+DAYS = [date(2024, 5, 3), date(2024, 5, 2), date(2024, 5, 1)]
+
+
+@pytest.fixture
+def ledger(db):
+    # Several rows share each date, so pages must break ties on id
+    rows = [
+        Transaction(date=day, type=transaction_type, amount=Decimal("1.00") + position, province_id=position % 2 + 1)
+        for day in DAYS
+        for position, transaction_type in enumerate(["receipt", "expense", "receipt", "expense"])
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+@pytest.fixture
+def client(client_for):
+    return client_for(("/transactions", transactions.router))
+
+
+def fetch_all(client, **params):
+    """Follow next_cursor until the last page; returns the pages' ids"""
+    pages, cursor = [], None
+    while True:
+        query = {"pagination": "cursor", **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/transactions/", params=query)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        pages.append([item["id"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def newest_first(rows):
+    return [row.id for row in sorted(rows, key=lambda row: (row.date, row.id), reverse=True)]
+
+
+def test_cursor_pages_cover_every_row_once_across_equal_dates(client, ledger):
+    pages = fetch_all(client, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 3, 3]
+    assert [row_id for page in pages for row_id in page] == newest_first(ledger)
+
+
+def test_a_full_last_page_has_no_next_cursor(client, ledger):
+    response = client.get("/transactions/", params={"pagination": "cursor", "limit": len(ledger)})
+
+    assert len(response.json()["items"]) == len(ledger)
+    assert response.json()["next_cursor"] is None
+
+
+def test_filters_apply_on_every_page(client, ledger):
+    pages = fetch_all(client, limit=2, province_id=1, transaction_type="receipt")
+
+    expected = [row for row in ledger if row.province_id == 1 and row.type == "receipt"]
+    assert [row_id for page in pages for row_id in page] == newest_first(expected)
+
+
+def test_cursor_resumes_after_the_encoded_row(client, ledger):
+    middle = sorted(ledger, key=lambda row: (row.date, row.id), reverse=True)[4]
+    response = client.get("/transactions/", params={"cursor": encode_cursor(middle.date, middle.id), "limit": 100})
+
+    assert [item["id"] for item in response.json()["items"]] == newest_first(ledger)[5:]
+
+
+def encode(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor!",
+    encode(b"[1, 2]"),
+    encode(b'{"d": "2024-05-02"}'),
+    encode(b'{"d": "yesterday", "i": 3}'),
+    encode(b'{"d": "2024-05-02", "i": "three"}'),
+    encode_cursor(date(2024, 5, 2), 3)[:-2],
+])
+def test_invalid_or_tampered_cursors_are_rejected(client, ledger, cursor):
+    response = client.get("/transactions/", params={"pagination": "cursor", "cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
@@ -107,4 +107,76 @@ export const useApiDelete = () => {
   };
 
   return { loading, error, deleteData };
-};
\ No newline at end of file
+};
+
+// Custom hook for cursor-paginated list endpoints ({ items, next_cursor })
+export const useCursorApi = (url, params = {}, pageSize = 100) => {
+  const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+
+  // Serialise params so a new object with the same values does not refetch
+  const paramsKey = JSON.stringify(params);
+
+  const fetchPage = useCallback(async (cursor) => {
+    const query = { ...JSON.parse(paramsKey), pagination: 'cursor', limit: pageSize };
+    Object.keys(query).forEach((key) => {
+      if (query[key] === '' || query[key] === null || query[key] === undefined) {
+        delete query[key];
+      }
+    });
+    if (cursor) {
+      query.cursor = cursor;
+    }
+    const response = await axios.get(url, { params: query });
+    return response.data;
+  }, [url, paramsKey, pageSize]);
+
+  const fetchFirstPage = useCallback(async () => {
+    if (!url) {
+      setLoading(false);
+      return;
+    }
+
+    try {
+      setLoading(true);
+      setError(null);
+      const page = await fetchPage(null);
+      setItems(page.items);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setError(err.response?.data?.detail || err.message);
+    } finally {
+      setLoading(false);
+    }
+  }, [url, fetchPage]);
+
+  useEffect(() => {
+    fetchFirstPage();
+  }, [fetchFirstPage]);
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage(nextCursor);
+      setItems((previous) => [...previous, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setError(err.response?.data?.detail || err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const refetch = () => {
+    fetchFirstPage();
+  };
+
+  return { items, loading, loadingMore, error, hasMore: nextCursor !== null, loadMore, refetch };
+};
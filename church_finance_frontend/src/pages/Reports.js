@@ -6,7 +6,11 @@ import ChartContainer from '../components/ChartContainer';
 const Reports = () => {
   const [reportType, setReportType] = useState('budget-vs-actual');
   const [selectedYear, setSelectedYear] = useState(new Date().getFullYear());
-  const { loading, error } = useApi(`/api/v1/analytics/dashboard/${selectedYear}`);
+  // All period statements for the selected year arrive in a single request
+  const { data: statements, loading, error } = useApi(
+    `/api/v1/statements/bundle?start_date=${selectedYear}-01-01&end_date=${selectedYear}-12-31`
+  );
+  const expenses = statements?.income_expenditure?.expenses || [];
 
   const budgetComparisonData = {
     labels: ['Department A', 'Department B', 'Department C', 'Department D'],
@@ -25,10 +29,10 @@ const Reports = () => {
   };
 
   const expenseDistributionData = {
-    labels: ['Travel', 'Office Supplies', 'Equipment', 'Utilities', 'Food', 'Maintenance'],
+    labels: expenses.map(expense => expense.category || 'Uncategorized'),
     datasets: [
       {
-        data: [12, 19, 8, 15, 10, 7],
+        data: expenses.map(expense => expense.amount),
         backgroundColor: [
           '#FF6384',
           '#36A2EB',
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import TransactionTable from '../components/TransactionTable';
 import TransactionForm from '../components/TransactionForm';
-import { useApi, useApiPost, useApiPut, useApiDelete } from '../hooks/useApi';
+import { useApi, useCursorApi, useApiPost, useApiPut, useApiDelete } from '../hooks/useApi';
 import { FaPlus, FaFilter, FaDownload } from 'react-icons/fa';
 
 const Transactions = () => {
@@ -17,7 +17,20 @@ const Transactions = () => {
   const [departments, setDepartments] = useState([]);
   const [projects, setProjects] = useState([]);
 
-  const { data: transactions, loading, error, refetch } = useApi('/api/v1/transactions');
+  const {
+    items: transactions,
+    loading,
+    loadingMore,
+    error,
+    hasMore,
+    loadMore,
+    refetch
+  } = useCursorApi('/api/v1/transactions', {
+    transaction_type: filters.type,
+    category: filters.category,
+    start_date: filters.startDate,
+    end_date: filters.endDate
+  });
   const { data: provincesData } = useApi('/api/v1/provinces');
   const { data: departmentsData } = useApi('/api/v1/departments');
   const { data: projectsData } = useApi('/api/v1/projects');
@@ -69,15 +82,6 @@ const Transactions = () => {
     });
   };
 
-  const filteredTransactions = transactions?.filter(transaction => {
-    return (
-      (filters.type === '' || transaction.type === filters.type) &&
-      (filters.category === '' || transaction.category === filters.category) &&
-      (!filters.startDate || transaction.date >= filters.startDate) &&
-      (!filters.endDate || transaction.date <= filters.endDate)
-    );
-  });
-
   if (loading) {
     return <div className="flex items-center justify-center h-64">Loading transactions...</div>;
   }
@@ -181,10 +185,21 @@ const Transactions = () => {
               </div>
             </div>
             <TransactionTable
-              transactions={filteredTransactions}
+              transactions={transactions}
               onEdit={handleEdit}
               onDelete={handleDelete}
             />
+            {hasMore && (
+              <div className="flex justify-center mt-4">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="btn-secondary"
+                >
+                  {loadingMore ? 'Loading...' : 'Load More'}
+                </button>
+              </div>
+            )}
           </div>
         </>
       )}